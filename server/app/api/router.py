@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.routes import analytics, diagnostics, evaluations, judges, judgex, queue, submissions
+from app.api.routes import analytics, diagnostics, evaluations, judges, judgex, queue, similarity, submissions
 
 api_router = APIRouter()
 api_router.include_router(submissions.router)
@@ -8,4 +8,5 @@ api_router.include_router(queue.router)
 api_router.include_router(evaluations.router)
 api_router.include_router(diagnostics.router)
 api_router.include_router(analytics.router)
-api_router.include_router(judgex.router)
\ No newline at end of file
+api_router.include_router(judgex.router)
+api_router.include_router(similarity.router)
\ No newline at end of file
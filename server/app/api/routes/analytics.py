@@ -1,21 +1,23 @@
 from datetime import datetime
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from supabase import Client
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from supabase import AsyncClient
 from app.core.config import get_settings
-from app.core.supabase import get_supabase_client
+from app.core.supabase import get_async_supabase_client
 from app.services.analytics_service import get_pass_rate_by_judge
+from app.services.response_cache import cached_json_response
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
 @router.get("/pass_rate_by_judge")
-def pass_rate_by_judge(
+async def pass_rate_by_judge(
+    request: Request,
     queue_id: str = Query(..., description="Queue identifier"),
     from_ts: Optional[int] = Query(None, alias="from", description="Inclusive start timestamp (seconds since epoch)"),
     to_ts: Optional[int] = Query(None, alias="to", description="Inclusive end timestamp (seconds since epoch)"),
     interval: Optional[str] = Query(None, description="Aggregation interval: hour, day, week, or month"),
     limit: Optional[int] = Query(None, ge=1, le=50, description="Maximum number of judges to return"),
-    supabase: Client = Depends(get_supabase_client),
+    supabase: AsyncClient = Depends(get_async_supabase_client),
 ):
     try:
         start = datetime.fromtimestamp(from_ts) if from_ts else None
@@ -25,17 +27,15 @@ def pass_rate_by_judge(
 
     settings = get_settings()
     limit_judges = limit if limit is not None else settings.analytics_top_judges
+    interval_key = interval or settings.analytics_default_interval
 
-    try:
-        payload = get_pass_rate_by_judge(
-            supabase,
-            queue_id,
-            start,
-            end,
-            interval or settings.analytics_default_interval,
-            limit_judges,
-        )
-    except ValueError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    async def compute():
+        try:
+            return await get_pass_rate_by_judge(supabase, queue_id, start, end, interval_key, limit_judges)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    return payload
\ No newline at end of file
+    params = {"queue_id": queue_id, "from": from_ts, "to": to_ts, "interval": interval_key, "limit": limit_judges}
+    return await cached_json_response(
+        request, supabase, "pass_rate_by_judge", params, [f"queue:{queue_id}", "judges"], compute
+    )
\ No newline at end of file
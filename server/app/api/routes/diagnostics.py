@@ -1,38 +1,61 @@
 import json
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi.responses import StreamingResponse
-from supabase import Client
-from app.core.supabase import get_supabase_client
+from supabase import AsyncClient
+from app.core.supabase import get_async_supabase_client
 from app.services.analytics_service import get_dashboard_summary, list_recent_queues
-from app.services.job_service import debug_queue, get_job_status, stream_live_status
+from app.services.job_service import debug_queue, get_job_status
+from app.services.live_status import get_live_status_broadcaster
+from app.services.response_cache import cached_json_response, get_response_cache
 
 router = APIRouter(prefix="/diagnostics", tags=["diagnostics"])
 
 @router.get("/job_status")
-def job_status(queue_id: str):
-    supabase: Client = get_supabase_client()
+async def job_status(queue_id: str):
+    supabase: AsyncClient = await get_async_supabase_client()
     try:
-        return get_job_status(supabase, queue_id)
+        return await get_job_status(supabase, queue_id)
     except Exception as exc:
         raise HTTPException(status_code=500, detail="Failed to fetch job status") from exc
 
 @router.get("/summary")
-def summary():
-    supabase: Client = get_supabase_client()
-    return get_dashboard_summary(supabase)
+async def summary(request: Request, estimated: bool = Query(False)):
+    supabase: AsyncClient = await get_async_supabase_client()
+    return await cached_json_response(
+        request,
+        supabase,
+        "summary",
+        {"estimated": estimated},
+        ["*"],
+        lambda: get_dashboard_summary(supabase, estimated),
+    )
 
 @router.get("/queues")
-def recent_queues(limit: int = 15):
-    supabase: Client = get_supabase_client()
-    items = list_recent_queues(supabase, limit)
-    return {"queues": items}
+async def recent_queues(request: Request, limit: int = 15, estimated: bool = Query(False)):
+    supabase: AsyncClient = await get_async_supabase_client()
+
+    async def compute():
+        items = await list_recent_queues(supabase, limit, estimated)
+        return {"queues": items}
+
+    return await cached_json_response(
+        request, supabase, "queues", {"limit": limit, "estimated": estimated}, ["*"], compute
+    )
+
+@router.get("/cache_stats")
+async def cache_stats():
+    return get_response_cache().stats()
 
 @router.get("/live_job_status")
-def live_job_status(queue_id: str):
-    supabase: Client = get_supabase_client()
+async def live_job_status(queue_id: str):
+    supabase: AsyncClient = await get_async_supabase_client()
 
     async def event_generator():
-        async for payload in stream_live_status(supabase, queue_id):
-            yield f"data: {json.dumps(payload)}\n\n"
+        # Snapshots come from one shared poller per queue; None means nothing changed for a while.
+        async for payload in get_live_status_broadcaster().subscribe(supabase, queue_id):
+            if payload is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"data: {json.dumps(payload)}\n\n"
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
\ No newline at end of file
@@ -1,27 +1,29 @@
 from typing import Optional
 from fastapi import APIRouter, Query
-from supabase import Client
-from app.core.supabase import get_supabase_client
+from fastapi.responses import StreamingResponse
+from supabase import AsyncClient
+from app.core.supabase import get_async_supabase_client
 from app.core.config import get_settings
-from app.services.evaluation_service import fetch_evaluations
+from app.services.evaluation_service import export_evaluations, fetch_evaluations
 
 router = APIRouter(prefix="/evaluations", tags=["evaluations"])
 
 @router.get("")
-def list_evaluations(
+async def list_evaluations(
     queue_id: Optional[str] = Query(None),
     judge_id: Optional[str] = Query(None),
     question_id: Optional[str] = Query(None),
     verdict: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     limit: int = Query(None, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
 ):
-    supabase: Client = get_supabase_client()
+    supabase: AsyncClient = await get_async_supabase_client()
     settings = get_settings()
     judge_ids = judge_id.split(",") if judge_id else None
     question_ids = question_id.split(",") if question_id else None
     page_limit = limit or settings.evaluations_page_limit
-    return fetch_evaluations(
+    return await fetch_evaluations(
         supabase,
         queue_id=queue_id,
         judge_ids=judge_ids,
@@ -29,4 +31,20 @@ def list_evaluations(
         verdict=verdict,
         page=page,
         limit=page_limit,
-    )
\ No newline at end of file
+        cursor=cursor,
+    )
+
+@router.get("/export")
+async def export_evaluations_ndjson(
+    queue_id: Optional[str] = Query(None),
+    judge_id: Optional[str] = Query(None),
+    question_id: Optional[str] = Query(None),
+    verdict: Optional[str] = Query(None),
+):
+    supabase: AsyncClient = await get_async_supabase_client()
+    judge_ids = judge_id.split(",") if judge_id else None
+    question_ids = question_id.split(",") if question_id else None
+    return StreamingResponse(
+        export_evaluations(supabase, queue_id=queue_id, judge_ids=judge_ids, question_ids=question_ids, verdict=verdict),
+        media_type="application/x-ndjson",
+    )
@@ -1,8 +1,8 @@
-from typing import List, Dict
-from fastapi import APIRouter, HTTPException
-from supabase import Client
+from typing import List, Dict, Optional
+from fastapi import APIRouter, HTTPException, Query
+from supabase import AsyncClient
 from app.models import Assignment
-from app.core.supabase import get_supabase_client
+from app.core.supabase import get_async_supabase_client
 from app.core.config import get_settings
 from app.services.queue_service import (
     fetch_assignments,
@@ -10,29 +10,61 @@ from app.services.queue_service import (
     list_questions,
     enqueue_judge_jobs,
 )
+from app.services.bulk_service import list_bulk_batches, poll_bulk_batches, submit_bulk_run
 
 router = APIRouter(prefix="/queue", tags=["queue"])
 
 @router.get("/questions")
-def get_questions(queue_id: str):
-    supabase: Client = get_supabase_client()
-    return list_questions(supabase, queue_id)
+async def get_questions(queue_id: str):
+    supabase: AsyncClient = await get_async_supabase_client()
+    return await list_questions(supabase, queue_id)
 
 @router.get("/assignments")
-def get_assignments(queue_id: str):
-    supabase: Client = get_supabase_client()
-    return fetch_assignments(supabase, queue_id)
+async def get_assignments(queue_id: str):
+    supabase: AsyncClient = await get_async_supabase_client()
+    return await fetch_assignments(supabase, queue_id)
 
 @router.post("/assignments")
-def create_assignments(assignments: List[Assignment]):
-    supabase: Client = get_supabase_client()
+async def create_assignments(assignments: List[Assignment]):
+    supabase: AsyncClient = await get_async_supabase_client()
     payload: List[Dict] = [assignment.dict(exclude_unset=True) for assignment in assignments]
     if not payload:
         raise HTTPException(status_code=400, detail="No assignments provided")
-    return save_assignments(supabase, payload)
+    return await save_assignments(supabase, payload)
 
 @router.post("/run")
-async def run_queue(queue_id: str):
-    supabase: Client = get_supabase_client()
+async def run_queue(
+    queue_id: str,
+    dedupe: bool = Query(False, description="Judge one representative per near-duplicate answer cluster"),
+    distance: Optional[int] = Query(None, ge=0, le=64, description="Maximum simhash Hamming distance within a cluster"),
+    delta: bool = Query(False, description="Only enqueue combinations with a missing or outdated evaluation"),
+    dry_run: bool = Query(False, description="Count the jobs a run would enqueue without writing them"),
+    bulk: bool = Query(False, description="Send pending OpenAI/Anthropic jobs through the provider batch APIs"),
+):
+    supabase: AsyncClient = await get_async_supabase_client()
     settings = get_settings()
-    return enqueue_judge_jobs(queue_id, supabase, settings)
\ No newline at end of file
+    result = await enqueue_judge_jobs(
+        queue_id,
+        supabase,
+        settings,
+        dedupe=dedupe,
+        dedupe_distance=distance,
+        delta=delta,
+        dry_run=dry_run,
+    )
+    if bulk and not dry_run:
+        try:
+            result["bulk"] = await submit_bulk_run(supabase, queue_id, settings)
+        except Exception as exc:
+            raise HTTPException(status_code=500, detail="Failed to submit bulk batches") from exc
+    return result
+
+@router.get("/bulk")
+async def bulk_batches(queue_id: Optional[str] = None, limit: int = Query(50, ge=1, le=500)):
+    supabase: AsyncClient = await get_async_supabase_client()
+    return {"batches": await list_bulk_batches(supabase, queue_id, limit)}
+
+@router.post("/bulk/poll")
+async def poll_bulk():
+    supabase: AsyncClient = await get_async_supabase_client()
+    return await poll_bulk_batches(supabase)
\ No newline at end of file
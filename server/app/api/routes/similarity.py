@@ -0,0 +1,33 @@
+from typing import Literal
+from fastapi import APIRouter, HTTPException, Query
+from supabase import AsyncClient
+from app.core.supabase import get_async_supabase_client
+from app.services.simhash_index import find_clusters, find_similar
+
+router = APIRouter(prefix="/similarity", tags=["similarity"])
+
+@router.get("/submissions/{submission_id}")
+async def similar_submissions(submission_id: str, k: int = Query(3, ge=0, le=64)):
+    supabase: AsyncClient = await get_async_supabase_client()
+    try:
+        return await find_similar(supabase, "submissions", submission_id, k)
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+@router.get("/evaluations/{evaluation_id}")
+async def similar_evaluations(evaluation_id: str, k: int = Query(3, ge=0, le=64)):
+    supabase: AsyncClient = await get_async_supabase_client()
+    try:
+        return await find_similar(supabase, "evaluations", evaluation_id, k)
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+@router.get("/clusters")
+async def duplicate_clusters(
+    queue_id: str,
+    kind: Literal["submissions", "evaluations"] = Query("submissions"),
+    k: int = Query(3, ge=0, le=64),
+    min_size: int = Query(2, ge=2),
+):
+    supabase: AsyncClient = await get_async_supabase_client()
+    return await find_clusters(supabase, kind, queue_id, k, min_size)
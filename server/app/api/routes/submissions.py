@@ -1,95 +1,74 @@
-import json
-from typing import List
-from fastapi import APIRouter, HTTPException
-from supabase import Client
-from app.models import Submission
-from app.services.fingerprint_service import simhash
-from app.core.supabase import get_supabase_client
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from supabase import AsyncClient
+from app.services.submission_service import (
+    get_upload_progress,
+    iter_items,
+    iter_json_records,
+    start_upload_progress,
+    upload_submission_batches,
+)
+from app.core.supabase import get_async_supabase_client
 from app.core.config import get_settings
 
 router = APIRouter(prefix="/submissions", tags=["submissions"])
 
-def _build_submission_record(item: dict) -> dict:
-    submission = Submission(**item)
-    answers = submission.answers or {}
-    parts: List[str] = []
-    for value in answers.values():
-        if isinstance(value, dict):
-            parts.append(str(value.get("choice", "")))
-            parts.append(str(value.get("reasoning", "")))
-        else:
-            parts.append(str(value))
-    answer_text = " ".join(parts)
-
-    sh = None
-    bucket = None
-    try:
-        sh = simhash(answer_text)
-        if isinstance(sh, int):
-            mask64 = (1 << 64) - 1
-            unsigned_sh = sh & mask64
-            bucket = (unsigned_sh >> (64 - 16)) & 0xFFFF
-    except Exception:
-        pass
-
-    record = {
-        "id": submission.id,
-        "queue_id": submission.queueId,
-        "labeling_task_id": submission.labelingTaskId,
-        "created_at": submission.createdAt,
-        "data": json.dumps(
-            {
-                "questions": [q.dict() for q in submission.questions],
-                "answers": {k: v for k, v in submission.answers.items()},
-            }
-        ),
-        "answer_simhash": sh,
-        "simhash_bucket": bucket,
-    }
-
-    return record
-
 @router.post("")
 async def upload_submissions(data: List[dict]):
     if not data or not isinstance(data, list):
         raise HTTPException(status_code=400, detail="Must provide valid JSON array")
 
-    supabase: Client = get_supabase_client()
+    supabase: AsyncClient = await get_async_supabase_client()
     settings = get_settings()
 
-    total = 0
-    queue_ids = set()
-    batch: List[dict] = []
-
-    for item in data:
-        record = _build_submission_record(item)
-        queue_value = record.get("queue_id")
-        if queue_value:
-            queue_ids.add(queue_value)
-        batch.append(record)
-        if len(batch) >= settings.upload_batch_size:
-            try:
-                supabase.table("submissions").upsert(batch, on_conflict="id").execute()
-                total += len(batch)
-                batch = []
-            except Exception as exc:
-                raise HTTPException(status_code=500, detail="Failed to upload submissions (batch)") from exc
-
-    if batch:
-        try:
-            supabase.table("submissions").upsert(batch, on_conflict="id").execute()
-            total += len(batch)
-        except Exception as exc:
-            raise HTTPException(status_code=500, detail="Failed to upload submissions (final batch)") from exc
+    try:
+        result = await upload_submission_batches(supabase, iter_items(data), settings)
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail="Failed to upload submissions (batch)") from exc
 
+    total = result["total"]
     if total:
         print(
-            f"[upload_submissions] Inserted {total} submissions across queues: {sorted(queue_ids)}",
+            f"[upload_submissions] Inserted {total} submissions across queues: {result['queue_ids']}",
             flush=True,
         )
 
     return {
         "message": f"Uploaded {total} submissions",
-        "queue_ids": sorted(queue_ids),
+        "queue_ids": result["queue_ids"],
+        "total": total,
+    }
+
+@router.post("/stream")
+async def upload_submissions_stream(request: Request, upload_id: Optional[str] = Query(None)):
+    """Accepts NDJSON or a JSON array and upserts it while the body is still arriving."""
+    supabase: AsyncClient = await get_async_supabase_client()
+    settings = get_settings()
+    progress = start_upload_progress(upload_id)
+
+    try:
+        result = await upload_submission_batches(supabase, iter_json_records(request.stream()), settings, progress)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid submission stream: {exc}") from exc
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail="Failed to upload submissions (stream)") from exc
+
+    total = result["total"]
+    print(
+        f"[upload_submissions_stream] Inserted {total} submissions across queues: {result['queue_ids']}",
+        flush=True,
+    )
+
+    return {
+        "message": f"Uploaded {total} submissions",
+        "upload_id": result["upload_id"],
+        "queue_ids": result["queue_ids"],
         "total": total,
     }
+
+@router.get("/uploads/{upload_id}")
+async def upload_progress(upload_id: str):
+    progress = get_upload_progress(upload_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return progress
@@ -5,12 +5,33 @@ from typing import List
 class Settings:
     def __init__(self) -> None:
         self.upload_batch_size = 100
+        self.upload_concurrency = int(os.getenv("UPLOAD_CONCURRENCY", "4"))
+        self.upload_build_workers = int(os.getenv("UPLOAD_BUILD_WORKERS", str(min(4, os.cpu_count() or 1))))
         self.run_judges_page = 1000
+        self.scan_page_size = int(os.getenv("SCAN_PAGE_SIZE", "1000"))
+        self.scan_partitions = int(os.getenv("SCAN_PARTITIONS", "4"))
         self.job_batch_size = 500
+        self.enqueue_concurrency = int(os.getenv("ENQUEUE_CONCURRENCY", "4"))
         self.evaluations_page_limit = 50
+        self.dedupe_max_distance = int(os.getenv("DEDUPE_MAX_DISTANCE", "3"))
+        self.similarity_blocks = int(os.getenv("SIMILARITY_INDEX_BLOCKS", "4"))
+        self.similarity_index_ttl = float(os.getenv("SIMILARITY_INDEX_TTL", "300"))
         self.cors_origins = [origin.strip() for origin in os.getenv("CORS_ALLOW_ORIGINS", "http://localhost:5173").split(",") if origin.strip()]
         self.analytics_default_interval = os.getenv("ANALYTICS_DEFAULT_INTERVAL", "day")
         self.analytics_top_judges = int(os.getenv("ANALYTICS_TOP_JUDGES", "10"))
+        self.judge_registry_probe_interval = float(os.getenv("JUDGE_REGISTRY_PROBE_SECONDS", "5"))
+        self.judge_registry_max_age = float(os.getenv("JUDGE_REGISTRY_MAX_AGE_SECONDS", "60"))
+        self.live_status_interval = float(os.getenv("LIVE_STATUS_INTERVAL", "1"))
+        self.bulk_batch_max_requests = int(os.getenv("BULK_BATCH_MAX_REQUESTS", "20000"))
+        self.bulk_lease_seconds = int(os.getenv("BULK_LEASE_SECONDS", str(25 * 3600)))
+        self.bulk_poll_interval = float(os.getenv("BULK_POLL_INTERVAL", "60"))
+        self.response_cache_entries = int(os.getenv("RESPONSE_CACHE_ENTRIES", "512"))
+        self.response_cache_ttl = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+        self.response_cache_version_ttl = float(os.getenv("RESPONSE_CACHE_VERSION_TTL", "1"))
+        self.analytics_use_rollups = os.getenv("ANALYTICS_USE_ROLLUPS", "true").lower() not in {"0", "false", "no"}
+        self.supabase_max_connections = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "100"))
+        self.supabase_max_keepalive = int(os.getenv("SUPABASE_MAX_KEEPALIVE", "20"))
+        self.supabase_keepalive_expiry = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "30"))
 
 @lru_cache
 def get_settings() -> Settings:
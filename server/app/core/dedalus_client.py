@@ -1,5 +1,6 @@
 import asyncio
 import os
+from functools import lru_cache
 from typing import AsyncIterator, Optional
 from dotenv import load_dotenv
 from dedalus_labs import AsyncDedalus, DedalusRunner
@@ -29,4 +30,9 @@ class DedalusClient:
     async def stream_agent(self, input_text: str, model: Optional[str] = None) -> AsyncIterator[str]:
         model = model or DEDALUS_DEFAULT_MODEL
         async for chunk in stream_async(self.runner.run(input=input_text, model=model)):
-            yield chunk
\ No newline at end of file
+            yield chunk
+
+@lru_cache
+def get_dedalus_client() -> DedalusClient:
+    """One `AsyncDedalus` (and its connection pool) per process."""
+    return DedalusClient()
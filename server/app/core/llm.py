@@ -1,6 +1,8 @@
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
-from typing import Any, Optional
+from typing import Any, Dict, Optional
 from groq import AsyncGroq
 from openai import AsyncOpenAI
 from anthropic import AsyncAnthropic
@@ -27,10 +29,70 @@ def get_anthropic_client() -> Optional[Any]:
         return None
     return AsyncAnthropic(api_key=api_key)
 
+class GeminiClient:
+    """`google.generativeai` with one `GenerativeModel` per model name.
+
+    Calls use the SDK's native async `generate_content_async` unless `GEMINI_ASYNC` is
+    off, in which case the blocking call runs on a dedicated pool of `GEMINI_THREADS`
+    threads rather than the loop's small default executor.
+    """
+
+    def __init__(self, module: Any, use_async: bool = True, threads: int = 32) -> None:
+        self.module = module
+        self.use_async = use_async
+        self.threads = threads
+        self._models: Dict[str, Any] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def model(self, name: str) -> Any:
+        handle = self._models.get(name)
+        if handle is None:
+            handle = self._models[name] = self.module.GenerativeModel(name)
+        return handle
+
+    async def generate(self, model: str, prompt: str) -> Any:
+        handle = self.model(model)
+        if self.use_async:
+            return await handle.generate_content_async(prompt)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="gemini")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, handle.generate_content, prompt)
+
 @lru_cache
-def get_gemini_client() -> Optional[Any]:
+def get_gemini_client() -> Optional[GeminiClient]:
     api_key: Optional[str] = os.getenv("GEMINI_API_KEY")
     if not api_key:
         return None
     genai.configure(api_key=api_key)
-    return genai
\ No newline at end of file
+    return GeminiClient(
+        genai,
+        use_async=os.getenv("GEMINI_ASYNC", "true").lower() not in {"0", "false", "no"},
+        threads=int(os.getenv("GEMINI_THREADS", "32")),
+    )
+
+@lru_cache
+def get_provider_clients() -> Dict[str, Any]:
+    """Long-lived clients keyed by resolved provider name; each keeps its own warm HTTP pool."""
+    clients = {
+        "groq": get_groq_client(),
+        "openai": get_openai_client(),
+        "anthropic": get_anthropic_client(),
+        "gemini": get_gemini_client(),
+    }
+    return {key: value for key, value in clients.items() if value is not None}
+
+@lru_cache
+def get_batch_clients() -> Dict[str, Any]:
+    """Clients for the OpenAI and Anthropic batch APIs.
+
+    `OPENAI_BATCH_BASE_URL` / `ANTHROPIC_BATCH_BASE_URL` send bulk runs to another
+    server (e.g. the local stand-in in `tools/batch_standin.py`) while interactive
+    calls keep using the regular clients.
+    """
+    openai_url = os.getenv("OPENAI_BATCH_BASE_URL")
+    anthropic_url = os.getenv("ANTHROPIC_BATCH_BASE_URL")
+    clients = {
+        "openai": AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY") or "local", base_url=openai_url) if openai_url else get_openai_client(),
+        "anthropic": AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY") or "local", base_url=anthropic_url) if anthropic_url else get_anthropic_client(),
+    }
+    return {key: value for key, value in clients.items() if value is not None}
@@ -1,18 +1,41 @@
+import asyncio
 import os
-from functools import lru_cache
 from typing import Optional
 import httpx
-from supabase import Client, ClientOptions, create_client
+from supabase import AsyncClient, AsyncClientOptions, acreate_client
+from app.core.config import get_settings
 
 class SupabaseConfigMissing(RuntimeError):
     pass
 
-@lru_cache
-def get_supabase_client() -> Client:
+def _credentials() -> tuple[str, str]:
     url: Optional[str] = os.getenv("SUPABASE_URL")
     key: Optional[str] = os.getenv("SUPABASE_KEY")
     if not url or not key:
         raise SupabaseConfigMissing("Supabase configuration missing; set SUPABASE_URL and SUPABASE_KEY")
-    http_client = httpx.Client(http2=False, timeout=httpx.Timeout(30.0))
-    options = ClientOptions(httpx_client=http_client)
-    return create_client(url, key, options=options)
\ No newline at end of file
+    return url, key
+
+_async_client: Optional[AsyncClient] = None
+_async_client_lock = asyncio.Lock()
+
+async def get_async_supabase_client() -> AsyncClient:
+    """Process-wide async client over one pooled HTTP/2 connection pool."""
+    global _async_client
+    if _async_client is not None:
+        return _async_client
+    async with _async_client_lock:
+        if _async_client is None:
+            url, key = _credentials()
+            settings = get_settings()
+            http_client = httpx.AsyncClient(
+                http2=True,
+                timeout=httpx.Timeout(30.0),
+                limits=httpx.Limits(
+                    max_connections=settings.supabase_max_connections,
+                    max_keepalive_connections=settings.supabase_max_keepalive,
+                    keepalive_expiry=settings.supabase_keepalive_expiry,
+                ),
+            )
+            options = AsyncClientOptions(httpx_client=http_client)
+            _async_client = await acreate_client(url, key, options=options)
+    return _async_client
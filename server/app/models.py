@@ -22,6 +22,8 @@ class Judge(BaseModel):
     includeQuestionText: bool = True
     includeAnswerText: bool = True
     includeMetadata: bool = False
+    cacheVerdicts: bool = True
+    batchQuestions: bool = False
 
 class Assignment(BaseModel):
     id: str = None
@@ -1,21 +1,61 @@
+import asyncio
+import logging
+import re
 from collections import defaultdict
+from contextlib import aclosing
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, Iterable, List, Optional, Tuple
-from supabase import Client
+import numpy as np
+from supabase import AsyncClient
 from app.core.config import get_settings
-def _count_evaluations_for_queue(supabase: Client, queue_id: str) -> int:
+from app.services.judge_registry import get_judge_registry
+from app.services.scan_service import scan_pages
+async def _count_evaluations_for_queue(supabase: AsyncClient, queue_id: str, count: str = "exact") -> int:
     try:
-        resp = supabase.table("evaluations").select("id", count="exact").eq("queue_id", queue_id).limit(1).execute()
+        resp = await supabase.table("evaluations").select("id", count=count).eq("queue_id", queue_id).limit(1).execute()
         return resp.count or 0
     except Exception:
         return 0
 
+_catalog_unavailable_logged = False
+
+async def _queue_catalog_rpc(supabase: AsyncClient, name: str, params: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
+    """Rows from a `queue_catalog` RPC, or None while the catalog is missing or not yet backfilled."""
+    global _catalog_unavailable_logged
+    try:
+        response = await supabase.rpc(name, params or {}).execute()
+    except Exception as exc:  # noqa: BLE001
+        if not _catalog_unavailable_logged:
+            logging.warning("queue_catalog unavailable (%s); counting source tables directly", exc)
+            _catalog_unavailable_logged = True
+        return None
+    return response.data or []
+
+async def list_recent_queues(supabase: AsyncClient, limit: int = 15, estimated: bool = False) -> List[Dict[str, Any]]:
+    catalog = await _queue_catalog_rpc(supabase, "recent_queue_catalog", {"p_limit": limit})
+    if catalog is not None:
+        return [
+            {
+                "queue_id": row["queue_id"],
+                "created_at": row.get("latest_submission_at"),
+                "evaluation_count": row.get("evaluations", 0),
+                "submission_count": row.get("submissions", 0),
+                "pass_count": row.get("passes", 0),
+                "jobs": {
+                    "pending": row.get("jobs_pending", 0),
+                    "running": row.get("jobs_running", 0),
+                    "done": row.get("jobs_done", 0),
+                    "failed": row.get("jobs_failed", 0),
+                    "total": row.get("jobs_total", 0),
+                },
+            }
+            for row in catalog
+        ]
 
-def list_recent_queues(supabase: Client, limit: int = 15) -> List[Dict[str, Any]]:
     seen = set()
     queues: List[Dict[str, Any]] = []
     try:
-        response = (
+        response = await (
             supabase.table("submissions")
             .select("queue_id, created_at")
             .order("created_at", desc=True)
@@ -30,30 +70,40 @@ def list_recent_queues(supabase: Client, limit: int = 15) -> List[Dict[str, Any]
         if not queue_id or queue_id in seen:
             continue
         seen.add(queue_id)
-        queues.append(
-            {
-                "queue_id": queue_id,
-                "created_at": row.get("created_at"),
-                "evaluation_count": _count_evaluations_for_queue(supabase, queue_id),
-            }
-        )
+        queues.append({"queue_id": queue_id, "created_at": row.get("created_at")})
         if len(queues) >= limit:
             break
 
+    count = "estimated" if estimated else "exact"
+    counts = await asyncio.gather(*(_count_evaluations_for_queue(supabase, queue["queue_id"], count) for queue in queues))
+    for queue, evaluation_count in zip(queues, counts):
+        queue["evaluation_count"] = evaluation_count
     return queues
 
 
-def get_dashboard_summary(supabase: Client) -> Dict[str, Any]:
-    submissions_count = _count_table(supabase, "submissions")
-    judges_count = _count_table(supabase, "judges")
-    evaluations_total = _count_table(supabase, "evaluations")
-    passes = _count_table(supabase, "evaluations", filters={"verdict": "pass"})
+async def get_dashboard_summary(supabase: AsyncClient, estimated: bool = False) -> Dict[str, Any]:
+    catalog = await _queue_catalog_rpc(supabase, "dashboard_summary")
+    if catalog:
+        row = catalog[0]
+        submissions_count = row["submissions"]
+        judges_count = row["judges"]
+        evaluations_total = row["evaluations"]
+        passes = row["passes"]
+        queues_total = row["jobs"]
+    else:
+        count = "estimated" if estimated else "exact"
+        submissions_count, judges_count, evaluations_total, passes, queues_total = await asyncio.gather(
+            _count_table(supabase, "submissions", count=count),
+            _count_table(supabase, "judges"),
+            _count_table(supabase, "evaluations", count=count),
+            _count_table(supabase, "evaluations", filters={"verdict": "pass"}, count=count),
+            _count_table(supabase, "judge_jobs", count=count),
+        )
+
     pass_rate = 0.0
     if evaluations_total:
         pass_rate = round((passes / evaluations_total) * 100, 1)
 
-    queues_total = _count_table(supabase, "judge_jobs")
-
     return {
         "submissions": submissions_count,
         "judges": judges_count,
@@ -62,8 +112,8 @@ def get_dashboard_summary(supabase: Client) -> Dict[str, Any]:
         "jobs": queues_total,
     }
 
-def get_pass_rate_by_judge(
-    supabase: Client,
+async def get_pass_rate_by_judge(
+    supabase: AsyncClient,
     queue_id: str,
     start: Optional[datetime],
     end: Optional[datetime],
@@ -79,10 +129,8 @@ def get_pass_rate_by_judge(
     if interval_key not in allowed:
         interval_key = "day"
 
-    rows = _fetch_evaluations(supabase, queue_id, start, end)
-    judge_names = _load_judge_names(supabase)
-
-    totals, per_judge = _aggregate_pass_rates(rows, interval_key)
+    totals, per_judge = await _load_pass_rate_counts(supabase, queue_id, start, end, interval_key, settings.analytics_use_rollups)
+    judge_names = await _load_judge_names(supabase)
 
     timeline_buckets: Dict[int, Dict[str, int]] = defaultdict(
         lambda: {"pass": 0, "fail": 0, "inconclusive": 0, "total": 0}
@@ -109,35 +157,7 @@ def get_pass_rate_by_judge(
     rankings: List[Dict[str, Any]] = []
     for judge_id, buckets in limited:
         name = judge_names.get(judge_id, judge_id)
-        running_pass = 0
-        running_fail = 0
-        running_inconclusive = 0
-        running_total = 0
-        points: List[Dict[str, Any]] = []
-
-        for bucket_ts, counts in sorted(buckets.items()):
-            bucket_total = counts["total"]
-            bucket_pass = counts["pass"]
-            running_total += bucket_total
-            running_pass += bucket_pass
-            running_fail += counts["fail"]
-            running_inconclusive += counts["inconclusive"]
-
-            bucket_pass_rate = round((bucket_pass / bucket_total) * 100, 1) if bucket_total else 0.0
-            cumulative_pass_rate = round((running_pass / running_total) * 100, 1) if running_total else 0.0
-
-            points.append(
-                {
-                    "ts": bucket_ts,
-                    "pass": bucket_pass,
-                    "fail": counts["fail"],
-                    "inconclusive": counts["inconclusive"],
-                    "total": bucket_total,
-                    "pass_rate": bucket_pass_rate,
-                    "cumulative_pass_rate": cumulative_pass_rate,
-                    "cumulative_total": running_total,
-                }
-            )
+        points, (running_pass, running_fail, running_inconclusive, running_total) = _series_points(buckets)
 
         judge_totals = {
             "pass": running_pass,
@@ -179,26 +199,7 @@ def get_pass_rate_by_judge(
 
     rankings = sorted(rankings, key=lambda item: (item["total"], item["pass_rate"]), reverse=True)
 
-    timeline_points: List[Dict[str, Any]] = []
-    cumulative_pass = 0
-    cumulative_total = 0
-    for bucket_ts, counts in sorted(timeline_buckets.items()):
-        cumulative_pass += counts["pass"]
-        cumulative_total += counts["total"]
-        timeline_points.append(
-            {
-                "ts": bucket_ts,
-                "pass": counts["pass"],
-                "fail": counts["fail"],
-                "inconclusive": counts["inconclusive"],
-                "total": counts["total"],
-                "pass_rate": round((counts["pass"] / counts["total"]) * 100, 1) if counts["total"] else 0.0,
-                "cumulative_pass_rate": round((cumulative_pass / cumulative_total) * 100, 1)
-                if cumulative_total
-                else 0.0,
-                "cumulative_total": cumulative_total,
-            }
-        )
+    timeline_points, _ = _series_points(timeline_buckets)
 
     return {
         "meta": meta,
@@ -212,39 +213,161 @@ def get_pass_rate_by_judge(
         "timeline": timeline_points,
     }
 
-def _count_table(supabase: Client, table: str, filters: Dict[str, Any] | None = None) -> int:
-    query = supabase.table(table).select("id", count="exact")
+def _series_points(buckets: Dict[int, Dict[str, int]]) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """Per-bucket points with running totals (via `cumsum`) and the final pass/fail/inconclusive/total sums."""
+    ordered = sorted(buckets.items())
+    if not ordered:
+        return [], [0, 0, 0, 0]
+    matrix = np.array(
+        [[counts["pass"], counts["fail"], counts["inconclusive"], counts["total"]] for _, counts in ordered],
+        dtype=np.int64,
+    )
+    running = np.cumsum(matrix, axis=0).tolist()
+
+    points: List[Dict[str, Any]] = []
+    for (bucket_ts, counts), (cumulative_pass, _, _, cumulative_total) in zip(ordered, running):
+        bucket_total = counts["total"]
+        points.append(
+            {
+                "ts": bucket_ts,
+                "pass": counts["pass"],
+                "fail": counts["fail"],
+                "inconclusive": counts["inconclusive"],
+                "total": bucket_total,
+                "pass_rate": round((counts["pass"] / bucket_total) * 100, 1) if bucket_total else 0.0,
+                "cumulative_pass_rate": round((cumulative_pass / cumulative_total) * 100, 1) if cumulative_total else 0.0,
+                "cumulative_total": cumulative_total,
+            }
+        )
+    return points, running[-1]
+
+async def _count_table(supabase: AsyncClient, table: str, filters: Dict[str, Any] | None = None, count: str = "exact") -> int:
+    query = supabase.table(table).select("id", count=count)
     if filters:
         for key, value in filters.items():
             query = query.eq(key, value)
     try:
-        response = query.execute()
+        response = await query.execute()
         return response.count or 0
     except Exception:
         return 0
 
-def _fetch_evaluations(
-    supabase: Client,
+PassRateCounts = Tuple[Dict[str, int], Dict[str, Dict[int, Dict[str, int]]]]
+
+def _new_counts() -> PassRateCounts:
+    totals = {"total": 0, "pass": 0, "fail": 0, "inconclusive": 0}
+    per_judge: Dict[str, Dict[int, Dict[str, int]]] = defaultdict(
+        lambda: defaultdict(lambda: {"pass": 0, "fail": 0, "inconclusive": 0, "total": 0})
+    )
+    return totals, per_judge
+
+def _add_count(counts: PassRateCounts, judge_id: str, bucket_ts: int, verdict: str, n: int = 1) -> None:
+    totals, per_judge = counts
+    bucket = per_judge[judge_id][bucket_ts]
+    bucket["total"] += n
+    if verdict in bucket:
+        bucket[verdict] += n
+    totals["total"] += n
+    totals[verdict] = totals.get(verdict, 0) + n
+
+AGGREGATE_CHUNK_ROWS = 50_000
+
+async def _scan_pass_rate_counts(
+    supabase: AsyncClient,
+    queue_id: str,
+    interval: str,
+    counts: PassRateCounts,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    before: Optional[datetime] = None,
+    partitions: Optional[int] = None,
+) -> PassRateCounts:
+    """Aggregate raw evaluations into `counts` while they stream in, `AGGREGATE_CHUNK_ROWS` at a time."""
+    settings = get_settings()
+    pending: List[Dict[str, Any]] = []
+    pages = scan_pages(
+        supabase,
+        "evaluations",
+        "judge_id, verdict, created_at",
+        filters={"queue_id": queue_id},
+        start=start,
+        end=end,
+        before=before,
+        page_size=settings.scan_page_size,
+        partitions=settings.scan_partitions if partitions is None else partitions,
+    )
+    async with aclosing(pages):
+        async for page in pages:
+            pending.extend(page)
+            if len(pending) >= AGGREGATE_CHUNK_ROWS:
+                _aggregate_pass_rates(pending, interval, counts)
+                pending = []
+    if pending:
+        _aggregate_pass_rates(pending, interval, counts)
+    return counts
+
+def _hour_floor(dt: datetime) -> datetime:
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+def _hour_ceil(dt: datetime) -> datetime:
+    floor = _hour_floor(dt)
+    return floor if floor == dt else floor + timedelta(hours=1)
+
+async def _load_pass_rate_counts(
+    supabase: AsyncClient,
     queue_id: str,
     start: Optional[datetime],
     end: Optional[datetime],
-) -> Iterable[Dict[str, Any]]:
-    results: List[Dict[str, Any]] = []
+    interval: str,
+    use_rollups: bool = True,
+) -> PassRateCounts:
+    """Verdict counts per judge and bucket, read from `evaluation_rollups` where possible.
+
+    Whole hours inside the range come from the hourly rollups; a partial first or last
+    hour is aggregated from its raw evaluations so the result matches the raw path.
+    """
+    rollup_from = _hour_ceil(start) if start else None
+    rollup_to = _hour_floor(end) if end else None
+    if use_rollups and (rollup_from is None or rollup_to is None or rollup_from < rollup_to):
+        try:
+            counts = await _rollup_counts(supabase, queue_id, interval, rollup_from, rollup_to)
+        except Exception:  # noqa: BLE001
+            logging.exception("Reading evaluation_rollups failed; falling back to raw evaluations")
+        else:
+            # Edge spans are under an hour each, so they are scanned without partitioning.
+            if start and rollup_from and start < rollup_from:
+                await _scan_pass_rate_counts(supabase, queue_id, interval, counts, start=start, before=rollup_from, partitions=1)
+            if end and rollup_to:
+                await _scan_pass_rate_counts(supabase, queue_id, interval, counts, start=rollup_to, end=end, partitions=1)
+            return counts
+
+    return await _scan_pass_rate_counts(supabase, queue_id, interval, _new_counts(), start=start, end=end)
+
+async def _rollup_counts(
+    supabase: AsyncClient,
+    queue_id: str,
+    interval: str,
+    rollup_from: Optional[datetime],
+    rollup_to: Optional[datetime],
+) -> PassRateCounts:
+    counts = _new_counts()
+    params = {
+        "p_queue_id": queue_id,
+        "p_interval": interval,
+        "p_from": rollup_from.isoformat() if rollup_from else None,
+        "p_to": rollup_to.isoformat() if rollup_to else None,
+    }
     page_size = 1000
     offset = 0
     while True:
-        query = supabase.table("evaluations").select("judge_id, verdict, created_at, queue_id").eq("queue_id", queue_id)
-        if start:
-            query = query.gte("created_at", start.isoformat())
-        if end:
-            query = query.lte("created_at", end.isoformat())
-        response = query.range(offset, offset + page_size - 1).execute()
+        response = await supabase.rpc("evaluation_rollup_series", params).range(offset, offset + page_size - 1).execute()
         chunk = response.data or []
-        results.extend(chunk)
+        for row in chunk:
+            _add_count(counts, row["judge_id"], int(row["ts"]), row["verdict"], int(row["count"]))
         if len(chunk) < page_size:
             break
         offset += page_size
-    return results
+    return counts
 
 def _truncate_to_bucket(dt: datetime, interval: str) -> datetime:
     if interval == "hour":
@@ -256,11 +379,24 @@ def _truncate_to_bucket(dt: datetime, interval: str) -> datetime:
         return dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     return dt.replace(hour=0, minute=0, second=0, microsecond=0)
 
-def _aggregate_pass_rates(rows: Iterable[Dict[str, Any]], interval: str) -> Tuple[Dict[str, int], Dict[str, Dict[int, Dict[str, int]]]]:
-    totals = {"total": 0, "pass": 0, "fail": 0, "inconclusive": 0}
-    per_judge: Dict[str, Dict[int, Dict[str, int]]] = defaultdict(
-        lambda: defaultdict(lambda: {"pass": 0, "fail": 0, "inconclusive": 0, "total": 0})
-    )
+COLUMNAR_MIN_ROWS = 1000
+
+def _aggregate_pass_rates(
+    rows: Iterable[Dict[str, Any]],
+    interval: str,
+    counts: Optional[PassRateCounts] = None,
+) -> PassRateCounts:
+    rows = rows if isinstance(rows, list) else list(rows)
+    if len(rows) >= COLUMNAR_MIN_ROWS:
+        return _aggregate_pass_rates_columnar(rows, interval, counts)
+    return _aggregate_pass_rates_python(rows, interval, counts)
+
+def _aggregate_pass_rates_python(
+    rows: Iterable[Dict[str, Any]],
+    interval: str,
+    counts: Optional[PassRateCounts] = None,
+) -> PassRateCounts:
+    counts = counts or _new_counts()
 
     for row in rows:
         judge_id = row.get("judge_id")
@@ -274,19 +410,127 @@ def _aggregate_pass_rates(rows: Iterable[Dict[str, Any]], interval: str) -> Tupl
             dt = datetime.now(timezone.utc)
         bucket = _truncate_to_bucket(dt, interval)
         bucket_ts = int(bucket.replace(tzinfo=timezone.utc).timestamp())
-        counts = per_judge[judge_id][bucket_ts]
-        counts["total"] += 1
-        if verdict in counts:
-            counts[verdict] += 1
-        totals["total"] += 1
-        totals[verdict] = totals.get(verdict, 0) + 1
-
-    return totals, per_judge
-
-def _load_judge_names(supabase: Client) -> Dict[str, str]:
+        _add_count(counts, judge_id, bucket_ts, verdict)
+
+    return counts
+
+# Buckets use each timestamp's wall-clock time read as UTC (see `_aggregate_pass_rates_python`),
+# so the offset is dropped rather than applied.
+_TZ_SUFFIX = re.compile(r"(?:Z|[+-]\d{2}(?::?\d{2}(?::?\d{2}(?:\.\d+)?)?)?)$")
+
+def _wall_clock(value: str) -> str:
+    match = _TZ_SUFFIX.search(value)
+    return value[: match.start()] if match and match.start() > 10 else value
+
+def _strip_offsets(values: List[str]) -> np.ndarray:
+    """Drop a trailing `Z`/`+HH:MM` from every value, working on the UTF-32 code points."""
+    text = np.array(values, dtype=str)
+    width = text.dtype.itemsize // 4
+    if width <= 10:
+        return text
+    codes = text.view(np.uint32).reshape(len(values), width).copy()
+    rows = np.arange(len(values))
+    lengths = np.count_nonzero(codes, axis=1)
+    last = codes[rows, np.maximum(lengths - 1, 0)]
+    sign = codes[rows, np.maximum(lengths - 6, 0)]
+    colon = codes[rows, np.maximum(lengths - 3, 0)]
+    is_zulu = (last == ord("Z")) & (lengths > 10)
+    is_offset = ((sign == ord("+")) | (sign == ord("-"))) & (colon == ord(":")) & (lengths - 6 > 10)
+    cut = lengths - np.where(is_offset, 6, np.where(is_zulu, 1, 0))
+    codes[np.arange(width)[None, :] >= cut[:, None]] = 0
+
+    # Any other offset form is rare; strip those with the regex so numpy never converts them.
+    tail = codes[:, 11:]
+    odd = np.flatnonzero(((tail == ord("+")) | (tail == ord("-"))).any(axis=1))
+    stripped = codes.view(f"<U{width}").ravel()
+    for index in odd:
+        stripped[index] = _wall_clock(values[index])
+    return stripped
+
+def _parse_wall_clock(values: List[str]) -> np.ndarray:
+    stripped = _strip_offsets(values)
+    try:
+        return stripped.astype("datetime64[us]")
+    except ValueError:
+        pass
+    parsed = np.empty(len(stripped), dtype="datetime64[us]")
+    for index, (value, raw) in enumerate(zip(stripped.tolist(), values)):
+        try:
+            parsed[index] = np.datetime64(value, "us")
+        except ValueError:
+            try:
+                dt = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+            except ValueError:
+                dt = datetime.now(timezone.utc)
+            parsed[index] = np.datetime64(dt.replace(tzinfo=None), "us")
+    return parsed
+
+def _bucket_seconds(stamps: np.ndarray, interval: str) -> np.ndarray:
+    if interval == "hour":
+        floored = stamps.astype("datetime64[h]")
+    elif interval == "month":
+        floored = stamps.astype("datetime64[M]")
+    elif interval == "week":
+        days = stamps.astype("datetime64[D]").astype(np.int64)
+        # 1970-01-01 was a Thursday; weeks start on Monday like `datetime.weekday()`.
+        floored = (days - (days + 3) % 7).astype("datetime64[D]")
+    else:
+        floored = stamps.astype("datetime64[D]")
+    return floored.astype("datetime64[s]").astype(np.int64)
+
+def _aggregate_pass_rates_columnar(
+    rows: List[Dict[str, Any]],
+    interval: str,
+    counts: Optional[PassRateCounts] = None,
+) -> PassRateCounts:
+    """Same result as `_aggregate_pass_rates_python`, computed with array ops over columns."""
+    counts = counts or _new_counts()
+    judge_col = [row.get("judge_id") for row in rows]
+    verdict_col = [row.get("verdict") for row in rows]
+    created_col = [row.get("created_at") for row in rows]
+    keep = [bool(j and v and c) for j, v, c in zip(judge_col, verdict_col, created_col)]
+    if not all(keep):
+        judge_col = [value for value, ok in zip(judge_col, keep) if ok]
+        verdict_col = [value for value, ok in zip(verdict_col, keep) if ok]
+        created_col = [value for value, ok in zip(created_col, keep) if ok]
+    if not judge_col:
+        return counts
+
+    # Dict factorisation keeps first-seen order, which is the order the row-by-row path inserts in.
+    judge_codes = {judge_id: code for code, judge_id in enumerate(dict.fromkeys(judge_col))}
+    judge_idx = np.fromiter(map(judge_codes.__getitem__, judge_col), np.int64, len(judge_col))
+    verdict_codes = {verdict: code for code, verdict in enumerate(dict.fromkeys(verdict_col))}
+    verdict_idx = np.fromiter(map(verdict_codes.__getitem__, verdict_col), np.int64, len(verdict_col))
+    bucket_values, bucket_idx = np.unique(_bucket_seconds(_parse_wall_clock(created_col), interval), return_inverse=True)
+
+    n_judges, n_buckets, n_verdicts = len(judge_codes), len(bucket_values), len(verdict_codes)
+    cells = (judge_idx * n_buckets + bucket_idx.ravel()) * n_verdicts + verdict_idx
+    grid = np.bincount(cells, minlength=n_judges * n_buckets * n_verdicts).reshape(n_judges, n_buckets, n_verdicts)
+
+    totals, per_judge = counts
+    verdict_totals = grid.sum(axis=(0, 1)).tolist()
+    totals["total"] += int(sum(verdict_totals))
+    for verdict, n in zip(verdict_codes, verdict_totals):
+        totals[verdict] = totals.get(verdict, 0) + n
+
+    known = [(name, verdict_codes[name]) for name in ("pass", "fail", "inconclusive") if name in verdict_codes]
+    bucket_totals = grid.sum(axis=2)
+    bucket_list = bucket_values.tolist()
+    for j, judge_id in enumerate(judge_codes):
+        buckets = per_judge[judge_id]
+        nonzero = np.flatnonzero(bucket_totals[j])
+        known_counts = [grid[j, nonzero, v].tolist() for _, v in known]
+        for position, b in enumerate(nonzero.tolist()):
+            bucket = buckets[bucket_list[b]]
+            bucket["total"] += int(bucket_totals[j, b])
+            for (name, _), values in zip(known, known_counts):
+                bucket[name] += values[position]
+
+    return counts
+
+async def _load_judge_names(supabase: AsyncClient) -> Dict[str, str]:
     try:
-        response = supabase.table("judges").select("id, name").execute()
+        snapshot = await get_judge_registry().get(supabase)
     except Exception:
         return {}
-    data = response.data or []
-    return {item["id"]: item.get("name", item["id"]) for item in data}
\ No newline at end of file
+    return snapshot.names
\ No newline at end of file
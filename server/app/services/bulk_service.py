@@ -0,0 +1,372 @@
+import json
+import logging
+import uuid
+import backoff
+from contextlib import aclosing
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from supabase import AsyncClient
+from app.core.config import Settings
+from app.core.llm import get_batch_clients
+from app.services.job_service import update_leased_jobs
+from app.services.judge_registry import JudgeSnapshot, get_judge_registry
+from app.services.judge_service import PROMPT_TEMPLATE, VERDICT_MAX_TOKENS, _evaluation, _parse_verdict, _render_item
+from app.services.runner_service import _failure_fields, _job_evaluations, _upsert_evaluations
+from app.services.scan_service import scan_pages
+from app.services.submission_cache import MissingSubmissionError, SubmissionCache, require_submission
+
+BULK_PROVIDERS = ("openai", "anthropic")
+# A `submitting` or `ingesting` row untouched for this long belongs to a process
+# that died (or lost the database) halfway through.
+STALE_AFTER = timedelta(minutes=15)
+INGEST_CHUNK = 500
+
+# One result line: (job id, raw reply text or None, error or None).
+BatchResult = Tuple[str, Optional[str], Optional[str]]
+
+def _owner(batch_id: str) -> str:
+    return f"bulk:{batch_id}"
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def render_request(provider: str, job: Dict[str, Any], judge: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """One batch API request line for a job, or None if its question or answer is missing."""
+    item = _render_item(job.get("submission_data") or {}, job["question_id"])
+    if not item:
+        return None
+    question_text, answer_text = item
+    prompt = PROMPT_TEMPLATE.format(
+        system_prompt=judge.get("system_prompt", ""),
+        question_text=question_text,
+        answer_text=answer_text,
+    )
+    body = {
+        "model": judge.get("model"),
+        "max_tokens": VERDICT_MAX_TOKENS,
+        "messages": [{"role": "user", "content": prompt}],
+    }
+    if provider == "openai":
+        return {"custom_id": str(job["id"]), "method": "POST", "url": "/v1/chat/completions", "body": body}
+    return {"custom_id": str(job["id"]), "params": body}
+
+async def _claim_bulk_jobs(
+    supabase: AsyncClient,
+    owner: str,
+    queue_id: str,
+    judge_ids: List[str],
+    limit: int,
+    lease_seconds: int,
+) -> List[Dict[str, Any]]:
+    response = await supabase.rpc(
+        "claim_bulk_judge_jobs",
+        {
+            "p_owner": owner,
+            "p_queue_id": queue_id,
+            "p_judge_ids": judge_ids,
+            "p_limit": limit,
+            "p_lease_seconds": lease_seconds,
+        },
+    ).execute()
+    return response.data or []
+
+async def _submit(provider: str, client: Any, lines: List[Dict[str, Any]], batch_id: str, queue_id: str) -> str:
+    """Create the provider batch and return its id."""
+    if provider == "openai":
+        payload = "\n".join(json.dumps(line, ensure_ascii=False) for line in lines).encode("utf-8")
+        upload = await client.files.create(file=("judge_jobs.jsonl", payload), purpose="batch")
+        batch = await client.batches.create(
+            input_file_id=upload.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+            metadata={"batch_id": batch_id, "queue_id": queue_id},
+        )
+        return batch.id
+    batch = await client.messages.batches.create(requests=lines)
+    return batch.id
+
+def _judge_ids_for(snapshot: JudgeSnapshot, provider: str) -> List[str]:
+    return [
+        judge_id
+        for judge_id, judge in snapshot.judges.items()
+        if snapshot.providers.get(judge_id) == provider and judge.get("active") is not False and judge.get("model")
+    ]
+
+async def submit_bulk_run(supabase: AsyncClient, queue_id: str, settings: Settings) -> Dict[str, Any]:
+    """Move a queue's pending OpenAI/Anthropic jobs into provider batches.
+
+    Jobs are claimed `bulk_batch_max_requests` at a time under a lease as long as
+    the batch window, rendered with the same prompt as interactive calls and
+    submitted as one batch per claim. Jobs for other providers stay pending for
+    the workers. If a submission fails, its jobs go back to pending.
+    """
+    snapshot = await get_judge_registry().get(supabase, probe=True)
+    clients = get_batch_clients()
+    submissions = SubmissionCache(supabase, settings.bulk_batch_max_requests)
+    summary: Dict[str, Any] = {"batches": [], "requests": 0, "skipped": 0, "errors": []}
+
+    for provider in BULK_PROVIDERS:
+        client = clients.get(provider)
+        judge_ids = _judge_ids_for(snapshot, provider)
+        if client is None or not judge_ids:
+            continue
+        while True:
+            batch_id = str(uuid.uuid4())
+            jobs = await _claim_bulk_jobs(
+                supabase, _owner(batch_id), queue_id, judge_ids, settings.bulk_batch_max_requests, settings.bulk_lease_seconds
+            )
+            if not jobs:
+                break
+            await submissions.attach(jobs)
+            lines: List[Dict[str, Any]] = []
+            empty: List[Dict[str, Any]] = []
+            missing: List[Tuple[Dict[str, Any], MissingSubmissionError]] = []
+            for job in jobs:
+                try:
+                    require_submission(job)
+                except MissingSubmissionError as exc:
+                    missing.append((job, exc))
+                    continue
+                line = render_request(provider, job, snapshot.judges[str(job["judge_id"])])
+                if line is None:
+                    empty.append(job)
+                else:
+                    lines.append(line)
+            for job, exc in missing:
+                await _fail_jobs(supabase, [job], exc)
+            summary["skipped"] += len(missing)
+            if empty:
+                # Same outcome as the worker: nothing to judge, so the job is done without an evaluation.
+                await update_leased_jobs(supabase, empty, {"status": "done"})
+                summary["skipped"] += len(empty)
+            if lines:
+                row = await _record_batch(supabase, batch_id, queue_id, provider, lines, jobs, client)
+                summary["batches"].append(row)
+                if row["status"] == "failed":
+                    summary["errors"].append(row["last_error"])
+                    break
+                summary["requests"] += len(lines)
+            if len(jobs) < settings.bulk_batch_max_requests:
+                break
+
+    print(
+        f"[bulk] queue={queue_id} submitted {summary['requests']} requests in {len(summary['batches'])} batches (skipped={summary['skipped']})",
+        flush=True,
+    )
+    return summary
+
+async def _record_batch(
+    supabase: AsyncClient,
+    batch_id: str,
+    queue_id: str,
+    provider: str,
+    lines: List[Dict[str, Any]],
+    jobs: List[Dict[str, Any]],
+    client: Any,
+) -> Dict[str, Any]:
+    row = {
+        "id": batch_id,
+        "queue_id": queue_id,
+        "provider": provider,
+        "status": "submitting",
+        "request_count": len(lines),
+    }
+    try:
+        await supabase.table("provider_batches").insert(row).execute()
+        external_id = await _submit(provider, client, lines, batch_id, queue_id)
+    except Exception as exc:  # noqa: BLE001
+        logging.exception("Submitting %s batch %s failed", provider, batch_id)
+        fields = {"status": "failed", "last_error": str(exc)[:1000], "updated_at": _now(), "completed_at": _now()}
+        try:
+            await supabase.table("provider_batches").update(fields).eq("id", batch_id).execute()
+        except Exception:  # noqa: BLE001
+            logging.debug("Could not record failure of batch %s", batch_id, exc_info=True)
+        submitted = {line["custom_id"] for line in lines}
+        await update_leased_jobs(supabase, [job for job in jobs if str(job["id"]) in submitted], {"status": "pending"})
+        return {**row, **fields}
+    fields = {"external_id": external_id, "status": "in_progress", "updated_at": _now()}
+    try:
+        await _mark_submitted(supabase, batch_id, fields)
+    except Exception:  # noqa: BLE001
+        # The row stays `submitting`; the poller fails it and releases its jobs once stale.
+        logging.exception("Recording external id %s for batch %s failed", external_id, batch_id)
+        return {**row, "external_id": external_id}
+    return {**row, **fields}
+
+@backoff.on_exception(backoff.expo, Exception, max_tries=5, jitter=backoff.random_jitter)
+async def _mark_submitted(supabase: AsyncClient, batch_id: str, fields: Dict[str, Any]) -> None:
+    await supabase.table("provider_batches").update(fields).eq("id", batch_id).execute()
+
+async def _retrieve(provider: str, client: Any, external_id: str) -> Tuple[str, bool]:
+    """Provider-side state as (status, finished); `completed` means results can be ingested."""
+    if provider == "openai":
+        batch = await client.batches.retrieve(external_id)
+        status = batch.status
+        if status == "completed":
+            return "completed", True
+        if status in ("failed", "expired", "cancelled"):
+            # An expired batch still reports the requests it finished in its output file.
+            return ("completed", True) if status == "expired" and batch.output_file_id else (status, True)
+        return "in_progress", False
+    batch = await client.messages.batches.retrieve(external_id)
+    if batch.processing_status == "ended":
+        return "completed", True
+    return "in_progress", False
+
+async def _results(provider: str, client: Any, external_id: str) -> AsyncIterator[BatchResult]:
+    if provider == "openai":
+        batch = await client.batches.retrieve(external_id)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = await client.files.content(file_id)
+            for line in content.text.splitlines():
+                if line.strip():
+                    yield _openai_result(json.loads(line))
+        return
+    async for item in await client.messages.batches.results(external_id):
+        result = item.result
+        if result.type != "succeeded":
+            yield item.custom_id, None, result.type
+            continue
+        texts = [getattr(block, "text", "") for block in result.message.content]
+        yield item.custom_id, " ".join(filter(None, texts)).strip(), None
+
+def _openai_result(record: Dict[str, Any]) -> BatchResult:
+    custom_id = record.get("custom_id")
+    response = record.get("response") or {}
+    if record.get("error") or response.get("status_code") != 200:
+        return custom_id, None, json.dumps(record.get("error") or response.get("body"))[:1000]
+    try:
+        return custom_id, response["body"]["choices"][0]["message"]["content"].strip(), None
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return custom_id, None, "malformed batch response"
+
+async def _ingest(supabase: AsyncClient, row: Dict[str, Any], client: Any, snapshot: JudgeSnapshot) -> Tuple[int, int]:
+    """Write evaluations for every answered request and settle each job; returns (succeeded, failed)."""
+    results: Dict[str, BatchResult] = {}
+    async for result in _results(row["provider"], client, row["external_id"]):
+        results[str(result[0])] = result
+
+    succeeded = failed = 0
+    pages = scan_pages(supabase, "judge_jobs", "*", filters={"lease_owner": _owner(row["id"])}, page_size=INGEST_CHUNK)
+    async with aclosing(pages) as job_pages:
+        async for jobs in job_pages:
+            evaluations: List[Dict[str, Any]] = []
+            done: List[Dict[str, Any]] = []
+            errors: Dict[str, List[Dict[str, Any]]] = {}
+            for job in jobs:
+                _, raw, error = results.get(str(job["id"]), (None, None, "missing from batch results"))
+                if raw:
+                    verdict, reasoning = _parse_verdict(raw)
+                    evaluation = _evaluation(job["submission_id"], job["question_id"], str(job["judge_id"]), verdict, reasoning[:1000])
+                    evaluations.extend(_job_evaluations(job, snapshot.judges.get(str(job["judge_id"])), evaluation))
+                    done.append(job)
+                else:
+                    errors.setdefault(error or "empty response", []).append(job)
+            await _upsert_evaluations(supabase, evaluations)
+            await update_leased_jobs(supabase, done, {"status": "done"})
+            for error, failures in errors.items():
+                await _fail_jobs(supabase, failures, RuntimeError(error))
+                failed += len(failures)
+            succeeded += len(done)
+    return succeeded, failed
+
+async def _fail_jobs(supabase: AsyncClient, jobs: List[Dict[str, Any]], exc: Exception) -> None:
+    """Hand jobs back to the workers with one attempt used, like an interactive failure."""
+    by_fields: Dict[str, List[Dict[str, Any]]] = {}
+    for job in jobs:
+        fields = _failure_fields(job, exc)
+        by_fields.setdefault(json.dumps(fields, sort_keys=True), []).append(job)
+    for fields, group in by_fields.items():
+        await update_leased_jobs(supabase, group, json.loads(fields))
+
+async def _release(supabase: AsyncClient, batch_id: str) -> None:
+    await supabase.table("judge_jobs").update(
+        {"status": "pending", "lease_owner": None, "lease_expires_at": None, "updated_at": _now()}
+    ).eq("lease_owner", _owner(batch_id)).eq("status", "running").execute()
+
+async def _recover_submitting(supabase: AsyncClient, row: Dict[str, Any]) -> int:
+    """Settle a batch whose submission was never confirmed; returns 1 if its jobs were released.
+
+    If the provider id made it onto the row, the batch is tracked as usual.
+    Otherwise the provider batch can't be collected, so the row is failed and
+    its jobs go back to pending.
+    """
+    query = supabase.table("provider_batches")
+    if row.get("external_id"):
+        await query.update({"status": "in_progress", "updated_at": _now()}).eq("id", row["id"]).eq("status", "submitting").execute()
+        return 0
+    fields = {
+        "status": "failed",
+        "last_error": "submission was never confirmed",
+        "updated_at": _now(),
+        "completed_at": _now(),
+    }
+    response = await query.update(fields).eq("id", row["id"]).eq("status", "submitting").eq("updated_at", row["updated_at"]).execute()
+    if not response.data:
+        return 0
+    await _release(supabase, row["id"])
+    print(f"[bulk] batch {row['id']} ({row['provider']}) was never confirmed; released its jobs", flush=True)
+    return 1
+
+async def _take_for_ingest(supabase: AsyncClient, row: Dict[str, Any]) -> bool:
+    """Mark the row `ingesting` unless another poller changed it first."""
+    response = await (
+        supabase.table("provider_batches")
+        .update({"status": "ingesting", "updated_at": _now()})
+        .eq("id", row["id"])
+        .eq("status", row["status"])
+        .eq("updated_at", row["updated_at"])
+        .execute()
+    )
+    return bool(response.data)
+
+async def poll_bulk_batches(supabase: AsyncClient) -> Dict[str, int]:
+    """Check every open batch once and ingest the ones the provider has finished."""
+    response = await (
+        supabase.table("provider_batches").select("*").in_("status", ["submitting", "in_progress", "ingesting"]).execute()
+    )
+    clients = get_batch_clients()
+    snapshot = await get_judge_registry().get(supabase)
+    stale_before = datetime.now(timezone.utc) - STALE_AFTER
+    counts = {"checked": 0, "ingested": 0, "released": 0}
+
+    for row in response.data or []:
+        stale = datetime.fromisoformat(row["updated_at"]) <= stale_before
+        if row["status"] == "submitting":
+            if stale:
+                try:
+                    counts["released"] += await _recover_submitting(supabase, row)
+                except Exception:  # noqa: BLE001
+                    logging.exception("Recovering %s batch %s failed", row["provider"], row["id"])
+            continue
+        client = clients.get(row["provider"])
+        if client is None or not row.get("external_id"):
+            continue
+        if row["status"] == "ingesting" and not stale:
+            continue
+        counts["checked"] += 1
+        try:
+            status, finished = await _retrieve(row["provider"], client, row["external_id"])
+            if not finished or not await _take_for_ingest(supabase, row):
+                continue
+            fields: Dict[str, Any] = {"status": status, "updated_at": _now(), "completed_at": _now()}
+            if status == "completed":
+                fields["succeeded"], fields["failed"] = await _ingest(supabase, row, client, snapshot)
+                counts["ingested"] += 1
+            else:
+                await _release(supabase, row["id"])
+                counts["released"] += 1
+            await supabase.table("provider_batches").update(fields).eq("id", row["id"]).execute()
+            print(f"[bulk] batch {row['id']} ({row['provider']}) {status}: {fields}", flush=True)
+        except Exception:  # noqa: BLE001
+            logging.exception("Polling %s batch %s failed", row["provider"], row["id"])
+    return counts
+
+async def list_bulk_batches(supabase: AsyncClient, queue_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    query = supabase.table("provider_batches").select("*").order("created_at", desc=True).limit(limit)
+    if queue_id:
+        query = query.eq("queue_id", queue_id)
+    response = await query.execute()
+    return response.data or []
@@ -1,10 +1,19 @@
-from typing import Dict, Any, Optional
+import base64
+import json
+import logging
+from collections import OrderedDict
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 from fastapi import HTTPException
-from supabase import Client
+from supabase import AsyncClient
+from app.core.config import get_settings
+from app.services.judge_registry import get_judge_registry
+from app.services.response_cache import get_response_cache
+from app.services.scan_service import quote_filter_value, scan_pages
 
-def _apply_filters(query, submission_ids, judge_ids, question_ids, verdict):
-    if submission_ids is not None:
-        query = query.in_("submission_id", submission_ids)
+def _apply_filters(query, queue_id, judge_ids, question_ids, verdict):
+    if queue_id:
+        query = query.eq("queue_id", queue_id)
     if judge_ids:
         query = query.in_("judge_id", judge_ids)
     if question_ids:
@@ -13,53 +22,148 @@ def _apply_filters(query, submission_ids, judge_ids, question_ids, verdict):
         query = query.eq("verdict", verdict)
     return query
 
-def fetch_evaluations(
-    supabase: Client,
+def encode_cursor(row: Dict[str, Any]) -> str:
+    raw = json.dumps([row.get("created_at"), row.get("id")], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+    if created_at is None or row_id is None:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return created_at, row_id
+
+# Cursor at the end of each page served by page number, so the next page number is a
+# keyset read instead of an offset. Entries are tied to the data versions they were
+# computed under and ignored once those change.
+_page_cursors: "OrderedDict[Tuple[Any, ...], Tuple[Tuple[int, ...], str]]" = OrderedDict()
+MAX_PAGE_CURSORS = 2048
+
+def _remember_page_cursor(key: Tuple[Any, ...], versions: Tuple[int, ...], cursor: str) -> None:
+    _page_cursors[key] = (versions, cursor)
+    _page_cursors.move_to_end(key)
+    while len(_page_cursors) > MAX_PAGE_CURSORS:
+        _page_cursors.popitem(last=False)
+
+async def _judge_names(supabase: AsyncClient, judge_ids: List[str]) -> Dict[str, str]:
+    if not judge_ids:
+        return {}
+    try:
+        snapshot = await get_judge_registry().get(supabase)
+    except Exception:
+        return {}
+    return {str(judge_id): snapshot.judges[str(judge_id)].get("name") for judge_id in judge_ids if str(judge_id) in snapshot.judges}
+
+async def _evaluation_facets(
+    supabase: AsyncClient,
+    filters: Dict[str, Any],
+    scopes: List[str],
+) -> Optional[Dict[str, Any]]:
+    """Per-verdict and per-judge counts for `filters` from one grouped query, cached on data versions."""
+
+    async def compute() -> Dict[str, Any]:
+        params = {f"p_{name}": list(value) if isinstance(value, tuple) else value for name, value in filters.items()}
+        response = await supabase.rpc("evaluation_facets", params).execute()
+        verdicts: Dict[str, int] = {}
+        judges: Dict[str, Dict[str, Any]] = {}
+        for row in response.data or []:
+            count = int(row.get("count") or 0)
+            verdict = row.get("verdict") or ""
+            verdicts[verdict] = verdicts.get(verdict, 0) + count
+            judge_id = str(row.get("judge_id") or "")
+            judge = judges.setdefault(judge_id, {"judge_id": judge_id, "total": 0, "pass": 0})
+            judge["total"] += count
+            if verdict == "pass":
+                judge["pass"] += count
+        names = await _judge_names(supabase, [judge_id for judge_id in judges if judge_id])
+        for judge_id, judge in judges.items():
+            judge["judge_name"] = names.get(judge_id)
+        return {
+            "total": sum(verdicts.values()),
+            "verdicts": verdicts,
+            "judges": sorted(judges.values(), key=lambda judge: (-judge["total"], judge["judge_id"])),
+        }
+
+    key = ("evaluation_facets", tuple(sorted(filters.items())))
+    try:
+        body, _ = await get_response_cache().get_or_compute(supabase, key, scopes, compute)
+    except Exception:  # noqa: BLE001
+        logging.warning("evaluation_facets unavailable; counting evaluations directly", exc_info=True)
+        return None
+    return json.loads(body)
+
+async def fetch_evaluations(
+    supabase: AsyncClient,
     queue_id: Optional[str] = None,
     judge_ids: Optional[list[str]] = None,
     question_ids: Optional[list[str]] = None,
     verdict: Optional[str] = None,
     page: int = 1,
     limit: int = 50,
+    cursor: Optional[str] = None,
 ) -> Dict[str, Any]:
-    submission_ids: Optional[list[str]] = None
-    if queue_id:
-        subs = supabase.table("submissions").select("id").eq("queue_id", queue_id).execute()
-        submission_ids = [s["id"] for s in subs.data or []]
-        if not submission_ids:
-            return {"evaluations": [], "total": 0, "pass_count": 0, "pass_rate": 0.0}
+    """One page of evaluations, newest first.
 
-    query = supabase.table("evaluations").select("*", count="exact")
-    query = _apply_filters(query, submission_ids, judge_ids, question_ids, verdict) 
+    Pages are read by `(created_at, id)` keyset when a `cursor` is given, or when the
+    previous page number was served recently under the same data versions; otherwise
+    by offset. `next_cursor` continues after the last row.
+    """
+    filters: Dict[str, Any] = {
+        "queue_id": queue_id or None,
+        "judge_ids": tuple(sorted(judge_ids)) if judge_ids else None,
+        "question_ids": tuple(sorted(question_ids)) if question_ids else None,
+        "verdict": verdict or None,
+    }
+    scopes = [f"queue:{queue_id}" if queue_id else "*", "judges"]
+    facets = await _evaluation_facets(supabase, filters, scopes)
 
-    offset = (page - 1) * limit
-    response = query.range(offset, offset + limit - 1).execute()
-    if response.data is None:
-        raise HTTPException(status_code=500, detail="Failed to fetch evaluations")
+    try:
+        versions: Optional[Tuple[int, ...]] = await get_response_cache().versions(supabase, scopes)
+    except Exception:  # noqa: BLE001
+        versions = None
+    page_key = (tuple(filters.items()), limit)
+    after = decode_cursor(cursor) if cursor else None
+    if after is None and page > 1 and versions is not None:
+        remembered = _page_cursors.get(page_key + (page,))
+        if remembered is not None and remembered[0] == versions:
+            after = decode_cursor(remembered[1])
 
-    total = response.count or 0
-    if verdict and verdict != "pass":
-        pass_count = 0
-    elif verdict == "pass":
-        pass_count = total
+    query = supabase.table("evaluations").select("*", count=None if facets is not None else "exact")
+    query = _apply_filters(query, queue_id, judge_ids, question_ids, verdict)
+    if after is not None:
+        created_at, row_id = quote_filter_value(after[0]), quote_filter_value(after[1])
+        query = query.or_(f"created_at.lt.{created_at},and(created_at.eq.{created_at},id.lt.{row_id})").limit(limit)
     else:
-        pass_query = supabase.table("evaluations").select("id", count="exact")
-        pass_query = _apply_filters(pass_query, submission_ids, judge_ids, question_ids, verdict=None)
-        pass_response = pass_query.eq("verdict", "pass").execute()
-        pass_count = pass_response.count or 0
-    pass_rate = round((pass_count / total) * 100, 1) if total else 0.0
+        offset = (page - 1) * limit
+        query = query.range(offset, offset + limit - 1)
+    response = await query.order("created_at", desc=True).order("id", desc=True).execute()
+    if response.data is None:
+        raise HTTPException(status_code=500, detail="Failed to fetch evaluations")
 
     rows = response.data or []
+    next_cursor = encode_cursor(rows[-1]) if len(rows) == limit else None
+    if next_cursor and not cursor and versions is not None:
+        _remember_page_cursor(page_key + (page + 1,), versions, next_cursor)
 
-    judge_ids = sorted({r.get("judge_id") for r in rows if r.get("judge_id")})
-    judge_map: Dict[str, str] = {}
-    if judge_ids:
-        try:
-            jresp = supabase.table("judges").select("id, name").in_("id", judge_ids).execute()
-            for j in jresp.data or []:
-                judge_map[str(j.get("id"))] = j.get("name")
-        except Exception:
-            judge_map = {}
+    if facets is not None:
+        total = facets["total"]
+        pass_count = facets["verdicts"].get("pass", 0)
+        judge_map = {judge["judge_id"]: judge["judge_name"] for judge in facets["judges"] if judge["judge_name"]}
+    else:
+        total = response.count or 0
+        if verdict and verdict != "pass":
+            pass_count = 0
+        elif verdict == "pass":
+            pass_count = total
+        else:
+            pass_query = supabase.table("evaluations").select("id", count="exact")
+            pass_query = _apply_filters(pass_query, queue_id, judge_ids, question_ids, verdict=None)
+            pass_response = await pass_query.eq("verdict", "pass").execute()
+            pass_count = pass_response.count or 0
+        judge_map = await _judge_names(supabase, sorted({r.get("judge_id") for r in rows if r.get("judge_id")}))
+    pass_rate = round((pass_count / total) * 100, 1) if total else 0.0
 
     enriched = []
     for r in rows:
@@ -74,4 +178,29 @@ def fetch_evaluations(
         "total": total,
         "pass_count": pass_count,
         "pass_rate": pass_rate,
-    }
\ No newline at end of file
+        "next_cursor": next_cursor,
+        "facets": {"verdicts": facets["verdicts"], "judges": facets["judges"]} if facets is not None else None,
+    }
+
+async def export_evaluations(
+    supabase: AsyncClient,
+    queue_id: Optional[str] = None,
+    judge_ids: Optional[list[str]] = None,
+    question_ids: Optional[list[str]] = None,
+    verdict: Optional[str] = None,
+) -> AsyncIterator[bytes]:
+    """Yield matching evaluations as NDJSON, one keyset page at a time, oldest first."""
+    settings = get_settings()
+    filters: Dict[str, Any] = {}
+    if queue_id:
+        filters["queue_id"] = queue_id
+    if judge_ids:
+        filters["judge_id"] = judge_ids
+    if question_ids:
+        filters["question_id"] = question_ids
+    if verdict:
+        filters["verdict"] = verdict
+
+    async with aclosing(scan_pages(supabase, "evaluations", "*", filters=filters, page_size=settings.scan_page_size)) as pages:
+        async for page in pages:
+            yield "".join(json.dumps(row, default=str) + "\n" for row in page).encode("utf-8")
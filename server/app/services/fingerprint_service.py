@@ -1,4 +1,8 @@
+from typing import Dict, Iterable, List
 import mmh3
+import numpy as np
+
+SIMHASH_CHUNK_TOKENS = 1 << 18
 
 def simhash(text: str, bits: int = 64) -> int:
     tokens = text.split()
@@ -25,9 +29,58 @@ def simhash(text: str, bits: int = 64) -> int:
     return unsigned
 
 
+def simhash_many(texts: Iterable[str], bits: int = 64) -> List[int]:
+    """Batch `simhash`: bit-identical output, with the bit votes accumulated in NumPy.
+
+    Each distinct token is hashed once per call; per-document vote sums are
+    computed with `np.add.reduceat` over chunks of at most `SIMHASH_CHUNK_TOKENS`
+    tokens so memory stays bounded on large uploads.
+    """
+    if not 0 < bits <= 128:
+        raise ValueError("simhash_many supports 1-128 bits")
+
+    vocab: Dict[str, int] = {}
+    token_ids: List[int] = []
+    offsets: List[int] = [0]
+    for text in texts:
+        for token in text.split():
+            token_ids.append(vocab.setdefault(token, len(vocab)))
+        offsets.append(len(token_ids))
+
+    results = [0] * (len(offsets) - 1)
+    if not vocab:
+        return results
+
+    digests = np.frombuffer(b"".join(mmh3.hash_bytes(token) for token in vocab), dtype=np.uint8)
+    bit_table = np.unpackbits(digests.reshape(-1, 16), axis=1, bitorder="little")[:, :bits]
+    vote_table = bit_table.astype(np.int8) * 2 - 1
+    ids = np.asarray(token_ids, dtype=np.int64)
+    bounds = np.asarray(offsets, dtype=np.int64)
+
+    mask = (1 << bits) - 1
+    nonempty = np.flatnonzero(bounds[1:] > bounds[:-1])
+    start = 0
+    while start < len(nonempty):
+        # Grow the chunk until it would exceed the token budget (always at least one document).
+        first_token = bounds[nonempty[start]]
+        stop = int(np.searchsorted(bounds[nonempty + 1], first_token + SIMHASH_CHUNK_TOKENS, side="right"))
+        stop = max(stop, start + 1)
+        docs = nonempty[start:stop]
+        last_token = bounds[docs[-1] + 1]
+        votes = vote_table[ids[first_token:last_token]]
+        sums = np.add.reduceat(votes, bounds[docs] - first_token, axis=0, dtype=np.int32)
+        packed = np.packbits(sums > 0, axis=1, bitorder="little")
+        for doc, row in zip(docs.tolist(), packed):
+            unsigned = int.from_bytes(row.tobytes(), "little") & mask
+            if bits == 64 and unsigned >= (1 << 63):
+                unsigned -= 1 << 64
+            results[doc] = unsigned
+        start = stop
+    return results
+
+
 def hamming_distance(x: int, y: int, bits: int = 64) -> int:
     mask = (1 << bits) - 1
     ux = x & mask
     uy = y & mask
     return bin(ux ^ uy).count("1")
-
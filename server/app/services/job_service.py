@@ -1,43 +1,94 @@
 import asyncio
 import logging
 from datetime import datetime, timezone
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from fastapi import HTTPException
-from supabase import Client
+from supabase import AsyncClient
 
-async def stream_live_status(supabase: Client, queue_id: str):
+JOB_STATUSES = ("pending", "running", "done", "failed")
+
+async def get_job_status(supabase: AsyncClient, queue_id: str) -> Dict[str, Any]:
     try:
-        while True:
-            try:
-                payload = get_job_status(supabase, queue_id)
-                yield payload
-                counts = payload["counts"]
-                if counts.get("pending", 0) + counts.get("running", 0) == 0 and payload["total"] > 0:
-                    break
-            except Exception:
-                logging.exception("Error inside live status generator")
-            await asyncio.sleep(1.0)
-    except asyncio.CancelledError:
-        logging.info("SSE client disconnected for queue %s", queue_id)
-
-def get_job_status(supabase: Client, queue_id: str) -> Dict[str, Any]:
-    statuses = ["pending", "running", "done", "failed"]
-    counts = {}
-    for status in statuses:
-        resp = supabase.table("judge_jobs").select("id", count="exact").eq("queue_id", queue_id).eq("status", status).execute()
-        counts[status] = resp.count or 0
-    total_resp = supabase.table("judge_jobs").select("id", count="exact").eq("queue_id", queue_id).execute()
+        response = await supabase.rpc("queue_job_status", {"p_queue_id": queue_id}).execute()
+    except Exception:  # noqa: BLE001
+        logging.debug("queue_job_status unavailable; counting judge_jobs directly", exc_info=True)
+        return await _count_job_status(supabase, queue_id)
+    row = (response.data or [{}])[0]
+    return {
+        "counts": {status: int(row.get(status) or 0) for status in JOB_STATUSES},
+        "total": int(row.get("total") or 0),
+        "completed_evaluations": int(row.get("evaluations") or 0),
+    }
+
+async def _count_job_status(supabase: AsyncClient, queue_id: str) -> Dict[str, Any]:
+    status_queries = [
+        supabase.table("judge_jobs").select("id", count="exact").eq("queue_id", queue_id).eq("status", status).execute()
+        for status in JOB_STATUSES
+    ]
+    total_query = supabase.table("judge_jobs").select("id", count="exact").eq("queue_id", queue_id).execute()
+    evaluations_query = supabase.table("evaluations").select("id", count="exact").eq("queue_id", queue_id).execute()
+    *status_resps, total_resp, evaluations_resp = await asyncio.gather(*status_queries, total_query, evaluations_query)
+    counts = {status: resp.count or 0 for status, resp in zip(JOB_STATUSES, status_resps)}
     total = total_resp.count or 0
-    evaluations_resp = (
-        supabase.table("evaluations").select("id", count="exact").eq("queue_id", queue_id).execute()
-    )
     evaluations_completed = evaluations_resp.count or 0
     return {"counts": counts, "total": total, "completed_evaluations": evaluations_completed}
 
-def debug_queue(supabase: Client, queue_id: str) -> Dict[str, int]:
+async def debug_queue(supabase: AsyncClient, queue_id: str) -> Dict[str, int]:
     tables = ["submissions", "assignments", "judge_jobs"]
     summary = {}
     for table in tables:
-        resp = supabase.table(table).select("id", count="exact").eq("queue_id", queue_id).execute()
+        resp = await supabase.table(table).select("id", count="exact").eq("queue_id", queue_id).execute()
         summary[table] = resp.count or 0
-    return summary
\ No newline at end of file
+    return summary
+
+async def claim_jobs(supabase: AsyncClient, worker_id: str, limit: int, lease_seconds: int, max_attempts: int = 3) -> List[Dict[str, Any]]:
+    response = await supabase.rpc(
+        "claim_judge_jobs",
+        {
+            "p_worker_id": worker_id,
+            "p_limit": limit,
+            "p_lease_seconds": lease_seconds,
+            "p_max_attempts": max_attempts,
+        },
+    ).execute()
+    return response.data or []
+
+async def renew_job_leases(supabase: AsyncClient, worker_id: str, job_ids: List[str], lease_seconds: int) -> int:
+    if not job_ids:
+        return 0
+    response = await supabase.rpc(
+        "renew_judge_job_leases",
+        {"p_worker_id": worker_id, "p_job_ids": job_ids, "p_lease_seconds": lease_seconds},
+    ).execute()
+    return response.data or 0
+
+async def update_leased_job(supabase: AsyncClient, job: Dict[str, Any], fields: Dict[str, Any]) -> None:
+    """Write a status transition, releasing the lease only if this worker still holds it."""
+    payload = {
+        **fields,
+        "lease_owner": None,
+        "lease_expires_at": None,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+    query = supabase.table("judge_jobs").update(payload).eq("id", job["id"])
+    owner: Optional[str] = job.get("lease_owner")
+    if owner:
+        query = query.eq("lease_owner", owner)
+    await query.execute()
+
+async def update_leased_jobs(supabase: AsyncClient, jobs: List[Dict[str, Any]], fields: Dict[str, Any]) -> None:
+    """Bulk variant of `update_leased_job`: one `in_()` update per lease owner."""
+    by_owner: Dict[Optional[str], List[str]] = {}
+    for job in jobs:
+        by_owner.setdefault(job.get("lease_owner"), []).append(job["id"])
+    payload = {
+        **fields,
+        "lease_owner": None,
+        "lease_expires_at": None,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+    for owner, job_ids in by_owner.items():
+        query = supabase.table("judge_jobs").update(payload).in_("id", job_ids)
+        if owner:
+            query = query.eq("lease_owner", owner)
+        await query.execute()
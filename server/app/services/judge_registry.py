@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+from supabase import AsyncClient
+from app.services.judge_service import judge_fingerprint, resolve_provider
+
+def call_provider(judge: Dict[str, Any]) -> Optional[str]:
+    """Provider a judge's calls are made through, which is what limiters are keyed on."""
+    if str(judge.get("provider", "")).lower() == "dedalus" or judge.get("use_dedalus"):
+        return "dedalus"
+    return resolve_provider(judge.get("provider"), judge.get("model"))
+
+def api_judge(row: Dict[str, Any], provider: Optional[str]) -> Dict[str, Any]:
+    """A judge row as the API returns it, with `provider` resolved from the model."""
+    enriched = dict(row)
+    resolved = resolve_provider(provider, row.get("model"))
+    if resolved is not None:
+        enriched["provider"] = resolved
+    elif "provider" in enriched:
+        enriched.pop("provider")
+    return enriched
+
+class JudgeSnapshot:
+    """Immutable view of the judges table with derived fields computed once per load."""
+
+    def __init__(self, rows: List[Dict[str, Any]], version: Optional[int], generation: int) -> None:
+        self.version = version
+        self.generation = generation
+        self.loaded_at = time.monotonic()
+        self.judges: Dict[str, Dict[str, Any]] = {str(row["id"]): row for row in rows}
+        self.api_rows: List[Dict[str, Any]] = [api_judge(row, row.get("provider")) for row in rows]
+        self.providers: Dict[str, Optional[str]] = {judge_id: call_provider(row) for judge_id, row in self.judges.items()}
+        self.fingerprints: Dict[str, str] = {judge_id: judge_fingerprint(row) for judge_id, row in self.judges.items()}
+        self.names: Dict[str, str] = {judge_id: row.get("name") or judge_id for judge_id, row in self.judges.items()}
+
+class JudgeRegistry:
+    """Process-wide judge cache shared by the API and the worker.
+
+    The `judges` version in `queue_data_versions` (bumped by a trigger on every judge
+    write) is probed at most every `probe_interval` seconds and the table is reloaded
+    only when it moves. Judge CRUD in this process calls `invalidate()` so its own
+    writes are visible immediately. If the probe fails, the snapshot is reloaded once
+    it is older than `max_age`.
+    """
+
+    def __init__(self, probe_interval: float = 5.0, max_age: float = 60.0) -> None:
+        self.probe_interval = probe_interval
+        self.max_age = max_age
+        self._snapshot: Optional[JudgeSnapshot] = None
+        self._checked_at = float("-inf")
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        self.loads = 0
+        self.probes = 0
+
+    def invalidate(self) -> None:
+        self._generation += 1
+
+    def _fresh(self, probe: bool, requested_at: float) -> bool:
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.generation != self._generation:
+            return False
+        if probe:
+            return self._checked_at >= requested_at
+        return time.monotonic() - self._checked_at < self.probe_interval
+
+    async def get(self, supabase: AsyncClient, probe: bool = False) -> JudgeSnapshot:
+        """Current snapshot; `probe=True` checks the version now instead of waiting for the interval."""
+        requested_at = time.monotonic()
+        if self._fresh(probe, requested_at):
+            return self._snapshot
+        async with self._lock:
+            if self._fresh(probe, requested_at):
+                return self._snapshot
+            generation = self._generation
+            version = await self._probe(supabase)
+            self._checked_at = time.monotonic()
+            snapshot = self._snapshot
+            if (
+                snapshot is None
+                or snapshot.generation != generation
+                or (version is not None and version != snapshot.version)
+                or (version is None and self._checked_at - snapshot.loaded_at > self.max_age)
+            ):
+                response = await supabase.table("judges").select("*").execute()
+                self._snapshot = JudgeSnapshot(response.data or [], version, generation)
+                self.loads += 1
+        return self._snapshot
+
+    async def _probe(self, supabase: AsyncClient) -> Optional[int]:
+        self.probes += 1
+        try:
+            response = await supabase.table("queue_data_versions").select("version").eq("scope", "judges").limit(1).execute()
+        except Exception:  # noqa: BLE001
+            logging.debug("Judge version probe failed; falling back to max_age reloads", exc_info=True)
+            return None
+        rows = response.data or []
+        return int(rows[0]["version"]) if rows else 0
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "judges": len(snapshot.judges) if snapshot else 0,
+            "version": snapshot.version if snapshot else None,
+            "loads": self.loads,
+            "probes": self.probes,
+        }
+
+_registry: Optional[JudgeRegistry] = None
+
+def get_judge_registry() -> JudgeRegistry:
+    global _registry
+    if _registry is None:
+        from app.core.config import get_settings
+
+        settings = get_settings()
+        _registry = JudgeRegistry(settings.judge_registry_probe_interval, settings.judge_registry_max_age)
+    return _registry
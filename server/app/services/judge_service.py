@@ -1,46 +1,46 @@
-import asyncio
+import hashlib
 import json
 from datetime import datetime, timezone
-from typing import Any, Awaitable, Callable, Dict, Literal, Optional
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Literal, Optional
 from pydantic import BaseModel, ValidationError
-from app.services.fingerprint_service import simhash
+from app.services.provider_limiter import ProviderLimiter, estimate_tokens
+from app.services.verdict_cache import VerdictCache, judge_allows_cache, verdict_cache_key
 
 class VerdictSchema(BaseModel):
     verdict: Literal['pass', 'fail', 'inconclusive']
     reasoning: Optional[str] = ''
 
-async def _call_groq(client: Any, model: str, prompt: str) -> str:
+class BatchVerdictSchema(VerdictSchema):
+    question_id: str
+
+async def _call_groq(client: Any, model: str, prompt: str, max_tokens: int = 400) -> str:
     response = await client.chat.completions.create(
         model=model,
         messages=[{"role": "user", "content": prompt}],
-        max_tokens=400,
+        max_tokens=max_tokens,
     )
     return response.choices[0].message.content.strip()
 
-async def _call_openai(client: Any, model: str, prompt: str) -> str:
+async def _call_openai(client: Any, model: str, prompt: str, max_tokens: int = 400) -> str:
     response = await client.chat.completions.create(
         model=model,
         messages=[{"role": "user", "content": prompt}],
-        max_tokens=400,
+        max_tokens=max_tokens,
     )
     return response.choices[0].message.content.strip()
 
-async def _call_anthropic(client: Any, model: str, prompt: str) -> str:
+async def _call_anthropic(client: Any, model: str, prompt: str, max_tokens: int = 400) -> str:
     response = await client.messages.create(
         model=model,
-        max_tokens=400,
+        max_tokens=max_tokens,
         messages=[{"role": "user", "content": prompt}],
     )
     texts = [getattr(block, "text", "") for block in getattr(response, "content", [])]
     joined = " ".join(filter(None, texts)).strip()
     return joined or getattr(response, "message", {}).get("content", "").strip()
 
-async def _call_gemini(client: Any, model: str, prompt: str) -> str:
-    def _generate() -> Any:
-        model_client = client.GenerativeModel(model)
-        return model_client.generate_content(prompt)
-
-    response = await asyncio.to_thread(_generate)
+async def _call_gemini(client: Any, model: str, prompt: str, max_tokens: int = 400) -> str:
+    response = await client.generate(model, prompt)
     if getattr(response, "text", None):
         return response.text.strip()
     candidates = getattr(response, "candidates", [])
@@ -53,7 +53,7 @@ async def _call_gemini(client: Any, model: str, prompt: str) -> str:
                 return joined
     return ""
 
-ProviderCall = Callable[[Any, str, str], Awaitable[str]]
+ProviderCall = Callable[..., Awaitable[str]]
 
 PROVIDERS: Dict[str, ProviderCall] = {
     'groq': _call_groq,
@@ -69,6 +69,20 @@ PROMPT_TEMPLATE = (
     "Response ONLY with a Json object: {{\"verdict\":\"pass|fail|inconclusive\",\"reasoning\":\"...\"}}\n"
 )
 
+BATCH_PROMPT_TEMPLATE = (
+    "{system_prompt}\n\n"
+    "Judge each answer below on its own.\n\n"
+    "{items}"
+    "Respond ONLY with a Json array holding one object per question id: "
+    "[{{\"question_id\":\"...\",\"verdict\":\"pass|fail|inconclusive\",\"reasoning\":\"...\"}}]\n"
+)
+
+BATCH_ITEM_TEMPLATE = "Question id: {question_id}\nQuestion: {question_text}\n\nAnswer: {answer_text}\n\n"
+
+# Reply budget per verdict, and the cap for a batched reply.
+VERDICT_MAX_TOKENS = 400
+BATCH_MAX_TOKENS = 4096
+
 def _resolve_provider(provider: Optional[str], model: Optional[str]) -> Optional[str]:
     inferred = None
     if model:
@@ -98,6 +112,7 @@ async def _call_provider(
     clients: Dict[str, Any],
     model: Optional[str],
     prompt: str,
+    max_tokens: int = 400,
 ) -> Optional[str]:
     provider_key = _resolve_provider(provider, model)
     provider_fn = PROVIDERS.get(provider_key)
@@ -108,7 +123,22 @@ async def _call_provider(
     client = clients.get(provider_key)
     if client is None:
         return None
-    return await provider_fn(client, model, prompt)
+    return await provider_fn(client, model, prompt, max_tokens)
+
+JUDGE_FINGERPRINT_FIELDS = (
+    'provider',
+    'model',
+    'system_prompt',
+    'includeQuestionText',
+    'includeAnswerText',
+    'includeMetadata',
+    'use_dedalus',
+)
+
+def judge_fingerprint(judge: Dict[str, Any]) -> str:
+    """Digest of the judge settings that affect a verdict; stored on each evaluation."""
+    material = json.dumps([judge.get(field) for field in JUDGE_FINGERPRINT_FIELDS], separators=(',', ':'), default=str)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()[:32]
 
 def _parse_verdict(raw: str) -> tuple[str, str]:
     try:
@@ -124,6 +154,37 @@ def _parse_verdict(raw: str) -> tuple[str, str]:
             verdict = 'inconclusive'
         return verdict, raw.strip()[:1000]
 
+def _parse_batch_verdicts(raw: str, question_ids: Iterable[str]) -> Dict[str, tuple[str, str]]:
+    """Verdicts from a batched reply, keyed by question id.
+
+    Items that fail validation, repeat an id or name a question that wasn't asked
+    are dropped; the caller re-asks those questions one at a time.
+    """
+    wanted = set(question_ids)
+    try:
+        payload = json.loads(raw)
+    except json.JSONDecodeError:
+        start, end = raw.find('['), raw.rfind(']')
+        if start < 0 or end <= start:
+            return {}
+        try:
+            payload = json.loads(raw[start:end + 1])
+        except json.JSONDecodeError:
+            return {}
+    if isinstance(payload, dict):
+        payload = payload.get('verdicts')
+    if not isinstance(payload, list):
+        return {}
+    verdicts: Dict[str, tuple[str, str]] = {}
+    for item in payload:
+        try:
+            parsed = BatchVerdictSchema.parse_obj(item)
+        except ValidationError:
+            continue
+        if parsed.question_id in wanted and parsed.question_id not in verdicts:
+            verdicts[parsed.question_id] = (parsed.verdict, (parsed.reasoning or '').strip()[:1000])
+    return verdicts
+
 def _extract_question(submission_data: dict, question_id: str) -> Optional[dict]:
     for entry in submission_data.get('questions', []):
         data = entry.get('data') if isinstance(entry, dict) else entry
@@ -131,6 +192,30 @@ def _extract_question(submission_data: dict, question_id: str) -> Optional[dict]
             return data
     return None
 
+def _render_item(submission_data: dict, question_id: str) -> Optional[tuple[str, str]]:
+    """Question and answer text of one submission question, or None if either is missing."""
+    question = _extract_question(submission_data, question_id)
+    if not question:
+        return None
+
+    answer = submission_data.get('answers', {}).get(question_id)
+    if not answer:
+        return None
+
+    answer_text = ' '.join(str(value) for value in answer.values())
+    question_text = question.get('questionText') or question.get('question_text') or question.get('text') or str(question)
+    return question_text, answer_text
+
+def _evaluation(submission_id: str, question_id: str, judge_id: str, verdict: str, reasoning: str) -> Dict[str, Any]:
+    return {
+        'submission_id': submission_id,
+        'question_id': question_id,
+        'judge_id': judge_id,
+        'verdict': verdict,
+        'reasoning': reasoning,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+    }
+
 async def run_single_judge(
     submission_id: str,
     submission_data: dict,
@@ -138,38 +223,102 @@ async def run_single_judge(
     judge_id: str,
     provider_clients: Dict[str, Any],
     judges: Dict[str, Dict[str, Any]],
+    cache: Optional[VerdictCache] = None,
+    limiter: Optional[ProviderLimiter] = None,
 ):
-    question = _extract_question(submission_data, question_id)
-    if not question:
-        return None
-
-    answer = submission_data.get('answers', {}).get(question_id)
-    if not answer:
+    item = _render_item(submission_data, question_id)
+    if not item:
         return None
 
     judge = judges.get(judge_id)
     if not judge or judge.get('active') is False:
         return None
 
-    answer_text = ' '.join(str(value) for value in answer.values())
+    question_text, answer_text = item
     prompt = PROMPT_TEMPLATE.format(
         system_prompt=judge.get('system_prompt', ''),
-        question_text=question.get('questionText') or question.get('question_text') or question.get('text') or str(question),
+        question_text=question_text,
         answer_text=answer_text,
     )
 
-    raw_response = await _call_provider(judge.get('provider'), provider_clients, judge.get('model'), prompt)
-    if not raw_response:
+    async def _judge() -> Optional[tuple[str, str]]:
+        if limiter is not None:
+            async with limiter.slot(estimate_tokens(prompt)):
+                raw_response = await _call_provider(judge.get('provider'), provider_clients, judge.get('model'), prompt)
+        else:
+            raw_response = await _call_provider(judge.get('provider'), provider_clients, judge.get('model'), prompt)
+        if not raw_response:
+            return None
+        verdict, reasoning = _parse_verdict(raw_response)
+        return verdict, reasoning[:1000]
+
+    if cache is not None and judge_allows_cache(judge):
+        provider = _resolve_provider(judge.get('provider'), judge.get('model'))
+        key = verdict_cache_key(provider, judge.get('model'), judge.get('system_prompt', ''), question_text, answer_text)
+        result = await cache.get_or_compute(key, _judge, provider, judge.get('model'))
+    else:
+        result = await _judge()
+    if not result:
         return None
-    verdict, reasoning = _parse_verdict(raw_response)
-    reasoning = reasoning[:1000]
+    verdict, reasoning = result
 
-    return {
-        'submission_id': submission_id,
-        'question_id': question_id,
-        'judge_id': judge_id,
-        'verdict': verdict,
-        'reasoning': reasoning,
-        'reasoning_simhash': simhash(reasoning),
-        'created_at': datetime.now(timezone.utc).isoformat(),
-    }
+    return _evaluation(submission_id, question_id, judge_id, verdict, reasoning)
+
+async def run_batched_judge(
+    submission_id: str,
+    submission_data: dict,
+    question_ids: List[str],
+    judge_id: str,
+    provider_clients: Dict[str, Any],
+    judges: Dict[str, Dict[str, Any]],
+    cache: Optional[VerdictCache] = None,
+    limiter: Optional[ProviderLimiter] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Judge several questions of one submission with a single provider call.
+
+    Cached verdicts are served first and the rest go out in one prompt that asks
+    for a verdict per question id. Returns evaluations only for the questions that
+    got a valid verdict; the caller judges the others one at a time.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    judge = judges.get(judge_id)
+    if not judge or judge.get('active') is False:
+        return results
+
+    items = {}
+    for question_id in dict.fromkeys(question_ids):
+        item = _render_item(submission_data, question_id)
+        if item:
+            items[question_id] = item
+
+    provider = _resolve_provider(judge.get('provider'), judge.get('model'))
+    model = judge.get('model')
+    system_prompt = judge.get('system_prompt', '')
+    keys: Dict[str, str] = {}
+    if cache is not None and judge_allows_cache(judge):
+        for question_id, (question_text, answer_text) in items.items():
+            keys[question_id] = verdict_cache_key(provider, model, system_prompt, question_text, answer_text)
+            cached = await cache.lookup(keys[question_id])
+            if cached is not None:
+                results[question_id] = _evaluation(submission_id, question_id, judge_id, *cached)
+
+    pending = [question_id for question_id in items if question_id not in results]
+    if len(pending) > 1:
+        prompt = BATCH_PROMPT_TEMPLATE.format(
+            system_prompt=system_prompt,
+            items=''.join(
+                BATCH_ITEM_TEMPLATE.format(question_id=question_id, question_text=items[question_id][0], answer_text=items[question_id][1])
+                for question_id in pending
+            ),
+        )
+        max_tokens = min(VERDICT_MAX_TOKENS * len(pending), BATCH_MAX_TOKENS)
+        if limiter is not None:
+            async with limiter.slot(estimate_tokens(prompt, max_tokens)):
+                raw_response = await _call_provider(judge.get('provider'), provider_clients, model, prompt, max_tokens)
+        else:
+            raw_response = await _call_provider(judge.get('provider'), provider_clients, model, prompt, max_tokens)
+        for question_id, verdict in _parse_batch_verdicts(raw_response or '', pending).items():
+            if question_id in keys:
+                await cache.store(keys[question_id], verdict, provider, model)
+            results[question_id] = _evaluation(submission_id, question_id, judge_id, *verdict)
+    return results
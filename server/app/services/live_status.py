@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, Optional, Set
+from supabase import AsyncClient
+from app.services.job_service import get_job_status
+
+Payload = Dict[str, Any]
+
+_CLOSED = object()
+
+def _is_finished(payload: Payload) -> bool:
+    counts = payload["counts"]
+    return counts.get("pending", 0) + counts.get("running", 0) == 0 and payload["total"] > 0
+
+class _Channel:
+    def __init__(self, queue_id: str) -> None:
+        self.queue_id = queue_id
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.latest: Optional[Payload] = None
+        self.poller: Optional[asyncio.Task] = None
+        self.closed = False
+
+    def publish(self, item: Any) -> None:
+        for inbox in self.subscribers:
+            if inbox.full():
+                # Payloads are full snapshots, so a slow client only needs the newest one.
+                inbox.get_nowait()
+            inbox.put_nowait(item)
+
+class LiveStatusBroadcaster:
+    """One status poller per queue, fanned out to every SSE subscriber of that queue.
+
+    The poller runs only while a queue has subscribers and publishes a snapshot only
+    when it differs from the previous one. Each subscriber has a small bounded inbox
+    that drops its oldest snapshot when full, so a stalled client never holds up the
+    others. Once every job of the queue has finished, the final snapshot is published
+    and all subscriptions end.
+    """
+
+    def __init__(self, interval: float = 1.0, inbox_size: int = 4, keepalive: float = 15.0) -> None:
+        self.interval = interval
+        self.inbox_size = inbox_size
+        self.keepalive = keepalive
+        self._channels: Dict[str, _Channel] = {}
+
+    async def subscribe(self, supabase: AsyncClient, queue_id: str) -> AsyncIterator[Optional[Payload]]:
+        """Yield status snapshots for `queue_id`, or None after `keepalive` seconds without one."""
+        channel = self._channels.get(queue_id)
+        if channel is None or channel.closed:
+            channel = self._channels[queue_id] = _Channel(queue_id)
+        inbox: asyncio.Queue = asyncio.Queue(maxsize=self.inbox_size)
+        channel.subscribers.add(inbox)
+        if channel.latest is not None:
+            inbox.put_nowait(channel.latest)
+        if channel.poller is None:
+            channel.poller = asyncio.create_task(self._poll(supabase, channel))
+
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(inbox.get(), timeout=self.keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if item is _CLOSED:
+                    return
+                yield item
+        finally:
+            channel.subscribers.discard(inbox)
+            if not channel.subscribers and not channel.closed:
+                self._close(channel)
+
+    async def _poll(self, supabase: AsyncClient, channel: _Channel) -> None:
+        while not channel.closed:
+            try:
+                payload = await get_job_status(supabase, channel.queue_id)
+            except Exception:  # noqa: BLE001
+                logging.exception("Live status poll failed for queue %s", channel.queue_id)
+            else:
+                if payload != channel.latest:
+                    channel.latest = payload
+                    channel.publish(payload)
+                if _is_finished(payload):
+                    channel.publish(_CLOSED)
+                    self._close(channel, cancel=False)
+                    return
+            await asyncio.sleep(self.interval)
+
+    def _close(self, channel: _Channel, cancel: bool = True) -> None:
+        channel.closed = True
+        if self._channels.get(channel.queue_id) is channel:
+            del self._channels[channel.queue_id]
+        if cancel and channel.poller is not None:
+            channel.poller.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queues": len(self._channels),
+            "subscribers": sum(len(channel.subscribers) for channel in self._channels.values()),
+        }
+
+_broadcaster: Optional[LiveStatusBroadcaster] = None
+
+def get_live_status_broadcaster() -> LiveStatusBroadcaster:
+    global _broadcaster
+    if _broadcaster is None:
+        from app.core.config import get_settings
+
+        _broadcaster = LiveStatusBroadcaster(get_settings().live_status_interval)
+    return _broadcaster
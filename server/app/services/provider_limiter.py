@@ -0,0 +1,148 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+PROVIDER_NAMES = ("groq", "openai", "anthropic", "gemini", "dedalus")
+DEFAULT_PROVIDER = "default"
+
+COMPLETION_TOKENS = 400
+
+def estimate_tokens(prompt: str, completion_tokens: int = COMPLETION_TOKENS) -> int:
+    return len(prompt) // 4 + completion_tokens
+
+def is_congestion_error(exc: BaseException) -> bool:
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError)):
+        return True
+    if getattr(exc, "status_code", None) == 429:
+        return True
+    err_str = str(exc).lower()
+    return "rate limit" in err_str or "timeout" in err_str or "429" in err_str
+
+class TokenBucket:
+    """Refills continuously at `per_minute / 60` units per second, bursting up to one minute of quota."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def take(self, amount: float) -> None:
+        amount = min(float(amount), self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+class ProviderLimiter:
+    """Per-provider request/token buckets plus an AIMD concurrency window.
+
+    The window grows by roughly one slot per window's worth of successful calls
+    and halves whenever a call fails with a 429 or a timeout.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        initial_window: float = 4.0,
+        min_window: float = 1.0,
+        max_window: float = 32.0,
+    ) -> None:
+        self.name = name
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.min_window = min_window
+        self.max_window = max(max_window, min_window)
+        self.window = min(max(initial_window, min_window), self.max_window)
+        self.in_flight = 0
+        self.successes = 0
+        self.congestions = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self, tokens: int = 0) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.window))
+            self.in_flight += 1
+        try:
+            if self.requests:
+                await self.requests.take(1)
+            if self.tokens and tokens:
+                await self.tokens.take(tokens)
+        except BaseException:
+            await self.release(None)
+            raise
+
+    async def release(self, congested: Optional[bool]) -> None:
+        async with self._cond:
+            self.in_flight -= 1
+            if congested:
+                self.congestions += 1
+                self.window = max(self.min_window, self.window / 2)
+            elif congested is False:
+                self.successes += 1
+                self.window = min(self.max_window, self.window + 1 / self.window)
+            self._cond.notify_all()
+
+    @asynccontextmanager
+    async def slot(self, tokens: int = 0) -> AsyncIterator["ProviderLimiter"]:
+        await self.acquire(tokens)
+        congested: Optional[bool] = False
+        try:
+            yield self
+        except BaseException as exc:
+            congested = True if is_congestion_error(exc) else None
+            raise
+        finally:
+            await self.release(congested)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "window": round(self.window, 2),
+            "in_flight": self.in_flight,
+            "successes": self.successes,
+            "congestions": self.congestions,
+        }
+
+def _env_float(name: str) -> Optional[float]:
+    value = os.getenv(name)
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+def _build_limiter(provider: str) -> ProviderLimiter:
+    prefix = provider.upper()
+    return ProviderLimiter(
+        provider,
+        rpm=_env_float(f"{prefix}_RPM"),
+        tpm=_env_float(f"{prefix}_TPM"),
+        initial_window=_env_float(f"{prefix}_INITIAL_CONCURRENCY") or 4.0,
+        max_window=_env_float(f"{prefix}_MAX_CONCURRENCY") or 32.0,
+    )
+
+_LIMITERS: Dict[str, ProviderLimiter] = {}
+
+def get_provider_limiter(provider: Optional[str]) -> ProviderLimiter:
+    key = provider if provider in PROVIDER_NAMES else DEFAULT_PROVIDER
+    limiter = _LIMITERS.get(key)
+    if limiter is None:
+        limiter = _LIMITERS[key] = _build_limiter(key)
+    return limiter
+
+def limiter_snapshots() -> Dict[str, Dict[str, Any]]:
+    return {name: limiter.snapshot() for name, limiter in _LIMITERS.items()}
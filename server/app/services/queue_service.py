@@ -1,17 +1,24 @@
+import asyncio
+import hashlib
 import json
 import uuid
+from contextlib import aclosing
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 from fastapi import HTTPException
-from supabase import Client
+from supabase import AsyncClient
 from app.core.config import Settings
+from app.services.fingerprint_service import simhash_many
+from app.services.judge_registry import get_judge_registry
+from app.services.scan_service import scan_pages
+from app.services.simhash_index import SimhashIndex
 
-def fetch_assignments(supabase: Client, queue_id: str) -> List[Dict[str, Any]]:
-    response = supabase.table("assignments").select("*").eq("queue_id", queue_id).execute()
+async def fetch_assignments(supabase: AsyncClient, queue_id: str) -> List[Dict[str, Any]]:
+    response = await supabase.table("assignments").select("*").eq("queue_id", queue_id).execute()
     rows = response.data or []
     return rows
 
-def save_assignments(supabase: Client, assignments: List[Dict[str, Any]]) -> Dict[str, Any]:
+async def save_assignments(supabase: AsyncClient, assignments: List[Dict[str, Any]]) -> Dict[str, Any]:
     payload: List[Dict[str, Any]] = []
     queue_id: Optional[str] = None
 
@@ -26,18 +33,18 @@ def save_assignments(supabase: Client, assignments: List[Dict[str, Any]]) -> Dic
         raise HTTPException(status_code=400, detail="Assignments must include a queue_id")
 
     try:
-        supabase.table("assignments").delete().eq("queue_id", queue_id).execute()
+        await supabase.table("assignments").delete().eq("queue_id", queue_id).execute()
     except Exception as exc:
         raise HTTPException(status_code=500, detail="Failed to reset assignments for queue") from exc
 
     try:
-        response = supabase.table("assignments").insert(payload).execute()
+        response = await supabase.table("assignments").insert(payload).execute()
     except Exception as exc:
         raise HTTPException(status_code=500, detail="Failed to save assignments") from exc
 
     rows = response.data or []
 
-    submissions_resp = (
+    submissions_resp = await (
         supabase.table("submissions").select("id", count="exact").eq("queue_id", queue_id).execute()
     )
     submissions_count = submissions_resp.count or 0
@@ -54,8 +61,8 @@ def save_assignments(supabase: Client, assignments: List[Dict[str, Any]]) -> Dic
 
     return {"assignments": rows, "summary": summary}
 
-def list_questions(supabase: Client, queue_id: str) -> List[str]:
-    subs = supabase.table("submissions").select("data").eq("queue_id", queue_id).execute()
+async def list_questions(supabase: AsyncClient, queue_id: str) -> List[str]:
+    subs = await supabase.table("submissions").select("data").eq("queue_id", queue_id).execute()
     questions = set()
     for sub in subs.data or []:
         try:
@@ -69,109 +76,290 @@ def list_questions(supabase: Client, queue_id: str) -> List[str]:
     result = sorted(list(questions))
     return result
 
-def enqueue_judge_jobs(queue_id: str, supabase: Client, settings: Settings) -> Dict[str, Optional[int]]:
-    assigns_resp = supabase.table("assignments").select("question_id, judge_id").eq("queue_id", queue_id).execute()
+async def enqueue_judge_jobs(
+    queue_id: str,
+    supabase: AsyncClient,
+    settings: Settings,
+    dedupe: bool = False,
+    dedupe_distance: Optional[int] = None,
+    delta: bool = False,
+    dry_run: bool = False,
+) -> Dict[str, Optional[int]]:
+    assigns_resp = await supabase.table("assignments").select("question_id, judge_id").eq("queue_id", queue_id).execute()
     assignments = assigns_resp.data or []
     if not assignments:
         print(f"[enqueue_judge_jobs] queue={queue_id} has no assignments; skipping job enqueue", flush=True)
         return {"message": "No assignments found for queue", "enqueued": 0}
 
-    total_enqueued = 0
-    jobs_batch: List[Dict[str, Any]] = []
-    offset = 0
-
-    while True:
-        subs_resp = (
-            supabase.table("submissions")
-            .select("id,data")
-            .eq("queue_id", queue_id)
-            .range(offset, offset + settings.run_judges_page - 1)
-            .execute()
-        )
-        rows = subs_resp.data or []
-        if not rows:
-            break
-
-        for row in rows:
-            sub_id = row["id"]
-            try:
-                sub_data = json.loads(row.get("data") or "{}")
-            except Exception:
-                continue
-            for assign in assignments:
-                qid = assign["question_id"]
-                if not _submission_contains_question(sub_data, qid):
-                    continue
-                job = _build_job(sub_id, sub_data, qid, str(assign["judge_id"]), queue_id)
-                jobs_batch.append(job)
-                if len(jobs_batch) >= settings.job_batch_size:
-                    flushed = _flush_jobs(supabase, jobs_batch)
-                    total_enqueued += flushed
-                    print(
-                        f"[enqueue_judge_jobs] queue={queue_id} flushed {flushed} jobs (running total={total_enqueued})",
-                        flush=True,
-                    )
-                    jobs_batch = []
-
-        offset += settings.run_judges_page
-
-    if jobs_batch:
-        flushed = _flush_jobs(supabase, jobs_batch)
-        total_enqueued += flushed
-        print(
-            f"[enqueue_judge_jobs] queue={queue_id} flushed final batch of {flushed} jobs (total={total_enqueued})",
-            flush=True,
-        )
+    judges_by_question: Dict[str, List[str]] = {}
+    for assign in assignments:
+        judges_by_question.setdefault(assign["question_id"], []).append(str(assign["judge_id"]))
+
+    fingerprints = await _judge_fingerprints(supabase, judges_by_question) if delta else None
+    flusher = _JobFlusher(supabase, queue_id, settings.job_batch_size, settings.enqueue_concurrency, fingerprints, dry_run)
+    dedupe_rows: List[Tuple[str, Dict[str, Optional[str]]]] = []
+    created_at = datetime.utcnow().isoformat()
+
+    try:
+        async with aclosing(
+            scan_pages(
+                supabase,
+                "submissions",
+                "id,data",
+                filters={"queue_id": queue_id},
+                page_size=settings.run_judges_page,
+                partitions=settings.scan_partitions,
+            )
+        ) as pages:
+            async for rows in pages:
+                for row in rows:
+                    sub_id = row["id"]
+                    try:
+                        sub_data = json.loads(row.get("data") or "{}")
+                    except Exception:
+                        continue
+                    question_ids = _question_ids(sub_data)
+                    if dedupe:
+                        answers = {qid: _answer_text(sub_data, qid) for qid in judges_by_question if qid in question_ids}
+                        if answers:
+                            dedupe_rows.append((sub_id, answers))
+                        continue
+                    for qid, judge_ids in judges_by_question.items():
+                        if qid not in question_ids:
+                            continue
+                        for judge_id in judge_ids:
+                            await flusher.add(_build_job(sub_id, qid, judge_id, queue_id, created_at))
+
+        propagated = 0
+        if dedupe:
+            max_distance = settings.dedupe_max_distance if dedupe_distance is None else dedupe_distance
+            # Partitions arrive in any order; leader clustering must see a stable one.
+            dedupe_rows.sort(key=lambda row: row[0])
+            for job in _plan_deduped_jobs(dedupe_rows, judges_by_question, queue_id, max_distance):
+                propagated += len(job.get("propagate_to") or [])
+                await flusher.add(job)
+            print(
+                f"[enqueue_judge_jobs] queue={queue_id} dedupe distance={max_distance} planned {flusher.planned} representative jobs covering {flusher.planned + propagated} evaluations",
+                flush=True,
+            )
 
+        await flusher.close()
+    finally:
+        flusher.cancel()
+
+    submissions_count, assignments_count = await asyncio.gather(
+        _count_records(supabase, "submissions", queue_id),
+        _count_records(supabase, "assignments", queue_id),
+    )
     print(
-        f"[enqueue_judge_jobs] queue={queue_id} summary — submissions={_count_records(supabase, 'submissions', queue_id)} assignments={len(assignments)} enqueued={total_enqueued}",
+        f"[enqueue_judge_jobs] queue={queue_id} summary — submissions={submissions_count} assignments={len(assignments)} planned={flusher.planned} enqueued={flusher.enqueued}",
         flush=True,
     )
 
-    return {
-        "message": "Jobs enqueued",
-        "enqueued": total_enqueued,
-        "expected_evaluations": total_enqueued,
-        "job_id": queue_id,
-        "submissions_count": _count_records(supabase, "submissions", queue_id),
-        "assignments_count": _count_records(supabase, "assignments", queue_id),
-    }
+    if dry_run:
+        return {
+            "message": "Dry run; no jobs enqueued",
+            "dry_run": True,
+            "delta": delta,
+            "enqueued": 0,
+            "planned": flusher.planned,
+            "would_enqueue": flusher.enqueued,
+            "job_id": queue_id,
+            "submissions_count": submissions_count,
+            "assignments_count": assignments_count,
+        }
 
-def _submission_contains_question(sub_data: Dict[str, Any], question_id: str) -> bool:
-    answers = sub_data.get("answers") or {}
-    if question_id in answers:
-        return True
+    if delta:
+        # Only the stale subset was (re)queued; the rest is current or already running.
+        result = {
+            "message": "Jobs enqueued",
+            "delta": True,
+            "enqueued": flusher.enqueued,
+            "planned": flusher.planned,
+            "up_to_date": flusher.planned - flusher.enqueued,
+            "expected_evaluations": flusher.enqueued,
+        }
+    else:
+        result = {
+            "message": "Jobs enqueued",
+            "enqueued": flusher.planned,
+            "inserted": flusher.enqueued,
+            "already_active": flusher.planned - flusher.enqueued,
+            "expected_evaluations": flusher.planned + propagated,
+        }
+    result.update(job_id=queue_id, submissions_count=submissions_count, assignments_count=assignments_count)
+    if dedupe:
+        result["propagated"] = propagated
+    return result
+
+async def _judge_fingerprints(supabase: AsyncClient, judges_by_question: Dict[str, List[str]]) -> Dict[str, str]:
+    # Probe now: a judge edited a moment ago in another process must not look current.
+    snapshot = await get_judge_registry().get(supabase, probe=True)
+    judge_ids = {judge_id for judge_ids in judges_by_question.values() for judge_id in judge_ids}
+    return {judge_id: snapshot.fingerprints[judge_id] for judge_id in sorted(judge_ids) if judge_id in snapshot.fingerprints}
+
+def _question_ids(sub_data: Dict[str, Any]) -> Set[str]:
+    question_ids = set(sub_data.get("answers") or {})
     for question in sub_data.get("questions", []):
         qdata = question.get("data") if isinstance(question, dict) else question
-        if isinstance(qdata, dict) and qdata.get("id") == question_id:
-            return True
-    return False
+        if isinstance(qdata, dict) and "id" in qdata:
+            question_ids.add(qdata["id"])
+    return question_ids
+
+def _answer_text(sub_data: Dict[str, Any], question_id: str) -> Optional[str]:
+    answer = (sub_data.get("answers") or {}).get(question_id)
+    if not answer:
+        return None
+    if isinstance(answer, dict):
+        return " ".join(str(value) for value in answer.values())
+    return str(answer)
 
-def _build_job(submission_id: str, submission_data: Dict[str, Any], question_id: str, judge_id: str, queue_id: str) -> Dict[str, Any]:
+def _cluster_answers(items: List[Tuple[str, int]], max_distance: int) -> List[List[str]]:
+    """Greedy leader clustering: each answer joins the first leader within `max_distance` bits."""
+    leaders = SimhashIndex(blocks=min(max_distance + 1, 64))
+    clusters: List[List[str]] = []
+    position: Dict[str, int] = {}
+    for sub_id, fingerprint in items:
+        matches = leaders.query(fingerprint, max_distance)
+        if matches:
+            first = min(position[leader_id] for leader_id, _ in matches)
+            clusters[first].append(sub_id)
+        else:
+            position[sub_id] = len(clusters)
+            leaders.add(sub_id, fingerprint)
+            clusters.append([sub_id])
+    return clusters
+
+def _plan_deduped_jobs(
+    rows: List[Tuple[str, Dict[str, Optional[str]]]],
+    judges_by_question: Dict[str, List[str]],
+    queue_id: str,
+    max_distance: int,
+) -> Iterator[Dict[str, Any]]:
+    for qid, judge_ids in judges_by_question.items():
+        answered: List[Tuple[str, str]] = []
+        singles: List[List[str]] = []
+        for sub_id, answers in rows:
+            if qid not in answers:
+                continue
+            text = answers[qid]
+            if text is None:
+                singles.append([sub_id])
+            else:
+                answered.append((sub_id, text))
+        hashes = simhash_many(text for _, text in answered)
+        fingerprints = [(sub_id, fingerprint) for (sub_id, _), fingerprint in zip(answered, hashes)]
+
+        for members in _cluster_answers(fingerprints, max_distance) + singles:
+            representative = members[0]
+            for judge_id in judge_ids:
+                job = _build_job(representative, qid, judge_id, queue_id)
+                if len(members) > 1:
+                    job["propagate_to"] = members[1:]
+                yield job
+
+JOB_ID_NAMESPACE = uuid.UUID("5b0e6f2c-8f1e-4c59-9d44-1c3f0b7a2e61")
+_JOB_ID_HASH = hashlib.sha1(JOB_ID_NAMESPACE.bytes)
+
+def job_id_for(submission_id: str, question_id: str, judge_id: str) -> str:
+    """Stable job id per (submission, question, judge), so re-runs hit the same row.
+
+    Equal to `uuid.uuid5(JOB_ID_NAMESPACE, ...)`, formatted directly from the digest.
+    """
+    digest = _JOB_ID_HASH.copy()
+    digest.update(f"{submission_id}\x1f{question_id}\x1f{judge_id}".encode("utf-8"))
+    h = digest.hexdigest()
+    variant = "89ab"[int(h[16], 16) & 0x3]
+    return f"{h[:8]}-{h[8:12]}-5{h[13:16]}-{variant}{h[17:20]}-{h[20:32]}"
+
+def _build_job(
+    submission_id: str, question_id: str, judge_id: str, queue_id: str, created_at: Optional[str] = None
+) -> Dict[str, Any]:
     return {
-        "id": str(uuid.uuid4()),
+        "id": job_id_for(submission_id, question_id, judge_id),
         "submission_id": submission_id,
-        "submission_data": submission_data,
         "question_id": question_id,
         "judge_id": judge_id,
         "queue_id": queue_id,
         "status": "pending",
         "attempts": 0,
-        "created_at": datetime.utcnow().isoformat(),
+        "created_at": created_at or datetime.utcnow().isoformat(),
     }
 
-def _flush_jobs(supabase: Client, jobs: List[Dict[str, Any]]) -> int:
+class _JobFlusher:
+    """Buffers planned jobs and writes them through `enqueue_judge_jobs` with several batches in flight."""
+
+    def __init__(
+        self,
+        supabase: AsyncClient,
+        queue_id: str,
+        batch_size: int,
+        concurrency: int,
+        fingerprints: Optional[Dict[str, str]] = None,
+        dry_run: bool = False,
+    ) -> None:
+        self.supabase = supabase
+        self.fingerprints = fingerprints
+        self.dry_run = dry_run
+        self.queue_id = queue_id
+        self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
+        self.batch: List[Dict[str, Any]] = []
+        self.in_flight: Set[asyncio.Task] = set()
+        self.planned = 0
+        self.enqueued = 0
+
+    async def add(self, job: Dict[str, Any]) -> None:
+        self.batch.append(job)
+        self.planned += 1
+        if len(self.batch) >= self.batch_size:
+            await self._send()
+
+    async def _send(self) -> None:
+        batch, self.batch = self.batch, []
+        while len(self.in_flight) >= self.concurrency:
+            await self._reap(asyncio.FIRST_COMPLETED)
+        self.in_flight.add(asyncio.create_task(_flush_jobs(self.supabase, batch, self.fingerprints, self.dry_run)))
+
+    async def _reap(self, return_when: str) -> None:
+        done, _ = await asyncio.wait(self.in_flight, return_when=return_when)
+        for task in done:
+            self.in_flight.discard(task)
+            self.enqueued += task.result()
+
+    async def close(self) -> None:
+        if self.batch:
+            await self._send()
+        if self.in_flight:
+            await self._reap(asyncio.ALL_COMPLETED)
+        verb = "would enqueue" if self.dry_run else "new or re-queued"
+        print(
+            f"[enqueue_judge_jobs] queue={self.queue_id} flushed {self.planned} planned jobs ({self.enqueued} {verb})",
+            flush=True,
+        )
+
+    def cancel(self) -> None:
+        for task in self.in_flight:
+            task.cancel()
+
+async def _flush_jobs(
+    supabase: AsyncClient,
+    jobs: List[Dict[str, Any]],
+    fingerprints: Optional[Dict[str, str]] = None,
+    dry_run: bool = False,
+) -> int:
     if not jobs:
         return 0
+    params = {"p_rows": jobs, "p_fingerprints": fingerprints, "p_dry_run": dry_run}
     try:
-        supabase.table("judge_jobs").insert(jobs).execute()
-        return len(jobs)
+        response = await supabase.rpc("enqueue_judge_jobs", params).execute()
+        return response.data or 0
     except Exception as exc:
         raise HTTPException(status_code=500, detail="Failed to enqueue jobs") from exc
 
-def _count_records(supabase: Client, table: str, queue_id: str) -> Optional[int]:
+async def _count_records(supabase: AsyncClient, table: str, queue_id: str) -> Optional[int]:
     try:
-        response = supabase.table(table).select("id", count="exact").eq("queue_id", queue_id).execute()
+        response = await supabase.table(table).select("id", count="exact").eq("queue_id", queue_id).execute()
         return response.count or 0
     except Exception:
         return None
\ No newline at end of file
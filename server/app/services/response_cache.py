@@ -0,0 +1,178 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Sequence, Tuple
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from supabase import AsyncClient
+
+CacheKey = Tuple[str, Tuple[Tuple[str, Any], ...]]
+
+class _Entry:
+    __slots__ = ("versions", "body", "etag", "stored_at")
+
+    def __init__(self, versions: Tuple[int, ...], body: bytes, etag: str) -> None:
+        self.versions = versions
+        self.body = body
+        self.etag = etag
+        self.stored_at = time.monotonic()
+
+class ResponseCache:
+    """LRU of serialised JSON responses keyed by endpoint and normalised parameters.
+
+    Each entry records the `queue_data_versions` of the scopes it depends on and is
+    served only while those versions are unchanged and it is younger than
+    `ttl_seconds`. Versions themselves are re-read at most every `version_ttl`
+    seconds, so polling dashboards cost one tiny query per interval. Concurrent
+    misses for the same key share one computation.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 300.0, version_ttl: float = 1.0) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version_ttl = version_ttl
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self._versions: Dict[str, Tuple[int, float]] = {}
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidated = 0
+        self.expired = 0
+        self.bypassed = 0
+
+    async def versions(self, supabase: AsyncClient, scopes: Sequence[str]) -> Tuple[int, ...]:
+        now = time.monotonic()
+        stale = [scope for scope in scopes if now - self._versions.get(scope, (0, float("-inf")))[1] > self.version_ttl]
+        if stale:
+            response = await supabase.table("queue_data_versions").select("scope, version").in_("scope", stale).execute()
+            found = {row["scope"]: int(row["version"]) for row in response.data or []}
+            for scope in stale:
+                self._versions[scope] = (found.get(scope, 0), now)
+        return tuple(self._versions[scope][0] for scope in scopes)
+
+    def _lookup(self, key: CacheKey, versions: Tuple[int, ...]) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.versions != versions:
+            self.invalidated += 1
+        elif time.monotonic() - entry.stored_at > self.ttl_seconds:
+            self.expired += 1
+        else:
+            self._entries.move_to_end(key)
+            return entry
+        del self._entries[key]
+        return None
+
+    def _store(self, key: CacheKey, entry: _Entry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_compute(
+        self,
+        supabase: AsyncClient,
+        key: CacheKey,
+        scopes: Sequence[str],
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Tuple[bytes, str]:
+        try:
+            versions = await self.versions(supabase, scopes)
+        except Exception:  # noqa: BLE001
+            # Without versions we can't tell whether an entry is current.
+            logging.exception("Reading queue_data_versions failed; serving uncached response")
+            self.bypassed += 1
+            body = _encode(await compute())
+            return body, _etag(body)
+
+        entry = self._lookup(key, versions)
+        if entry is not None:
+            self.hits += 1
+            return entry.body, entry.etag
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.hits += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            body = _encode(await compute())
+            result = (body, _etag(body))
+            self._store(key, _Entry(versions, *result))
+            future.set_result(result)
+            return result
+        except BaseException as exc:
+            if isinstance(exc, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(exc)
+                future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "invalidated": self.invalidated,
+            "expired": self.expired,
+            "bypassed": self.bypassed,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+def _encode(payload: Any) -> bytes:
+    return json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode("utf-8")
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+_response_cache: Optional[ResponseCache] = None
+
+def get_response_cache() -> ResponseCache:
+    global _response_cache
+    if _response_cache is None:
+        from app.core.config import get_settings
+
+        settings = get_settings()
+        _response_cache = ResponseCache(
+            settings.response_cache_entries,
+            settings.response_cache_ttl,
+            settings.response_cache_version_ttl,
+        )
+    return _response_cache
+
+async def cached_json_response(
+    request: Request,
+    supabase: AsyncClient,
+    endpoint: str,
+    params: Dict[str, Any],
+    scopes: Iterable[str],
+    compute: Callable[[], Awaitable[Any]],
+) -> Response:
+    """Serve `compute()` through the response cache, answering `If-None-Match` with a 304."""
+    cache = get_response_cache()
+    key: CacheKey = (endpoint, tuple(sorted(params.items())))
+    body, etag = await cache.get_or_compute(supabase, key, list(scopes), compute)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
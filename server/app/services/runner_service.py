@@ -1,54 +1,87 @@
+import logging
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
-from supabase import Client
-from app.services.judge_service import run_single_judge, PROMPT_TEMPLATE, _extract_question, _parse_verdict
-from ..core.dedalus_client import DedalusClient
-from app.services.fingerprint_service import simhash
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+from supabase import AsyncClient
+from app.services.judge_service import run_batched_judge, run_single_judge, judge_fingerprint, PROMPT_TEMPLATE, _extract_question, _parse_verdict
+from app.services.fingerprint_service import simhash_many
+from app.services.job_service import update_leased_job, update_leased_jobs
+from app.services.provider_limiter import ProviderLimiter, estimate_tokens
+from app.services.verdict_cache import VerdictCache, judge_allows_cache, verdict_cache_key
+
+if TYPE_CHECKING:
+    from app.services.write_behind import WriteBehindBuffer
+
+async def _run_dedalus_judge(
+    job: Dict[str, Any],
+    judge: Dict[str, Any],
+    cache: Optional[VerdictCache] = None,
+    limiter: Optional[ProviderLimiter] = None,
+) -> Optional[Dict[str, Any]]:
+    submission_data = job.get("submission_data") or {}
+    question = _extract_question(submission_data, job.get("question_id"))
+    if not question:
+        return None
+    answer = submission_data.get("answers", {}).get(job.get("question_id"))
+    if not answer:
+        return None
+    answer_text = ' '.join(str(value) for value in answer.values())
+    question_text = question.get('questionText') or question.get('question_text') or question.get('text') or str(question)
+    prompt = PROMPT_TEMPLATE.format(
+        system_prompt=judge.get('system_prompt', ''),
+        question_text=question_text,
+        answer_text=answer_text,
+    )
+
+    async def _judge() -> Optional[tuple[str, str]]:
+        # The Dedalus SDK is only needed by Dedalus judges.
+        from app.core.dedalus_client import get_dedalus_client
+
+        dedalus = get_dedalus_client()
+        if limiter is not None:
+            async with limiter.slot(estimate_tokens(prompt)):
+                response = await dedalus.run_agent(input_text=prompt, model=judge.get('model'))
+        else:
+            response = await dedalus.run_agent(input_text=prompt, model=judge.get('model'))
+        if response is None:
+            return None
+        raw = getattr(response, 'final_output', None) or getattr(response, 'output', None) or str(response)
+        if not raw:
+            return None
+        verdict, reasoning = _parse_verdict(raw)
+        return verdict, reasoning[:1000]
+
+    if cache is not None and judge_allows_cache(judge):
+        key = verdict_cache_key("dedalus", judge.get('model'), judge.get('system_prompt', ''), question_text, answer_text)
+        result = await cache.get_or_compute(key, _judge, "dedalus", judge.get('model'))
+    else:
+        result = await _judge()
+    if not result:
+        return None
+    verdict, reasoning = result
+    return {
+        'submission_id': job['submission_id'],
+        'question_id': job['question_id'],
+        'judge_id': str(job['judge_id']),
+        'verdict': verdict,
+        'reasoning': reasoning,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+    }
 
 async def run_ai_judge_job(
     job: Dict[str, Any],
     judges_map: Dict[str, Dict[str, Any]],
-    supabase: Client,
+    supabase: AsyncClient,
     provider_clients: Dict[str, Any],
+    reraise: Optional[Callable[[Exception], bool]] = None,
+    writer: Optional["WriteBehindBuffer"] = None,
+    cache: Optional[VerdictCache] = None,
+    limiter: Optional[ProviderLimiter] = None,
 ):
-    job_id = job["id"]
     try:
         judge = judges_map.get(str(job.get("judge_id"))) if judges_map else None
         evaluation = None
         if judge and (str(judge.get("provider", "")).lower() == "dedalus" or judge.get("use_dedalus")):
-            submission_data = job.get("submission_data") or {}
-            question = _extract_question(submission_data, job.get("question_id"))
-            if question:
-                answer = submission_data.get("answers", {}).get(job.get("question_id"))
-                if answer:
-                    answer_text = ' '.join(str(value) for value in answer.values())
-                    prompt = PROMPT_TEMPLATE.format(
-                        system_prompt=judge.get('system_prompt', ''),
-                        question_text=question.get('questionText') or question.get('question_text') or question.get('text') or str(question),
-                        answer_text=answer_text,
-                    )
-                    dedalus = DedalusClient()
-                    try:
-                        response = await dedalus.run_agent(input_text=prompt, model=judge.get('model'))
-                        raw = None
-                        if response is None:
-                            raw = None
-                        else:
-                            raw = getattr(response, 'final_output', None) or getattr(response, 'output', None) or str(response)
-                        if raw:
-                            verdict, reasoning = _parse_verdict(raw)
-                            reasoning = reasoning[:1000]
-                            evaluation = {
-                                'submission_id': job['submission_id'],
-                                'question_id': job['question_id'],
-                                'judge_id': str(job['judge_id']),
-                                'verdict': verdict,
-                                'reasoning': reasoning,
-                                'reasoning_simhash': simhash(reasoning),
-                                'created_at': datetime.now(timezone.utc).isoformat(),
-                            }
-                    except Exception as exc:
-                        raise
+            evaluation = await _run_dedalus_judge(job, judge, cache, limiter)
         else:
             evaluation = await run_single_judge(
                 submission_id=job["submission_id"],
@@ -57,79 +90,111 @@ async def run_ai_judge_job(
                 judge_id=str(job["judge_id"]),
                 provider_clients=provider_clients,
                 judges=judges_map,
+                cache=cache,
+                limiter=limiter,
             )
-        if evaluation:
-            evaluation.setdefault("queue_id", job.get("queue_id"))
-            _upsert_evaluation(supabase, evaluation)
-        supabase.table("judge_jobs").update(
-            {"status": "done", "updated_at": datetime.now(timezone.utc).isoformat()}
-        ).eq("id", job_id).execute()
+        evaluations = _job_evaluations(job, judge, evaluation)
+        if writer is not None:
+            for payload in evaluations:
+                writer.add_evaluation(payload)
+            writer.mark_done(job)
+            return
+        await _upsert_evaluations(supabase, evaluations)
+        await update_leased_job(supabase, job, {"status": "done"})
     except Exception as exc:
-        _mark_job_failed(supabase, job, exc)
-
-def _fetch_existing_evaluation(supabase: Client, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    response = (
-        supabase.table("evaluations")
-        .select("id, verdict, reasoning, reasoning_simhash, queue_id, created_at")
-        .eq("submission_id", payload["submission_id"])
-        .eq("question_id", payload["question_id"])
-        .eq("judge_id", payload["judge_id"])
-        .limit(1)
-        .execute()
-    )
-    data = getattr(response, "data", None) or []
-    return data[0] if data else None
+        if reraise and reraise(exc):
+            raise
+        if writer is not None:
+            writer.mark_failed(job, exc)
+            return
+        await _mark_job_failed(supabase, job, exc)
 
+async def run_ai_judge_batch(
+    jobs: List[Dict[str, Any]],
+    judges_map: Dict[str, Dict[str, Any]],
+    supabase: AsyncClient,
+    provider_clients: Dict[str, Any],
+    reraise: Optional[Callable[[Exception], bool]] = None,
+    writer: Optional["WriteBehindBuffer"] = None,
+    cache: Optional[VerdictCache] = None,
+    limiter: Optional[ProviderLimiter] = None,
+) -> List[Dict[str, Any]]:
+    """Run jobs that share a submission and a `batchQuestions` judge through one prompt.
 
-def _upsert_evaluation(supabase: Client, payload: Dict[str, Any]) -> None:
-    identity = {
-        "submission_id": payload["submission_id"],
-        "question_id": payload["question_id"],
-        "judge_id": payload["judge_id"],
-    }
-
-    existing = _fetch_existing_evaluation(supabase, identity)
-    timestamp = datetime.now(timezone.utc).isoformat()
+    Jobs that got a verdict are written and marked done. The rest are returned
+    untouched for the caller to run one at a time through `run_ai_judge_job`:
+    questions the reply left out or got wrong, or every job if the batched call
+    itself failed.
+    """
+    first = jobs[0]
+    judge = judges_map.get(str(first.get("judge_id"))) if judges_map else None
+    try:
+        results = await run_batched_judge(
+            submission_id=first["submission_id"],
+            submission_data=first.get("submission_data") or {},
+            question_ids=[job["question_id"] for job in jobs],
+            judge_id=str(first["judge_id"]),
+            provider_clients=provider_clients,
+            judges=judges_map,
+            cache=cache,
+            limiter=limiter,
+        )
+    except Exception as exc:
+        if reraise and reraise(exc):
+            raise
+        logging.warning("Batched judge call failed for submission %s; judging its questions one at a time", first["submission_id"], exc_info=True)
+        return jobs
 
-    if not existing:
-        insert_payload: Dict[str, Any] = {**payload, **identity}
-        insert_payload.setdefault("created_at", timestamp)
-        if payload.get("queue_id") is not None:
-            insert_payload["queue_id"] = payload["queue_id"]
-        supabase.table("evaluations").upsert(
-            insert_payload,
-            on_conflict="submission_id,question_id,judge_id",
-        ).execute()
-        return
+    answered = [job for job in jobs if job["question_id"] in results]
+    leftover = [job for job in jobs if job["question_id"] not in results]
+    evaluations = [payload for job in answered for payload in _job_evaluations(job, judge, dict(results[job["question_id"]]))]
+    if writer is not None:
+        for payload in evaluations:
+            writer.add_evaluation(payload)
+        for job in answered:
+            writer.mark_done(job)
+        return leftover
+    try:
+        await _upsert_evaluations(supabase, evaluations)
+        await update_leased_jobs(supabase, answered, {"status": "done"})
+    except Exception as exc:
+        for job in answered:
+            await _mark_job_failed(supabase, job, exc)
+    return leftover
 
-    tracked_fields = ("verdict", "reasoning", "reasoning_simhash")
-    changes: Dict[str, Any] = {
-        field: payload[field]
-        for field in tracked_fields
-        if field in payload and payload[field] != existing.get(field)
-    }
+def _job_evaluations(job: Dict[str, Any], judge: Optional[Dict[str, Any]], evaluation: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The rows a finished job writes: its evaluation plus any propagated copies."""
+    if not evaluation:
+        return []
+    evaluation.setdefault("queue_id", job.get("queue_id"))
+    if judge:
+        evaluation.setdefault("judge_fingerprint", judge_fingerprint(judge))
+    return [evaluation, *_propagated_evaluations(job, evaluation)]
 
-    queue_id = payload.get("queue_id")
-    if queue_id and queue_id != existing.get("queue_id"):
-        changes["queue_id"] = queue_id
+def _propagated_evaluations(job: Dict[str, Any], evaluation: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Copies of a representative's verdict for the near-duplicate submissions it stands for."""
+    return [
+        {**evaluation, "submission_id": member_id, "propagated_from": job["submission_id"]}
+        for member_id in job.get("propagate_to") or []
+    ]
 
-    if not changes:
-        return
+async def _upsert_evaluations(supabase: AsyncClient, payloads: List[Dict[str, Any]]) -> int:
+    """Upsert evaluations in one round trip; unchanged rows are skipped server-side.
 
-    update_payload: Dict[str, Any] = {**identity, **changes, "updated_at": timestamp}
-    supabase.table("evaluations").upsert(
-        update_payload,
-        on_conflict="submission_id,question_id,judge_id",
-    ).execute()
+    Reasoning fingerprints are filled in here, in one `simhash_many` pass per batch.
+    """
+    if not payloads:
+        return 0
+    missing = [payload for payload in payloads if "reasoning_simhash" not in payload]
+    for payload, fingerprint in zip(missing, simhash_many(payload.get("reasoning") or "" for payload in missing)):
+        payload["reasoning_simhash"] = fingerprint
+    response = await supabase.rpc("upsert_evaluations", {"p_rows": payloads}).execute()
+    return response.data or 0
 
-def _mark_job_failed(supabase: Client, job: Dict[str, Any], exc: Exception):
+def _failure_fields(job: Dict[str, Any], exc: Exception) -> Dict[str, Any]:
     attempts = (job.get("attempts") or 0) + 1
     status = "failed" if attempts >= 3 else "pending"
-    supabase.table("judge_jobs").update(
-        {
-            "status": status,
-            "attempts": attempts,
-            "last_error": str(exc),
-            "updated_at": datetime.now(timezone.utc).isoformat(),
-        }
-    ).eq("id", job["id"]).execute()
\ No newline at end of file
+    return {"status": status, "attempts": attempts, "last_error": str(exc)}
+
+async def _mark_job_failed(supabase: AsyncClient, job: Dict[str, Any], exc: Exception):
+    await update_leased_job(supabase, job, _failure_fields(job, exc))
@@ -0,0 +1,198 @@
+import asyncio
+from contextlib import aclosing
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+from supabase import AsyncClient
+
+Bound = Union[datetime, int, float, str]
+Page = List[Dict[str, Any]]
+
+_DONE = object()
+
+def quote_filter_value(value: Any) -> str:
+    # PostgREST logic trees reserve `,.:()`, all of which appear in timestamps.
+    text = value.isoformat() if isinstance(value, datetime) else str(value)
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+def _filter_value(value: Bound) -> str:
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+def _sortable(value: Bound) -> Union[datetime, int, float]:
+    if isinstance(value, str):
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    else:
+        parsed = value
+    if isinstance(parsed, datetime) and parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+def _with_columns(columns: str, required: Tuple[str, ...]) -> str:
+    selected = [column.strip() for column in columns.split(",") if column.strip()]
+    if "*" not in selected:
+        selected.extend(column for column in required if column not in selected)
+    return ",".join(selected)
+
+def _apply_filters(query: Any, filters: Dict[str, Any]) -> Any:
+    for key, value in filters.items():
+        query = query.in_(key, list(value)) if isinstance(value, (list, tuple, set)) else query.eq(key, value)
+    return query
+
+class _Range:
+    __slots__ = ("lower", "upper", "upper_inclusive")
+
+    def __init__(self, lower: Optional[Bound], upper: Optional[Bound], upper_inclusive: bool) -> None:
+        self.lower = lower
+        self.upper = upper
+        self.upper_inclusive = upper_inclusive
+
+def _split_range(lower: Bound, upper: Bound, upper_inclusive: bool, partitions: int) -> List[_Range]:
+    """Split `[lower, upper]` into contiguous half-open spans; only the last keeps the original upper bound."""
+    low, high = _sortable(lower), _sortable(upper)
+    if partitions <= 1 or not low < high:
+        return [_Range(lower, upper, upper_inclusive)]
+    step = (high - low) / partitions
+    if isinstance(low, int) and isinstance(high, int):
+        step = max(1, int(step))
+    edges: List[Bound] = [low]
+    for index in range(1, partitions):
+        edge = low + step * index
+        if not edge < high:
+            break
+        edges.append(edge)
+    ranges = [_Range(edges[i], edges[i + 1], False) for i in range(len(edges) - 1)]
+    ranges.append(_Range(edges[-1], upper, upper_inclusive))
+    return ranges
+
+async def _column_edge(supabase: AsyncClient, table: str, column: str, filters: Dict[str, Any], desc: bool) -> Optional[Bound]:
+    query = _apply_filters(supabase.table(table).select(column), filters)
+    response = await query.order(column, desc=desc).limit(1).execute()
+    rows = response.data or []
+    return rows[0].get(column) if rows else None
+
+async def _keyset_pages(
+    supabase: AsyncClient,
+    table: str,
+    columns: str,
+    filters: Dict[str, Any],
+    span: _Range,
+    order_column: str,
+    page_size: int,
+) -> AsyncIterator[Page]:
+    cursor: Optional[Tuple[Any, Any]] = None
+    while True:
+        query = _apply_filters(supabase.table(table).select(columns), filters)
+        if span.lower is not None:
+            query = query.gte(order_column, _filter_value(span.lower))
+        if span.upper is not None:
+            query = query.lte(order_column, _filter_value(span.upper)) if span.upper_inclusive else query.lt(order_column, _filter_value(span.upper))
+        if cursor is not None:
+            value, last_id = quote_filter_value(cursor[0]), quote_filter_value(cursor[1])
+            query = query.or_(f"{order_column}.gt.{value},and({order_column}.eq.{value},id.gt.{last_id})")
+        response = await query.order(order_column).order("id").limit(page_size).execute()
+        rows = response.data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        cursor = (rows[-1][order_column], rows[-1]["id"])
+
+async def scan_pages(
+    supabase: AsyncClient,
+    table: str,
+    columns: str,
+    filters: Optional[Dict[str, Any]] = None,
+    start: Optional[Bound] = None,
+    end: Optional[Bound] = None,
+    before: Optional[Bound] = None,
+    order_column: str = "created_at",
+    page_size: int = 1000,
+    partitions: int = 1,
+) -> AsyncIterator[Page]:
+    """Stream `table` in pages ordered by `(order_column, id)` using keyset cursors.
+
+    `filters` are equality matches (lists become `in` filters); `start`/`end` are
+    inclusive bounds on `order_column` and `before` an exclusive one.
+    Each page is fetched with a `(order_column, id) > cursor` filter, so every request
+    costs the same regardless of how deep the scan is. With `partitions > 1` the range
+    is split into equal spans scanned concurrently; pages are then yielded as they
+    arrive and are only ordered within a span. `order_column` must be non-null, and the
+    selected columns always include it and `id`. Callers that may stop early should wrap
+    the generator in `contextlib.aclosing` so in-flight fetches are cancelled promptly.
+    """
+    filters = filters or {}
+    columns = _with_columns(columns, (order_column, "id"))
+    upper = before if before is not None else end
+    upper_inclusive = before is None
+
+    if partitions > 1:
+        lower = start
+        if lower is None:
+            lower = await _column_edge(supabase, table, order_column, filters, desc=False)
+        if upper is None:
+            upper = await _column_edge(supabase, table, order_column, filters, desc=True)
+            upper_inclusive = True
+        if lower is None or upper is None:
+            return
+        spans = _split_range(lower, upper, upper_inclusive, partitions)
+    else:
+        spans = [_Range(start, upper, upper_inclusive)]
+
+    if len(spans) == 1:
+        span = spans[0]
+        async with aclosing(_prefetched(_keyset_pages(supabase, table, columns, filters, span, order_column, page_size))) as pages:
+            async for page in pages:
+                yield page
+        return
+
+    # One producer per span feeds a bounded queue, so at most a couple of pages per span are buffered.
+    pages: asyncio.Queue = asyncio.Queue(maxsize=len(spans) * 2)
+
+    async def produce(span: _Range) -> None:
+        try:
+            async for page in _keyset_pages(supabase, table, columns, filters, span, order_column, page_size):
+                await pages.put(page)
+        except Exception as exc:  # noqa: BLE001
+            await pages.put(exc)
+        await pages.put(_DONE)
+
+    producers = [asyncio.create_task(produce(span)) for span in spans]
+    try:
+        remaining = len(producers)
+        while remaining:
+            item = await pages.get()
+            if item is _DONE:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        for task in producers:
+            task.cancel()
+        await asyncio.gather(*producers, return_exceptions=True)
+
+async def _prefetched(pages: AsyncIterator[Page]) -> AsyncIterator[Page]:
+    """Fetch the next page while the caller works on the current one."""
+    iterator = pages.__aiter__()
+    next_page: Optional[asyncio.Task] = asyncio.ensure_future(iterator.__anext__())
+    try:
+        while next_page is not None:
+            try:
+                page = await next_page
+            except StopAsyncIteration:
+                next_page = None
+                return
+            next_page = asyncio.ensure_future(iterator.__anext__())
+            yield page
+    finally:
+        if next_page is not None:
+            next_page.cancel()
+            await asyncio.gather(next_page, return_exceptions=True)
+        await iterator.aclose()
+
+async def scan_rows(supabase: AsyncClient, table: str, columns: str, **kwargs: Any) -> AsyncIterator[Dict[str, Any]]:
+    """Row-at-a-time view over `scan_pages`."""
+    async with aclosing(scan_pages(supabase, table, columns, **kwargs)) as pages:
+        async for page in pages:
+            for row in page:
+                yield row
@@ -0,0 +1,257 @@
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from supabase import AsyncClient
+from app.services.scan_service import quote_filter_value
+
+class SimhashIndex:
+    """Multi-index hashing over 64-bit simhashes.
+
+    The hash is split into `blocks` contiguous bit ranges, each with an exact-match
+    table. By pigeonhole, two hashes within `blocks - 1` bits agree on at least one
+    block, so queries with `k < blocks` only compare against items sharing a block
+    value. Larger `k` falls back to a linear scan.
+    """
+
+    def __init__(self, blocks: int = 4, bits: int = 64) -> None:
+        if not 0 < blocks <= bits:
+            raise ValueError("blocks must be between 1 and bits")
+        self.bits = bits
+        self.blocks = blocks
+        self._mask = (1 << bits) - 1
+        base, extra = divmod(bits, blocks)
+        self._ranges: List[Tuple[int, int]] = []
+        shift = 0
+        for block in range(blocks):
+            width = base + (1 if block < extra else 0)
+            self._ranges.append((shift, (1 << width) - 1))
+            shift += width
+        self._tables: List[Dict[int, Set[str]]] = [{} for _ in range(blocks)]
+        self._hashes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._hashes
+
+    def _keys(self, unsigned: int) -> List[int]:
+        return [(unsigned >> shift) & mask for shift, mask in self._ranges]
+
+    def get(self, item_id: str) -> Optional[int]:
+        return self._hashes.get(item_id)
+
+    def add(self, item_id: str, fingerprint: int) -> None:
+        unsigned = fingerprint & self._mask
+        previous = self._hashes.get(item_id)
+        if previous == unsigned:
+            return
+        if previous is not None:
+            self.remove(item_id)
+        self._hashes[item_id] = unsigned
+        for table, key in zip(self._tables, self._keys(unsigned)):
+            table.setdefault(key, set()).add(item_id)
+
+    def add_many(self, items: Iterable[Tuple[str, Optional[int]]]) -> None:
+        for item_id, fingerprint in items:
+            if fingerprint is not None:
+                self.add(item_id, fingerprint)
+
+    def remove(self, item_id: str) -> None:
+        unsigned = self._hashes.pop(item_id, None)
+        if unsigned is None:
+            return
+        for table, key in zip(self._tables, self._keys(unsigned)):
+            bucket = table.get(key)
+            if bucket is not None:
+                bucket.discard(item_id)
+                if not bucket:
+                    del table[key]
+
+    def query(self, fingerprint: int, k: int) -> List[Tuple[str, int]]:
+        """All indexed items within `k` bits of `fingerprint`, nearest first."""
+        unsigned = fingerprint & self._mask
+        if k >= self.blocks:
+            candidates: Iterable[str] = self._hashes.keys()
+        else:
+            found: Set[str] = set()
+            for table, key in zip(self._tables, self._keys(unsigned)):
+                found.update(table.get(key, ()))
+            candidates = found
+        matches = []
+        for item_id in candidates:
+            distance = (self._hashes[item_id] ^ unsigned).bit_count()
+            if distance <= k:
+                matches.append((item_id, distance))
+        matches.sort(key=lambda match: (match[1], match[0]))
+        return matches
+
+    def clusters(self, k: int, min_size: int = 2) -> List[List[str]]:
+        """Connected components of the "within k bits" graph, largest first."""
+        parent: Dict[str, str] = {}
+
+        def find(item_id: str) -> str:
+            root = item_id
+            while parent.get(root, root) != root:
+                root = parent[root]
+            while parent.get(item_id, item_id) != root:
+                parent[item_id], item_id = root, parent[item_id]
+            return root
+
+        for item_id, unsigned in self._hashes.items():
+            for other_id, _ in self.query(unsigned, k):
+                if other_id != item_id:
+                    a, b = find(item_id), find(other_id)
+                    if a != b:
+                        parent[max(a, b)] = min(a, b)
+
+        groups: Dict[str, List[str]] = {}
+        for item_id in self._hashes:
+            groups.setdefault(find(item_id), []).append(item_id)
+        result = [sorted(members) for members in groups.values() if len(members) >= min_size]
+        result.sort(key=lambda members: (-len(members), members[0]))
+        return result
+
+INDEX_SOURCES: Dict[str, Tuple[str, str]] = {
+    "submissions": ("submissions", "answer_simhash"),
+    "evaluations": ("evaluations", "reasoning_simhash"),
+}
+
+class _IndexEntry:
+    def __init__(self, index: SimhashIndex) -> None:
+        self.index = index
+        self.loaded_at = 0.0
+        self.watermark: Optional[str] = None
+        self.lock = asyncio.Lock()
+
+class SimhashIndexRegistry:
+    """Per-(kind, queue) indexes, loaded on first use and kept current incrementally.
+
+    Uploads handled by this process are added directly; evaluations written by the
+    worker are picked up by a `created_at`/`updated_at` watermark refresh, and every
+    index is rebuilt from scratch once it is older than `ttl_seconds`.
+    """
+
+    def __init__(self, blocks: int = 4, ttl_seconds: float = 300.0, refresh_seconds: float = 5.0, page_size: int = 1000) -> None:
+        self.blocks = blocks
+        self.ttl_seconds = ttl_seconds
+        self.refresh_seconds = refresh_seconds
+        self.page_size = page_size
+        self._entries: Dict[Tuple[str, str], _IndexEntry] = {}
+
+    async def get(self, supabase: AsyncClient, kind: str, queue_id: str) -> SimhashIndex:
+        if kind not in INDEX_SOURCES:
+            raise ValueError(f"Unknown index kind '{kind}'")
+        key = (kind, queue_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _IndexEntry(SimhashIndex(self.blocks))
+        async with entry.lock:
+            age = time.monotonic() - entry.loaded_at
+            if not entry.loaded_at or age > self.ttl_seconds:
+                await self._load(supabase, kind, queue_id, entry)
+            elif kind == "evaluations" and age > self.refresh_seconds:
+                await self._refresh(supabase, queue_id, entry)
+        return entry.index
+
+    def add(self, kind: str, queue_id: str, items: Iterable[Tuple[str, Optional[int]]]) -> None:
+        """Apply writes made by this process to an already-loaded index."""
+        entry = self._entries.get((kind, queue_id))
+        if entry is not None and entry.loaded_at:
+            entry.index.add_many(items)
+
+    async def _load(self, supabase: AsyncClient, kind: str, queue_id: str, entry: _IndexEntry) -> None:
+        table, column = INDEX_SOURCES[kind]
+        index = SimhashIndex(self.blocks)
+        watermark: Optional[str] = None
+        last_id: Optional[str] = None
+        columns = f"id, {column}" + (", created_at, updated_at" if kind == "evaluations" else "")
+        while True:
+            query = supabase.table(table).select(columns).eq("queue_id", queue_id).order("id").limit(self.page_size)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            response = await query.execute()
+            rows = response.data or []
+            for row in rows:
+                index.add_many([(str(row["id"]), row.get(column))])
+                if kind == "evaluations":
+                    watermark = max(filter(None, (watermark, row.get("created_at"), row.get("updated_at"))), default=None)
+            if len(rows) < self.page_size:
+                break
+            last_id = rows[-1]["id"]
+        entry.index = index
+        entry.watermark = watermark
+        entry.loaded_at = time.monotonic()
+
+    async def _refresh(self, supabase: AsyncClient, queue_id: str, entry: _IndexEntry) -> None:
+        """Apply evaluations created or updated since the watermark.
+
+        Each timestamp column is walked with its own `(column, id)` keyset so no change
+        is lost to the server's row cap; the watermark only moves once both walks finish.
+        """
+        if entry.watermark is None:
+            entry.loaded_at = 0.0
+            return
+        watermark = entry.watermark
+        for column in ("created_at", "updated_at"):
+            after = f"{column}.gt.{quote_filter_value(entry.watermark)}"
+            while True:
+                response = await (
+                    supabase.table("evaluations")
+                    .select("id, reasoning_simhash, created_at, updated_at")
+                    .eq("queue_id", queue_id)
+                    .or_(after)
+                    .order(column)
+                    .order("id")
+                    .limit(self.page_size)
+                    .execute()
+                )
+                rows = response.data or []
+                for row in rows:
+                    entry.index.add_many([(str(row["id"]), row.get("reasoning_simhash"))])
+                    watermark = max(filter(None, (watermark, row.get("created_at"), row.get("updated_at"))))
+                if len(rows) < self.page_size:
+                    break
+                value, last_id = quote_filter_value(rows[-1][column]), quote_filter_value(rows[-1]["id"])
+                after = f"{column}.gt.{value},and({column}.eq.{value},id.gt.{last_id})"
+        entry.watermark = watermark
+
+_registry: Optional[SimhashIndexRegistry] = None
+
+def get_simhash_registry() -> SimhashIndexRegistry:
+    global _registry
+    if _registry is None:
+        from app.core.config import get_settings
+
+        settings = get_settings()
+        _registry = SimhashIndexRegistry(settings.similarity_blocks, settings.similarity_index_ttl)
+    return _registry
+
+async def find_similar(supabase: AsyncClient, kind: str, item_id: str, k: int) -> Dict[str, Any]:
+    table, column = INDEX_SOURCES[kind]
+    response = await supabase.table(table).select(f"id, queue_id, {column}").eq("id", item_id).limit(1).execute()
+    rows = response.data or []
+    if not rows:
+        raise LookupError(f"{kind[:-1].capitalize()} '{item_id}' not found")
+    row = rows[0]
+    fingerprint = row.get(column)
+    if fingerprint is None or not row.get("queue_id"):
+        return {"id": item_id, "queue_id": row.get("queue_id"), "k": k, "matches": []}
+    index = await get_simhash_registry().get(supabase, kind, row["queue_id"])
+    matches = [
+        {"id": match_id, "distance": distance}
+        for match_id, distance in index.query(fingerprint, k)
+        if match_id != str(item_id)
+    ]
+    return {"id": item_id, "queue_id": row["queue_id"], "k": k, "matches": matches}
+
+async def find_clusters(supabase: AsyncClient, kind: str, queue_id: str, k: int, min_size: int = 2) -> Dict[str, Any]:
+    index = await get_simhash_registry().get(supabase, kind, queue_id)
+    clusters = index.clusters(k, min_size)
+    return {
+        "queue_id": queue_id,
+        "kind": kind,
+        "k": k,
+        "indexed": len(index),
+        "clusters": [{"size": len(members), "ids": members} for members in clusters],
+    }
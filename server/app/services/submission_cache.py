@@ -0,0 +1,94 @@
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List
+from supabase import AsyncClient
+
+SubmissionData = Dict[str, Any]
+
+class MissingSubmissionError(LookupError):
+    """A job points at a submission that no longer exists."""
+
+def require_submission(job: Dict[str, Any]) -> None:
+    """Raise unless `attach` found the job's submission."""
+    if job.get("submission_data") is None:
+        raise MissingSubmissionError(f"Submission {job.get('submission_id')} not found")
+
+def _parse_data(raw: Any) -> SubmissionData:
+    if isinstance(raw, dict):
+        return raw
+    try:
+        data = json.loads(raw or "{}")
+    except (TypeError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+class SubmissionCache:
+    """Bounded LRU of parsed submission data, filled with one bulk fetch per claimed batch.
+
+    Jobs only carry `submission_id`; `attach` sets an in-memory `submission_data` on each
+    job so the runner can build prompts. Jobs enqueued before normalisation already carry
+    a copy, which is used as-is. Jobs whose submission is gone are left without one, and
+    `require_submission` turns that into an error the job is failed with.
+    """
+
+    def __init__(self, supabase: AsyncClient, max_entries: int = 5000, fetch_chunk: int = 200) -> None:
+        self.supabase = supabase
+        self.max_entries = max_entries
+        self.fetch_chunk = fetch_chunk
+        self._entries: "OrderedDict[str, SubmissionData]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, submission_id: str) -> Any:
+        data = self._entries.get(submission_id)
+        if data is not None:
+            self._entries.move_to_end(submission_id)
+        return data
+
+    def _put(self, submission_id: str, data: SubmissionData) -> None:
+        self._entries[submission_id] = data
+        self._entries.move_to_end(submission_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _fetch(self, submission_ids: List[str]) -> Dict[str, SubmissionData]:
+        found: Dict[str, SubmissionData] = {}
+        for start in range(0, len(submission_ids), self.fetch_chunk):
+            chunk = submission_ids[start:start + self.fetch_chunk]
+            response = await self.supabase.table("submissions").select("id, data").in_("id", chunk).execute()
+            for row in response.data or []:
+                found[str(row["id"])] = _parse_data(row.get("data"))
+        return found
+
+    async def attach(self, jobs: Iterable[Dict[str, Any]]) -> None:
+        pending: List[Dict[str, Any]] = []
+        for job in jobs:
+            if job.get("submission_data"):
+                continue
+            data = self._get(str(job["submission_id"]))
+            if data is not None:
+                self.hits += 1
+                job["submission_data"] = data
+            else:
+                pending.append(job)
+        if not pending:
+            return
+
+        missing = sorted({str(job["submission_id"]) for job in pending})
+        self.misses += len(missing)
+        fetched = await self._fetch(missing)
+        for submission_id, data in fetched.items():
+            self._put(submission_id, data)
+        for job in pending:
+            data = fetched.get(str(job["submission_id"]))
+            if data is not None:
+                job["submission_data"] = data
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,272 @@
+import asyncio
+import codecs
+import json
+import multiprocessing
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set
+from supabase import AsyncClient
+from app.core.config import Settings
+from app.models import Submission
+from app.services.fingerprint_service import simhash_many
+from app.services.simhash_index import get_simhash_registry
+
+def _answer_text(submission: Submission) -> str:
+    parts: List[str] = []
+    for value in (submission.answers or {}).values():
+        if isinstance(value, dict):
+            parts.append(str(value.get("choice", "")))
+            parts.append(str(value.get("reasoning", "")))
+        else:
+            parts.append(str(value))
+    return " ".join(parts)
+
+def build_submission_records(items: List[dict]) -> List[dict]:
+    submissions = [Submission(**item) for item in items]
+    try:
+        hashes: List[Optional[int]] = list(simhash_many(_answer_text(submission) for submission in submissions))
+    except Exception:
+        hashes = [None] * len(submissions)
+
+    records: List[dict] = []
+    for submission, sh in zip(submissions, hashes):
+        bucket = None
+        if isinstance(sh, int):
+            mask64 = (1 << 64) - 1
+            unsigned_sh = sh & mask64
+            bucket = (unsigned_sh >> (64 - 16)) & 0xFFFF
+
+        records.append(
+            {
+                "id": submission.id,
+                "queue_id": submission.queueId,
+                "labeling_task_id": submission.labelingTaskId,
+                "created_at": submission.createdAt,
+                "data": json.dumps(
+                    {
+                        "questions": [q.dict() for q in submission.questions],
+                        "answers": {k: v for k, v in submission.answers.items()},
+                    }
+                ),
+                "answer_simhash": sh,
+                "simhash_bucket": bucket,
+            }
+        )
+
+    return records
+
+_build_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_build_pool(workers: int) -> Optional[ProcessPoolExecutor]:
+    global _build_pool
+    if workers <= 0:
+        return None
+    if _build_pool is None:
+        # spawn: forking a process that is running an event loop can copy held locks.
+        _build_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return _build_pool
+
+def shutdown_build_pool() -> None:
+    global _build_pool
+    if _build_pool is not None:
+        _build_pool.shutdown(wait=False, cancel_futures=True)
+        _build_pool = None
+
+async def build_submission_records_async(items: List[dict], workers: int) -> List[dict]:
+    """Runs `build_submission_records` in the build process pool, or inline when `workers` is 0."""
+    pool = _get_build_pool(workers)
+    if pool is None:
+        return build_submission_records(items)
+    return await asyncio.get_running_loop().run_in_executor(pool, build_submission_records, items)
+
+_WHITESPACE = " \t\r\n"
+
+async def iter_json_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Dict[str, Any]]:
+    """Incrementally parse NDJSON or a (possibly chunked) top-level JSON array of objects.
+
+    Only the current partial record is buffered. After a failed parse the decoder waits
+    for the buffer to double before retrying, so one large record costs O(n) rather than
+    one re-parse per network chunk.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    retry_at = 0
+    in_array = False
+    finished = False
+    started = False
+    # Inside an array: what the last token was, "[" / "," (a value must follow) or "value".
+    last = "["
+
+    async def pull() -> bool:
+        nonlocal buffer
+        try:
+            chunk = await chunks.__anext__()
+        except StopAsyncIteration:
+            buffer += utf8.decode(b"", final=True)
+            return False
+        buffer += utf8.decode(chunk)
+        return True
+
+    more = True
+    while True:
+        pos = 0
+        length = len(buffer)
+        while pos < length:
+            char = buffer[pos]
+            if char in _WHITESPACE:
+                pos += 1
+                continue
+            if not started and char == "[":
+                in_array = started = True
+                pos += 1
+                continue
+            if in_array and char == ",":
+                if last != "value":
+                    raise ValueError("Unexpected comma in JSON array")
+                last = ","
+                pos += 1
+                continue
+            if in_array and char == "]":
+                if last == ",":
+                    raise ValueError("Trailing comma in JSON array")
+                in_array = False
+                finished = True
+                pos += 1
+                continue
+            if finished:
+                raise ValueError("Unexpected data after end of JSON array")
+            if in_array and last == "value":
+                raise ValueError("Missing comma between JSON array items")
+            if more and length - pos < retry_at:
+                break
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as exc:
+                if not more:
+                    raise ValueError(f"Malformed JSON record: {exc.msg}") from exc
+                retry_at = (length - pos) * 2
+                break
+            if not isinstance(value, dict):
+                raise ValueError("Each record must be a JSON object")
+            started = True
+            last = "value"
+            retry_at = 0
+            pos = end
+            yield value
+        buffer = buffer[pos:]
+        if not more:
+            if buffer.strip():
+                raise ValueError("Truncated JSON record at end of stream")
+            if in_array and not finished:
+                raise ValueError("JSON array was not closed")
+            return
+        more = await pull()
+
+_UPLOADS: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+MAX_TRACKED_UPLOADS = 100
+
+def start_upload_progress(upload_id: Optional[str] = None) -> Dict[str, Any]:
+    upload_id = upload_id or str(uuid.uuid4())
+    progress = {
+        "upload_id": upload_id,
+        "status": "running",
+        "received": 0,
+        "uploaded": 0,
+        "in_flight": 0,
+        "queue_ids": [],
+        "error": None,
+        "started_at": time.time(),
+        "finished_at": None,
+    }
+    _UPLOADS[upload_id] = progress
+    _UPLOADS.move_to_end(upload_id)
+    while len(_UPLOADS) > MAX_TRACKED_UPLOADS:
+        _UPLOADS.popitem(last=False)
+    return progress
+
+def get_upload_progress(upload_id: str) -> Optional[Dict[str, Any]]:
+    return _UPLOADS.get(upload_id)
+
+async def _upsert_batch(supabase: AsyncClient, records: List[dict]) -> None:
+    await supabase.table("submissions").upsert(records, on_conflict="id").execute()
+    registry = get_simhash_registry()
+    for record in records:
+        registry.add("submissions", record["queue_id"], [(record["id"], record["answer_simhash"])])
+
+async def upload_submission_batches(
+    supabase: AsyncClient,
+    items: AsyncIterator[dict],
+    settings: Settings,
+    progress: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Build and upsert submissions in bounded batches, pipelining both stages.
+
+    Each batch is validated and hashed in the build process pool and then upserted;
+    up to `upload_concurrency + upload_build_workers` batches are in flight plus the
+    one being filled, so memory stays flat regardless of upload size while builds
+    overlap with network round trips.
+    """
+    progress = progress if progress is not None else start_upload_progress()
+    queue_ids: Set[str] = set()
+    in_flight: Set[asyncio.Task] = set()
+    max_in_flight = max(1, settings.upload_concurrency + settings.upload_build_workers)
+    upserts = asyncio.Semaphore(max(1, settings.upload_concurrency))
+
+    async def reap(return_when: str) -> None:
+        done, _ = await asyncio.wait(in_flight, return_when=return_when)
+        for task in done:
+            in_flight.discard(task)
+            progress["uploaded"] += task.result()
+        progress["in_flight"] = len(in_flight)
+
+    async def send(batch: List[dict]) -> int:
+        records = await build_submission_records_async(batch, settings.upload_build_workers)
+        queue_ids.update(record["queue_id"] for record in records if record.get("queue_id"))
+        progress["queue_ids"] = sorted(queue_ids)
+        async with upserts:
+            await _upsert_batch(supabase, records)
+        return len(records)
+
+    async def submit(batch: List[dict]) -> None:
+        while len(in_flight) >= max_in_flight:
+            await reap(asyncio.FIRST_COMPLETED)
+        in_flight.add(asyncio.create_task(send(batch)))
+        progress["in_flight"] = len(in_flight)
+
+    try:
+        batch: List[dict] = []
+        async for item in items:
+            batch.append(item)
+            progress["received"] += 1
+            if len(batch) >= settings.upload_batch_size:
+                await submit(batch)
+                batch = []
+        if batch:
+            await submit(batch)
+        if in_flight:
+            await reap(asyncio.ALL_COMPLETED)
+    except BaseException as exc:
+        for task in in_flight:
+            task.cancel()
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+        progress["in_flight"] = 0
+        progress["status"] = "failed"
+        progress["error"] = str(exc)
+        progress["finished_at"] = time.time()
+        raise
+
+    progress["status"] = "done"
+    progress["finished_at"] = time.time()
+    return {
+        "upload_id": progress["upload_id"],
+        "queue_ids": sorted(queue_ids),
+        "total": progress["uploaded"],
+    }
+
+async def iter_items(items: Iterable[dict]) -> AsyncIterator[dict]:
+    for item in items:
+        yield item
@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from supabase import AsyncClient
+
+Verdict = Tuple[str, str]
+
+def verdict_cache_key(
+    provider: Optional[str],
+    model: Optional[str],
+    system_prompt: str,
+    question_text: str,
+    answer_text: str,
+) -> str:
+    material = json.dumps(
+        [provider or "", model or "", system_prompt, question_text, answer_text],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+def judge_allows_cache(judge: Dict[str, Any]) -> bool:
+    return judge.get("cacheVerdicts") is not False
+
+class VerdictCache:
+    """Two-tier (local LRU + `verdict_cache` table) cache of parsed verdicts.
+
+    Concurrent lookups for the same key are single-flighted, so only one provider
+    call runs per distinct prompt no matter how many jobs ask for it at once.
+    """
+
+    def __init__(
+        self,
+        supabase: Optional[AsyncClient] = None,
+        max_entries: int = 10000,
+        ttl_seconds: int = 7 * 24 * 3600,
+    ) -> None:
+        self.supabase = supabase
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Verdict]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.local_hits = 0
+        self.persistent_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    def _local_get(self, key: str) -> Optional[Verdict]:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def _local_put(self, key: str, value: Verdict) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _persistent_get(self, key: str) -> Optional[Verdict]:
+        if self.supabase is None:
+            return None
+        try:
+            response = await (
+                self.supabase.table("verdict_cache")
+                .select("verdict, reasoning")
+                .eq("key", key)
+                .gt("expires_at", datetime.now(timezone.utc).isoformat())
+                .limit(1)
+                .execute()
+            )
+        except Exception:  # noqa: BLE001
+            logging.exception("Verdict cache lookup failed")
+            return None
+        rows = response.data or []
+        if not rows:
+            return None
+        return rows[0]["verdict"], rows[0].get("reasoning") or ""
+
+    async def _persistent_put(self, key: str, value: Verdict, provider: Optional[str], model: Optional[str]) -> None:
+        if self.supabase is None:
+            return
+        now = datetime.now(timezone.utc)
+        try:
+            await self.supabase.table("verdict_cache").upsert(
+                {
+                    "key": key,
+                    "provider": provider,
+                    "model": model,
+                    "verdict": value[0],
+                    "reasoning": value[1],
+                    "created_at": now.isoformat(),
+                    "expires_at": (now + timedelta(seconds=self.ttl_seconds)).isoformat(),
+                },
+                on_conflict="key",
+            ).execute()
+        except Exception:  # noqa: BLE001
+            logging.exception("Verdict cache write failed")
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Optional[Verdict]]],
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> Optional[Verdict]:
+        cached = self._local_get(key)
+        if cached is not None:
+            self.local_hits += 1
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._persistent_get(key)
+            if result is not None:
+                self.persistent_hits += 1
+            else:
+                self.misses += 1
+                result = await compute()
+                if result is not None:
+                    await self._persistent_put(key, result, provider, model)
+            if result is not None:
+                self._local_put(key, result)
+            future.set_result(result)
+            return result
+        except BaseException as exc:
+            if isinstance(exc, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(exc)
+                # Followers re-raise it; don't warn if there were none.
+                future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def lookup(self, key: str) -> Optional[Verdict]:
+        """Cached verdict for `key` without computing one on a miss."""
+        cached = self._local_get(key)
+        if cached is not None:
+            self.local_hits += 1
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except Exception:  # noqa: BLE001
+                return None
+
+        result = await self._persistent_get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.persistent_hits += 1
+        self._local_put(key, result)
+        return result
+
+    async def store(self, key: str, value: Verdict, provider: Optional[str] = None, model: Optional[str] = None) -> None:
+        """Record a verdict computed outside `get_or_compute`, e.g. from a batched reply."""
+        self._local_put(key, value)
+        await self._persistent_put(key, value, provider, model)
+
+    async def prune(self, max_rows: int) -> int:
+        if self.supabase is None:
+            return 0
+        response = await self.supabase.rpc("prune_verdict_cache", {"p_max_rows": max_rows}).execute()
+        return response.data or 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.local_hits + self.persistent_hits + self.coalesced + self.misses
+        hits = lookups - self.misses
+        return {
+            "entries": len(self._entries),
+            "local_hits": self.local_hits,
+            "persistent_hits": self.persistent_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Tuple
+from supabase import AsyncClient
+from app.services.job_service import update_leased_jobs
+from app.services.runner_service import _failure_fields, _upsert_evaluations
+
+EvaluationKey = Tuple[str, str, str]
+
+class WriteBehindBuffer:
+    """Coalesces evaluation upserts and job status transitions from concurrent jobs into bulk writes.
+
+    Writes are flushed when `max_items` are pending or every `flush_interval` seconds.
+    Evaluations are always written before the job transitions that depend on them, and a
+    failed flush puts its items back so they are retried (at-least-once). If the process
+    dies with unflushed items, the jobs' leases expire and they are simply re-run.
+    """
+
+    def __init__(self, supabase: AsyncClient, max_items: int = 200, flush_interval: float = 0.5) -> None:
+        self.supabase = supabase
+        self.max_items = max_items
+        self.flush_interval = flush_interval
+        self._evaluations: Dict[EvaluationKey, Dict[str, Any]] = {}
+        self._transitions: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+
+    def pending(self) -> int:
+        return len(self._evaluations) + len(self._transitions)
+
+    def add_evaluation(self, payload: Dict[str, Any]) -> None:
+        key = (str(payload["submission_id"]), str(payload["question_id"]), str(payload["judge_id"]))
+        self._evaluations[key] = payload
+        self._maybe_wake()
+
+    def mark_done(self, job: Dict[str, Any]) -> None:
+        self._transitions[str(job["id"])] = (job, {"status": "done"})
+        self._maybe_wake()
+
+    def mark_failed(self, job: Dict[str, Any], exc: Exception) -> None:
+        self._transitions[str(job["id"])] = (job, _failure_fields(job, exc))
+        self._maybe_wake()
+
+    def _maybe_wake(self) -> None:
+        if self.pending() >= self.max_items:
+            self._wake.set()
+
+    def _restore(
+        self,
+        evaluations: Dict[EvaluationKey, Dict[str, Any]],
+        transitions: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]],
+    ) -> None:
+        # Anything queued while the flush was in flight is newer and wins.
+        for key, payload in evaluations.items():
+            self._evaluations.setdefault(key, payload)
+        for job_id, transition in transitions.items():
+            self._transitions.setdefault(job_id, transition)
+
+    async def flush(self) -> None:
+        async with self._lock:
+            evaluations, self._evaluations = self._evaluations, {}
+            transitions, self._transitions = self._transitions, {}
+            if not evaluations and not transitions:
+                return
+
+            try:
+                await _upsert_evaluations(self.supabase, list(evaluations.values()))
+            except BaseException:
+                self._restore(evaluations, transitions)
+                raise
+
+            groups: Dict[Tuple[Tuple[str, Any], ...], List[str]] = {}
+            for job_id, (_, fields) in transitions.items():
+                groups.setdefault(tuple(sorted(fields.items())), []).append(job_id)
+
+            remaining = dict(transitions)
+            try:
+                for fields_key, job_ids in groups.items():
+                    jobs = [transitions[job_id][0] for job_id in job_ids]
+                    await update_leased_jobs(self.supabase, jobs, dict(fields_key))
+                    for job_id in job_ids:
+                        remaining.pop(job_id, None)
+            except BaseException:
+                self._restore({}, remaining)
+                raise
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:  # noqa: BLE001
+                logging.exception("Write-behind flush failed; %s items will be retried", self.pending())
+
+    async def close(self, attempts: int = 5) -> None:
+        for attempt in range(attempts):
+            try:
+                await self.flush()
+                return
+            except Exception:  # noqa: BLE001
+                logging.exception("Final write-behind flush failed (attempt %s/%s)", attempt + 1, attempts)
+                await asyncio.sleep(self.flush_interval * (attempt + 1))
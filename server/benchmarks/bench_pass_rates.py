@@ -0,0 +1,69 @@
+"""Micro-benchmark: row-by-row vs columnar pass-rate aggregation.
+
+Run from the server directory:
+
+    python -m benchmarks.bench_pass_rates --rows 1000000 --judges 20 --interval day
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from app.services.analytics_service import (
+    _aggregate_pass_rates_columnar,
+    _aggregate_pass_rates_python,
+    _series_points,
+)
+
+def _rows(count: int, judges: int, days: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    judge_ids = [f"judge-{index}" for index in range(judges)]
+    verdicts = ["pass", "pass", "fail", "inconclusive"]
+    return [
+        {
+            "judge_id": rng.choice(judge_ids),
+            "verdict": rng.choice(verdicts),
+            "created_at": (start + timedelta(seconds=rng.randrange(days * 86400), microseconds=rng.randrange(10**6))).isoformat(),
+        }
+        for _ in range(count)
+    ]
+
+def _normalise(counts) -> tuple:
+    totals, per_judge = counts
+    return totals, [(judge_id, sorted((ts, dict(c)) for ts, c in buckets.items())) for judge_id, buckets in per_judge.items()]
+
+def _series(counts) -> list:
+    return [_series_points(buckets) for buckets in counts[1].values()]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--judges", type=int, default=20)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--interval", choices=["hour", "day", "week", "month"], default="day")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rows = _rows(args.rows, args.judges, args.days, args.seed)
+
+    started = time.perf_counter()
+    python_counts = _aggregate_pass_rates_python(rows, args.interval)
+    python_series = _series(python_counts)
+    python_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    columnar_counts = _aggregate_pass_rates_columnar(rows, args.interval)
+    columnar_series = _series(columnar_counts)
+    columnar_s = time.perf_counter() - started
+
+    if _normalise(python_counts) != _normalise(columnar_counts) or python_series != columnar_series:
+        raise SystemExit("columnar aggregation differs from the row-by-row path")
+
+    per_row = lambda seconds: seconds / len(rows) * 1e6  # noqa: E731
+    print(f"rows:      {len(rows)} ({args.judges} judges, {args.days} days, interval={args.interval})")
+    print(f"python:    {python_s:8.3f}s  {per_row(python_s):8.2f} us/row")
+    print(f"columnar:  {columnar_s:8.3f}s  {per_row(columnar_s):8.2f} us/row")
+    print(f"speed-up:  {python_s / columnar_s:8.1f}x (outputs identical)")
+
+if __name__ == "__main__":
+    main()
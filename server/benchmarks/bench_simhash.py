@@ -0,0 +1,46 @@
+"""Micro-benchmark: scalar `simhash` vs batched `simhash_many`.
+
+Run from the server directory:
+
+    python -m benchmarks.bench_simhash --docs 20000 --tokens 60
+"""
+import argparse
+import random
+import string
+import time
+from app.services.fingerprint_service import simhash, simhash_many
+
+def _corpus(docs: int, tokens: int, vocabulary: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10))) for _ in range(vocabulary)]
+    return [" ".join(rng.choices(words, k=rng.randint(tokens // 2, tokens * 3 // 2))) for _ in range(docs)]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--tokens", type=int, default=60, help="average tokens per document")
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    texts = _corpus(args.docs, args.tokens, args.vocabulary, args.seed)
+
+    started = time.perf_counter()
+    scalar = [simhash(text) for text in texts]
+    scalar_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batched = simhash_many(texts)
+    batched_s = time.perf_counter() - started
+
+    if scalar != batched:
+        raise SystemExit("simhash_many output differs from simhash")
+
+    per_doc = lambda seconds: seconds / len(texts) * 1e6  # noqa: E731
+    print(f"documents:     {len(texts)} (~{args.tokens} tokens each)")
+    print(f"simhash:       {scalar_s:8.3f}s  {per_doc(scalar_s):8.1f} us/doc")
+    print(f"simhash_many:  {batched_s:8.3f}s  {per_doc(batched_s):8.1f} us/doc")
+    print(f"speed-up:      {scalar_s / batched_s:8.1f}x (outputs identical)")
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,24 @@
-from typing import Any
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.router import api_router
 from app.core.config import get_settings
+from app.services.submission_service import shutdown_build_pool
 
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    try:
+        yield
+    finally:
+        shutdown_build_pool()
+
 def create_app() -> FastAPI:
     settings = get_settings()
-    fastapi_app = FastAPI(title="AI Judge Backend")
+    fastapi_app = FastAPI(title="AI Judge Backend", lifespan=lifespan)
     fastapi_app.add_middleware(
         CORSMiddleware,
         allow_origins=settings.cors_origins,
@@ -0,0 +1,77 @@
+-- Lease-based job claiming for judge_jobs.
+-- Each worker claims its own rows atomically (FOR UPDATE SKIP LOCKED) and
+-- records an owner plus lease expiry; expired leases are reclaimed on the
+-- next claim so a crashed worker never strands rows in `running`.
+
+alter table judge_jobs add column if not exists lease_owner text;
+alter table judge_jobs add column if not exists lease_expires_at timestamptz;
+
+create index if not exists judge_jobs_pending_idx
+    on judge_jobs (created_at)
+    where status = 'pending';
+
+create index if not exists judge_jobs_running_lease_idx
+    on judge_jobs (lease_expires_at)
+    where status = 'running';
+
+create or replace function claim_judge_jobs(
+    p_worker_id text,
+    p_limit integer,
+    p_lease_seconds integer default 300,
+    p_max_attempts integer default 3
+)
+returns setof judge_jobs
+language plpgsql
+as $$
+begin
+    -- Expired leases that already used up their attempts are failed for good.
+    update judge_jobs
+    set status = 'failed',
+        last_error = coalesce(last_error, 'lease expired'),
+        lease_owner = null,
+        lease_expires_at = null,
+        updated_at = now()
+    where status = 'running'
+      and coalesce(lease_expires_at, '-infinity'::timestamptz) < now()
+      and attempts + 1 >= p_max_attempts;
+
+    return query
+    with candidates as (
+        select id
+        from judge_jobs
+        where status = 'pending'
+           or (status = 'running' and coalesce(lease_expires_at, '-infinity'::timestamptz) < now())
+        order by created_at
+        limit p_limit
+        for update skip locked
+    )
+    update judge_jobs j
+    set status = 'running',
+        attempts = case when j.status = 'running' then j.attempts + 1 else j.attempts end,
+        lease_owner = p_worker_id,
+        lease_expires_at = now() + make_interval(secs => p_lease_seconds),
+        updated_at = now()
+    from candidates c
+    where j.id = c.id
+    returning j.*;
+end;
+$$;
+
+create or replace function renew_judge_job_leases(
+    p_worker_id text,
+    p_job_ids uuid[],
+    p_lease_seconds integer default 300
+)
+returns integer
+language sql
+as $$
+    with renewed as (
+        update judge_jobs
+        set lease_expires_at = now() + make_interval(secs => p_lease_seconds)
+        where id = any(p_job_ids)
+          and lease_owner = p_worker_id
+          and status = 'running'
+        returning 1
+    )
+    select count(*)::integer from renewed;
+$$;
@@ -0,0 +1,35 @@
+-- Bulk evaluation upsert with server-side change detection.
+-- Replaces the per-job SELECT + upsert pair: rows whose tracked fields are
+-- unchanged are left untouched, so updated_at only moves on real changes.
+
+create or replace function upsert_evaluations(p_rows jsonb)
+returns integer
+language sql
+as $$
+    with incoming as (
+        select distinct on (r.submission_id, r.question_id, r.judge_id) r.*
+        from jsonb_populate_recordset(null::evaluations, p_rows) r
+        order by r.submission_id, r.question_id, r.judge_id, r.created_at desc nulls last
+    ),
+    written as (
+        insert into evaluations as e (
+            submission_id, question_id, judge_id, queue_id,
+            verdict, reasoning, reasoning_simhash, created_at
+        )
+        select
+            submission_id, question_id, judge_id, queue_id,
+            verdict, reasoning, reasoning_simhash, coalesce(created_at, now())
+        from incoming
+        on conflict (submission_id, question_id, judge_id) do update
+        set verdict = excluded.verdict,
+            reasoning = excluded.reasoning,
+            reasoning_simhash = excluded.reasoning_simhash,
+            queue_id = coalesce(excluded.queue_id, e.queue_id),
+            updated_at = now()
+        where (e.verdict, e.reasoning, e.reasoning_simhash, e.queue_id)
+              is distinct from
+              (excluded.verdict, excluded.reasoning, excluded.reasoning_simhash, coalesce(excluded.queue_id, e.queue_id))
+        returning 1
+    )
+    select count(*)::integer from written;
+$$;
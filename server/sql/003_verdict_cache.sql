@@ -0,0 +1,39 @@
+-- Persistent tier of the worker's verdict cache.
+-- Keys are sha256 hashes of provider/model/system prompt plus the rendered
+-- question and answer text; rows expire after a TTL and the table is capped.
+
+create table if not exists verdict_cache (
+    key text primary key,
+    provider text,
+    model text,
+    verdict text not null,
+    reasoning text,
+    created_at timestamptz not null default now(),
+    expires_at timestamptz not null
+);
+
+create index if not exists verdict_cache_expires_idx on verdict_cache (expires_at);
+
+create or replace function prune_verdict_cache(p_max_rows integer default 1000000)
+returns integer
+language plpgsql
+as $$
+declare
+    removed integer := 0;
+    extra integer;
+begin
+    delete from verdict_cache where expires_at < now();
+    get diagnostics removed = row_count;
+
+    select greatest(count(*) - p_max_rows, 0) into extra from verdict_cache;
+    if extra > 0 then
+        delete from verdict_cache
+        where key in (select key from verdict_cache order by created_at limit extra);
+        removed := removed + extra;
+    end if;
+    return removed;
+end;
+$$;
+
+-- Per-judge switch; judges default to using the cache.
+alter table judges add column if not exists "cacheVerdicts" boolean not null default true;
@@ -0,0 +1,10 @@
+-- Jobs reference their submission by id; workers resolve the data through
+-- a local cache instead of reading a per-job copy.
+
+alter table judge_jobs alter column submission_data drop not null;
+
+-- Reclaim the space held by copies on jobs that will not run again.
+update judge_jobs
+set submission_data = null
+where submission_data is not null
+  and status in ('done', 'failed');
@@ -0,0 +1,50 @@
+-- Idempotent enqueue. Job ids are derived from (submission, question, judge),
+-- so re-running a queue inserts new work and re-queues finished jobs, while
+-- jobs that are still pending or running are left alone.
+--
+-- Jobs created before this migration have random ids, so conflicts are keyed
+-- on the (submission, question, judge) combination instead of the id. Existing
+-- duplicates are collapsed first, keeping the active or most recent row.
+
+delete from judge_jobs j
+using (
+    select id,
+           row_number() over (
+               partition by submission_id, question_id, judge_id
+               order by (status in ('pending', 'running')) desc, updated_at desc nulls last, created_at desc nulls last, id
+           ) as rank
+    from judge_jobs
+) ranked
+where j.id = ranked.id
+  and ranked.rank > 1;
+
+create unique index if not exists judge_jobs_combination_key
+    on judge_jobs (submission_id, question_id, judge_id);
+
+create or replace function enqueue_judge_jobs(p_rows jsonb)
+returns integer
+language sql
+as $$
+    with incoming as (
+        select distinct on (r.id) r.*
+        from jsonb_populate_recordset(null::judge_jobs, p_rows) r
+    ),
+    written as (
+        insert into judge_jobs (id, submission_id, question_id, judge_id, queue_id, status, attempts, propagate_to, created_at)
+        select id, submission_id, question_id, judge_id, queue_id, 'pending', 0, propagate_to, coalesce(created_at, now())
+        from incoming
+        on conflict (submission_id, question_id, judge_id) do update
+        set status = 'pending',
+            attempts = 0,
+            last_error = null,
+            lease_owner = null,
+            lease_expires_at = null,
+            submission_data = null,
+            propagate_to = excluded.propagate_to,
+            created_at = excluded.created_at,
+            updated_at = now()
+        where judge_jobs.status in ('done', 'failed')
+        returning 1
+    )
+    select count(*)::integer from written;
+$$;
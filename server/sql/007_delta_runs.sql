@@ -0,0 +1,108 @@
+-- Delta runs: evaluations remember the judge definition that produced them,
+-- and enqueue can skip combinations whose evaluation is still current.
+
+alter table evaluations add column if not exists judge_fingerprint text;
+
+create or replace function upsert_evaluations(p_rows jsonb)
+returns integer
+language sql
+as $$
+    with incoming as (
+        select distinct on (r.submission_id, r.question_id, r.judge_id) r.*
+        from jsonb_populate_recordset(null::evaluations, p_rows) r
+        order by r.submission_id, r.question_id, r.judge_id, r.created_at desc nulls last
+    ),
+    written as (
+        insert into evaluations as e (
+            submission_id, question_id, judge_id, queue_id,
+            verdict, reasoning, reasoning_simhash, propagated_from, judge_fingerprint, created_at
+        )
+        select
+            submission_id, question_id, judge_id, queue_id,
+            verdict, reasoning, reasoning_simhash, propagated_from, judge_fingerprint, coalesce(created_at, now())
+        from incoming
+        on conflict (submission_id, question_id, judge_id) do update
+        set verdict = excluded.verdict,
+            reasoning = excluded.reasoning,
+            reasoning_simhash = excluded.reasoning_simhash,
+            propagated_from = excluded.propagated_from,
+            judge_fingerprint = excluded.judge_fingerprint,
+            queue_id = coalesce(excluded.queue_id, e.queue_id),
+            updated_at = now()
+        where (e.verdict, e.reasoning, e.reasoning_simhash, e.propagated_from, e.judge_fingerprint, e.queue_id)
+              is distinct from
+              (excluded.verdict, excluded.reasoning, excluded.reasoning_simhash, excluded.propagated_from,
+               excluded.judge_fingerprint, coalesce(excluded.queue_id, e.queue_id))
+        returning 1
+    )
+    select count(*)::integer from written;
+$$;
+
+-- Planned job rows that still need work. With p_fingerprints (judge id ->
+-- fingerprint) a row is dropped when its evaluation has a verdict and was
+-- produced by the current judge definition; rows from before fingerprints
+-- existed count as stale.
+create or replace function stale_judge_job_rows(p_rows jsonb, p_fingerprints jsonb)
+returns setof judge_jobs
+language sql
+stable
+as $$
+    select distinct on (r.id) r.*
+    from jsonb_populate_recordset(null::judge_jobs, p_rows) r
+    where p_fingerprints is null
+       or not exists (
+            select 1
+            from evaluations e
+            where e.submission_id = r.submission_id
+              and e.question_id = r.question_id
+              and e.judge_id = r.judge_id
+              and e.verdict is not null
+              and e.judge_fingerprint = p_fingerprints ->> r.judge_id::text
+       );
+$$;
+
+drop function if exists enqueue_judge_jobs(jsonb);
+
+create or replace function enqueue_judge_jobs(
+    p_rows jsonb,
+    p_fingerprints jsonb default null,
+    p_dry_run boolean default false
+)
+returns integer
+language plpgsql
+as $$
+declare
+    v_count integer;
+begin
+    if p_dry_run then
+        select count(*)::integer into v_count
+        from stale_judge_job_rows(p_rows, p_fingerprints) c
+        left join judge_jobs j
+          on j.submission_id = c.submission_id
+         and j.question_id = c.question_id
+         and j.judge_id = c.judge_id
+        where j.id is null or j.status in ('done', 'failed');
+        return v_count;
+    end if;
+
+    with written as (
+        insert into judge_jobs (id, submission_id, question_id, judge_id, queue_id, status, attempts, propagate_to, created_at)
+        select id, submission_id, question_id, judge_id, queue_id, 'pending', 0, propagate_to, coalesce(created_at, now())
+        from stale_judge_job_rows(p_rows, p_fingerprints)
+        on conflict (submission_id, question_id, judge_id) do update
+        set status = 'pending',
+            attempts = 0,
+            last_error = null,
+            lease_owner = null,
+            lease_expires_at = null,
+            submission_data = null,
+            propagate_to = excluded.propagate_to,
+            created_at = excluded.created_at,
+            updated_at = now()
+        where judge_jobs.status in ('done', 'failed')
+        returning 1
+    )
+    select count(*)::integer into v_count from written;
+    return v_count;
+end;
+$$;
@@ -0,0 +1,107 @@
+-- Hourly verdict counts per (queue, judge), kept current by statement-level
+-- triggers on evaluations. Day/week/month series are derived from the hourly
+-- buckets, so dashboards read O(buckets) rows instead of every evaluation.
+
+create table if not exists evaluation_rollups (
+    queue_id text not null,
+    judge_id text not null,
+    bucket timestamptz not null,
+    verdict text not null,
+    count bigint not null default 0,
+    primary key (queue_id, judge_id, bucket, verdict)
+);
+
+create or replace function evaluation_rollups_apply()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        insert into evaluation_rollups as r (queue_id, judge_id, bucket, verdict, count)
+        select queue_id::text,
+               judge_id::text,
+               date_trunc('hour', created_at at time zone 'utc') at time zone 'utc',
+               verdict,
+               -count(*)
+        from old_rows
+        where queue_id is not null and judge_id is not null and created_at is not null
+          and verdict is not null and verdict <> ''
+        group by 1, 2, 3, 4
+        on conflict (queue_id, judge_id, bucket, verdict) do update
+        set count = r.count + excluded.count;
+    end if;
+
+    if tg_op in ('INSERT', 'UPDATE') then
+        insert into evaluation_rollups as r (queue_id, judge_id, bucket, verdict, count)
+        select queue_id::text,
+               judge_id::text,
+               date_trunc('hour', created_at at time zone 'utc') at time zone 'utc',
+               verdict,
+               count(*)
+        from new_rows
+        where queue_id is not null and judge_id is not null and created_at is not null
+          and verdict is not null and verdict <> ''
+        group by 1, 2, 3, 4
+        on conflict (queue_id, judge_id, bucket, verdict) do update
+        set count = r.count + excluded.count;
+    end if;
+
+    return null;
+end;
+$$;
+
+drop trigger if exists evaluation_rollups_insert on evaluations;
+create trigger evaluation_rollups_insert
+    after insert on evaluations
+    referencing new table as new_rows
+    for each statement execute function evaluation_rollups_apply();
+
+drop trigger if exists evaluation_rollups_update on evaluations;
+create trigger evaluation_rollups_update
+    after update on evaluations
+    referencing old table as old_rows new table as new_rows
+    for each statement execute function evaluation_rollups_apply();
+
+drop trigger if exists evaluation_rollups_delete on evaluations;
+create trigger evaluation_rollups_delete
+    after delete on evaluations
+    referencing old table as old_rows
+    for each statement execute function evaluation_rollups_apply();
+
+-- Backfill from existing evaluations.
+truncate evaluation_rollups;
+insert into evaluation_rollups (queue_id, judge_id, bucket, verdict, count)
+select queue_id::text,
+       judge_id::text,
+       date_trunc('hour', created_at at time zone 'utc') at time zone 'utc',
+       verdict,
+       count(*)
+from evaluations
+where queue_id is not null and judge_id is not null and created_at is not null
+  and verdict is not null and verdict <> ''
+group by 1, 2, 3, 4;
+
+-- Verdict counts per judge and interval bucket (UTC, weeks start on Monday)
+-- for hourly buckets in [p_from, p_to).
+create or replace function evaluation_rollup_series(
+    p_queue_id text,
+    p_interval text,
+    p_from timestamptz default null,
+    p_to timestamptz default null
+)
+returns table (judge_id text, ts bigint, verdict text, count bigint)
+language sql
+stable
+as $$
+    select r.judge_id,
+           extract(epoch from date_trunc(p_interval, r.bucket at time zone 'utc'))::bigint as ts,
+           r.verdict,
+           sum(r.count)::bigint as count
+    from evaluation_rollups r
+    where r.queue_id = p_queue_id
+      and (p_from is null or r.bucket >= p_from)
+      and (p_to is null or r.bucket < p_to)
+      and r.count > 0
+    group by 1, 2, 3
+    order by 1, 2, 3;
+$$;
@@ -0,0 +1,143 @@
+-- Data versions for response caching. Each write statement bumps a version
+-- per affected scope: 'queue:<id>' for a queue's rows, 'judges' for judge
+-- definitions and '*' for anything that changes global counts. The API keys
+-- cached responses on the versions they depend on.
+
+create table if not exists queue_data_versions (
+    scope text primary key,
+    version bigint not null default 0,
+    updated_at timestamptz not null default now()
+);
+
+create or replace function bump_data_versions(p_scopes text[])
+returns void
+language sql
+as $$
+    insert into queue_data_versions as v (scope, version, updated_at)
+    select distinct s, 1, now()
+    from unnest(p_scopes) s
+    where s is not null
+    on conflict (scope) do update
+    set version = v.version + 1,
+        updated_at = now();
+$$;
+
+-- Statement-level trigger for tables with a queue_id column.
+create or replace function bump_queue_data_versions()
+returns trigger
+language plpgsql
+as $$
+declare
+    v_scopes text[];
+begin
+    if tg_op = 'INSERT' then
+        select array_agg(distinct 'queue:' || queue_id::text) into v_scopes
+        from new_rows where queue_id is not null;
+    elsif tg_op = 'DELETE' then
+        select array_agg(distinct 'queue:' || queue_id::text) into v_scopes
+        from old_rows where queue_id is not null;
+    else
+        select array_agg(distinct scope) into v_scopes
+        from (
+            select 'queue:' || queue_id::text as scope from new_rows where queue_id is not null
+            union
+            select 'queue:' || queue_id::text from old_rows where queue_id is not null
+        ) changed;
+    end if;
+    perform bump_data_versions(coalesce(v_scopes, '{}') || array['*']);
+    return null;
+end;
+$$;
+
+-- Job updates bump only the queues where some row's status actually changed;
+-- lease renewals and other status-preserving rewrites leave the versions alone.
+create or replace function bump_job_status_data_versions()
+returns trigger
+language plpgsql
+as $$
+declare
+    v_scopes text[];
+begin
+    select array_agg(distinct scope) into v_scopes
+    from old_rows o
+    join new_rows n on n.id = o.id
+    cross join lateral (values ('queue:' || o.queue_id::text), ('queue:' || n.queue_id::text)) queues(scope)
+    where scope is not null
+      and (o.status is distinct from n.status or o.queue_id is distinct from n.queue_id);
+    if v_scopes is not null then
+        perform bump_data_versions(v_scopes || array['*']);
+    end if;
+    return null;
+end;
+$$;
+
+create or replace function bump_judge_data_versions()
+returns trigger
+language plpgsql
+as $$
+begin
+    perform bump_data_versions(array['judges', '*']);
+    return null;
+end;
+$$;
+
+drop trigger if exists evaluations_versions_insert on evaluations;
+create trigger evaluations_versions_insert
+    after insert on evaluations
+    referencing new table as new_rows
+    for each statement execute function bump_queue_data_versions();
+
+drop trigger if exists evaluations_versions_update on evaluations;
+create trigger evaluations_versions_update
+    after update on evaluations
+    referencing old table as old_rows new table as new_rows
+    for each statement execute function bump_queue_data_versions();
+
+drop trigger if exists evaluations_versions_delete on evaluations;
+create trigger evaluations_versions_delete
+    after delete on evaluations
+    referencing old table as old_rows
+    for each statement execute function bump_queue_data_versions();
+
+drop trigger if exists submissions_versions_insert on submissions;
+create trigger submissions_versions_insert
+    after insert on submissions
+    referencing new table as new_rows
+    for each statement execute function bump_queue_data_versions();
+
+drop trigger if exists submissions_versions_update on submissions;
+create trigger submissions_versions_update
+    after update on submissions
+    referencing old table as old_rows new table as new_rows
+    for each statement execute function bump_queue_data_versions();
+
+drop trigger if exists submissions_versions_delete on submissions;
+create trigger submissions_versions_delete
+    after delete on submissions
+    referencing old table as old_rows
+    for each statement execute function bump_queue_data_versions();
+
+-- Per-status job counts are served from cache too (/diagnostics/queues), so status
+-- changes bump their queue as well as rows coming and going.
+drop trigger if exists judge_jobs_versions_insert on judge_jobs;
+create trigger judge_jobs_versions_insert
+    after insert on judge_jobs
+    referencing new table as new_rows
+    for each statement execute function bump_queue_data_versions();
+
+drop trigger if exists judge_jobs_versions_update on judge_jobs;
+create trigger judge_jobs_versions_update
+    after update on judge_jobs
+    referencing old table as old_rows new table as new_rows
+    for each statement execute function bump_job_status_data_versions();
+
+drop trigger if exists judge_jobs_versions_delete on judge_jobs;
+create trigger judge_jobs_versions_delete
+    after delete on judge_jobs
+    referencing old table as old_rows
+    for each statement execute function bump_queue_data_versions();
+
+drop trigger if exists judges_versions on judges;
+create trigger judges_versions
+    after insert or update or delete on judges
+    for each statement execute function bump_judge_data_versions();
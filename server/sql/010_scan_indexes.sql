@@ -0,0 +1,9 @@
+-- Keyset scans (app/services/scan_service.py) page by (created_at, id) within a queue.
+-- These indexes let each page start where the previous one ended instead of
+-- re-reading every earlier row.
+
+create index if not exists evaluations_queue_created_id_idx
+    on evaluations (queue_id, created_at, id);
+
+create index if not exists submissions_queue_created_id_idx
+    on submissions (queue_id, created_at, id);
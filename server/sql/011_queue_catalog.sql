@@ -0,0 +1,333 @@
+-- Per-queue counters kept current by statement-level triggers, so the dashboard
+-- summary and the recent-queue list are one indexed read instead of exact
+-- counts over the largest tables. Rows with no queue_id are counted under ''.
+--
+-- The triggers start counting as soon as this file is applied; existing rows
+-- are folded in by `select queue_catalog_backfill();`, which can be run later
+-- (it briefly blocks writes to the three source tables). Until then the
+-- catalog RPCs raise and the API falls back to direct counts.
+
+create table if not exists queue_catalog (
+    queue_id text primary key,
+    submissions bigint not null default 0,
+    evaluations bigint not null default 0,
+    passes bigint not null default 0,
+    jobs_pending bigint not null default 0,
+    jobs_running bigint not null default 0,
+    jobs_done bigint not null default 0,
+    jobs_failed bigint not null default 0,
+    jobs_total bigint not null default 0,
+    updated_at timestamptz not null default now()
+);
+
+-- Newest submissions.created_at per queue, with the same type as the source column.
+do $$
+begin
+    if not exists (
+        select 1 from information_schema.columns
+        where table_name = 'queue_catalog' and column_name = 'latest_submission_at'
+    ) then
+        execute format(
+            'alter table queue_catalog add column latest_submission_at %s',
+            (select format_type(atttypid, atttypmod) from pg_attribute
+             where attrelid = 'submissions'::regclass and attname = 'created_at')
+        );
+    end if;
+end;
+$$;
+
+create index if not exists queue_catalog_latest_idx
+    on queue_catalog (latest_submission_at desc nulls last);
+
+create table if not exists queue_catalog_status (
+    id boolean primary key default true check (id),
+    backfilled_at timestamptz
+);
+insert into queue_catalog_status (id) values (true) on conflict do nothing;
+
+create or replace function queue_catalog_submissions_apply()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        insert into queue_catalog as c (queue_id, submissions)
+        select coalesce(queue_id::text, ''), -count(*)
+        from old_rows
+        group by 1
+        on conflict (queue_id) do update
+        set submissions = c.submissions + excluded.submissions,
+            updated_at = now();
+    end if;
+
+    if tg_op in ('INSERT', 'UPDATE') then
+        -- latest_submission_at only moves forward; deletes leave it in place.
+        insert into queue_catalog as c (queue_id, submissions, latest_submission_at)
+        select coalesce(queue_id::text, ''), count(*), max(created_at)
+        from new_rows
+        group by 1
+        on conflict (queue_id) do update
+        set submissions = c.submissions + excluded.submissions,
+            latest_submission_at = greatest(c.latest_submission_at, excluded.latest_submission_at),
+            updated_at = now();
+    end if;
+
+    return null;
+end;
+$$;
+
+create or replace function queue_catalog_evaluations_apply()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        insert into queue_catalog as c (queue_id, evaluations, passes)
+        select coalesce(queue_id::text, ''), -count(*), -count(*) filter (where verdict = 'pass')
+        from old_rows
+        group by 1
+        on conflict (queue_id) do update
+        set evaluations = c.evaluations + excluded.evaluations,
+            passes = c.passes + excluded.passes,
+            updated_at = now();
+    end if;
+
+    if tg_op in ('INSERT', 'UPDATE') then
+        insert into queue_catalog as c (queue_id, evaluations, passes)
+        select coalesce(queue_id::text, ''), count(*), count(*) filter (where verdict = 'pass')
+        from new_rows
+        group by 1
+        on conflict (queue_id) do update
+        set evaluations = c.evaluations + excluded.evaluations,
+            passes = c.passes + excluded.passes,
+            updated_at = now();
+    end if;
+
+    return null;
+end;
+$$;
+
+create or replace function queue_catalog_jobs_apply()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op = 'UPDATE' then
+        -- Claims, lease renewals and most flushes rewrite rows without moving them
+        -- between counters. Only rows whose status or queue changed are applied, so
+        -- those statements never touch (or contend on) the per-queue row.
+        with changed as (
+            select o.queue_id as old_queue, o.status as old_status,
+                   n.queue_id as new_queue, n.status as new_status
+            from old_rows o
+            join new_rows n on n.id = o.id
+            where o.status is distinct from n.status
+               or o.queue_id is distinct from n.queue_id
+        ),
+        deltas as (
+            select coalesce(old_queue::text, '') as queue_id, old_status as status, -1 as delta from changed
+            union all
+            select coalesce(new_queue::text, ''), new_status, 1 from changed
+        )
+        insert into queue_catalog as c (queue_id, jobs_pending, jobs_running, jobs_done, jobs_failed, jobs_total)
+        select queue_id,
+               coalesce(sum(delta) filter (where status = 'pending'), 0),
+               coalesce(sum(delta) filter (where status = 'running'), 0),
+               coalesce(sum(delta) filter (where status = 'done'), 0),
+               coalesce(sum(delta) filter (where status = 'failed'), 0),
+               sum(delta)
+        from deltas
+        group by 1
+        on conflict (queue_id) do update
+        set jobs_pending = c.jobs_pending + excluded.jobs_pending,
+            jobs_running = c.jobs_running + excluded.jobs_running,
+            jobs_done = c.jobs_done + excluded.jobs_done,
+            jobs_failed = c.jobs_failed + excluded.jobs_failed,
+            jobs_total = c.jobs_total + excluded.jobs_total,
+            updated_at = now();
+        return null;
+    end if;
+
+    if tg_op = 'DELETE' then
+        insert into queue_catalog as c (queue_id, jobs_pending, jobs_running, jobs_done, jobs_failed, jobs_total)
+        select coalesce(queue_id::text, ''),
+               -count(*) filter (where status = 'pending'),
+               -count(*) filter (where status = 'running'),
+               -count(*) filter (where status = 'done'),
+               -count(*) filter (where status = 'failed'),
+               -count(*)
+        from old_rows
+        group by 1
+        on conflict (queue_id) do update
+        set jobs_pending = c.jobs_pending + excluded.jobs_pending,
+            jobs_running = c.jobs_running + excluded.jobs_running,
+            jobs_done = c.jobs_done + excluded.jobs_done,
+            jobs_failed = c.jobs_failed + excluded.jobs_failed,
+            jobs_total = c.jobs_total + excluded.jobs_total,
+            updated_at = now();
+        return null;
+    end if;
+
+    insert into queue_catalog as c (queue_id, jobs_pending, jobs_running, jobs_done, jobs_failed, jobs_total)
+    select coalesce(queue_id::text, ''),
+           count(*) filter (where status = 'pending'),
+           count(*) filter (where status = 'running'),
+           count(*) filter (where status = 'done'),
+           count(*) filter (where status = 'failed'),
+           count(*)
+    from new_rows
+    group by 1
+    on conflict (queue_id) do update
+    set jobs_pending = c.jobs_pending + excluded.jobs_pending,
+        jobs_running = c.jobs_running + excluded.jobs_running,
+        jobs_done = c.jobs_done + excluded.jobs_done,
+        jobs_failed = c.jobs_failed + excluded.jobs_failed,
+        jobs_total = c.jobs_total + excluded.jobs_total,
+        updated_at = now();
+    return null;
+end;
+$$;
+
+drop trigger if exists queue_catalog_submissions_insert on submissions;
+create trigger queue_catalog_submissions_insert
+    after insert on submissions
+    referencing new table as new_rows
+    for each statement execute function queue_catalog_submissions_apply();
+
+drop trigger if exists queue_catalog_submissions_update on submissions;
+create trigger queue_catalog_submissions_update
+    after update on submissions
+    referencing old table as old_rows new table as new_rows
+    for each statement execute function queue_catalog_submissions_apply();
+
+drop trigger if exists queue_catalog_submissions_delete on submissions;
+create trigger queue_catalog_submissions_delete
+    after delete on submissions
+    referencing old table as old_rows
+    for each statement execute function queue_catalog_submissions_apply();
+
+drop trigger if exists queue_catalog_evaluations_insert on evaluations;
+create trigger queue_catalog_evaluations_insert
+    after insert on evaluations
+    referencing new table as new_rows
+    for each statement execute function queue_catalog_evaluations_apply();
+
+drop trigger if exists queue_catalog_evaluations_update on evaluations;
+create trigger queue_catalog_evaluations_update
+    after update on evaluations
+    referencing old table as old_rows new table as new_rows
+    for each statement execute function queue_catalog_evaluations_apply();
+
+drop trigger if exists queue_catalog_evaluations_delete on evaluations;
+create trigger queue_catalog_evaluations_delete
+    after delete on evaluations
+    referencing old table as old_rows
+    for each statement execute function queue_catalog_evaluations_apply();
+
+drop trigger if exists queue_catalog_jobs_insert on judge_jobs;
+create trigger queue_catalog_jobs_insert
+    after insert on judge_jobs
+    referencing new table as new_rows
+    for each statement execute function queue_catalog_jobs_apply();
+
+drop trigger if exists queue_catalog_jobs_update on judge_jobs;
+create trigger queue_catalog_jobs_update
+    after update on judge_jobs
+    referencing old table as old_rows new table as new_rows
+    for each statement execute function queue_catalog_jobs_apply();
+
+drop trigger if exists queue_catalog_jobs_delete on judge_jobs;
+create trigger queue_catalog_jobs_delete
+    after delete on judge_jobs
+    referencing old table as old_rows
+    for each statement execute function queue_catalog_jobs_apply();
+
+-- Rebuild every counter from the source tables. The share locks keep writers
+-- out while the counts are taken so no trigger delta is lost or doubled.
+create or replace function queue_catalog_backfill()
+returns void
+language plpgsql
+as $$
+begin
+    lock table submissions, evaluations, judge_jobs in share mode;
+    delete from queue_catalog;
+
+    insert into queue_catalog (queue_id, submissions, latest_submission_at)
+    select coalesce(queue_id::text, ''), count(*), max(created_at)
+    from submissions
+    group by 1;
+
+    insert into queue_catalog as c (queue_id, evaluations, passes)
+    select coalesce(queue_id::text, ''), count(*), count(*) filter (where verdict = 'pass')
+    from evaluations
+    group by 1
+    on conflict (queue_id) do update
+    set evaluations = excluded.evaluations,
+        passes = excluded.passes;
+
+    insert into queue_catalog as c (queue_id, jobs_pending, jobs_running, jobs_done, jobs_failed, jobs_total)
+    select coalesce(queue_id::text, ''),
+           count(*) filter (where status = 'pending'),
+           count(*) filter (where status = 'running'),
+           count(*) filter (where status = 'done'),
+           count(*) filter (where status = 'failed'),
+           count(*)
+    from judge_jobs
+    group by 1
+    on conflict (queue_id) do update
+    set jobs_pending = excluded.jobs_pending,
+        jobs_running = excluded.jobs_running,
+        jobs_done = excluded.jobs_done,
+        jobs_failed = excluded.jobs_failed,
+        jobs_total = excluded.jobs_total;
+
+    update queue_catalog_status set backfilled_at = now();
+end;
+$$;
+
+create or replace function _queue_catalog_require_backfill()
+returns void
+language plpgsql
+stable
+as $$
+begin
+    if not exists (select 1 from queue_catalog_status where backfilled_at is not null) then
+        raise exception 'queue_catalog has not been backfilled; run select queue_catalog_backfill()';
+    end if;
+end;
+$$;
+
+-- Global totals for the dashboard header.
+create or replace function dashboard_summary()
+returns table (submissions bigint, judges bigint, evaluations bigint, passes bigint, jobs bigint)
+language plpgsql
+stable
+as $$
+begin
+    perform _queue_catalog_require_backfill();
+    return query
+    select coalesce(sum(c.submissions), 0)::bigint,
+           (select count(*) from judges)::bigint,
+           coalesce(sum(c.evaluations), 0)::bigint,
+           coalesce(sum(c.passes), 0)::bigint,
+           coalesce(sum(c.jobs_total), 0)::bigint
+    from queue_catalog c;
+end;
+$$;
+
+-- Queues with submissions, most recently uploaded first.
+create or replace function recent_queue_catalog(p_limit integer default 15)
+returns setof queue_catalog
+language plpgsql
+stable
+as $$
+begin
+    perform _queue_catalog_require_backfill();
+    return query
+    select *
+    from queue_catalog c
+    where c.queue_id <> '' and c.submissions > 0
+    order by c.latest_submission_at desc nulls last
+    limit p_limit;
+end;
+$$;
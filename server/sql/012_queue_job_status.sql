@@ -0,0 +1,34 @@
+-- Live job status for one queue in a single round trip. Reads the
+-- queue_catalog counters once they have been backfilled (011_queue_catalog.sql),
+-- otherwise groups judge_jobs by status in one pass.
+
+create or replace function queue_job_status(p_queue_id text)
+returns table (pending bigint, running bigint, done bigint, failed bigint, total bigint, evaluations bigint)
+language plpgsql
+stable
+as $$
+begin
+    if exists (select 1 from queue_catalog_status where backfilled_at is not null) then
+        return query
+        select coalesce(c.jobs_pending, 0),
+               coalesce(c.jobs_running, 0),
+               coalesce(c.jobs_done, 0),
+               coalesce(c.jobs_failed, 0),
+               coalesce(c.jobs_total, 0),
+               coalesce(c.evaluations, 0)
+        from (select 1) one
+        left join queue_catalog c on c.queue_id = p_queue_id;
+        return;
+    end if;
+
+    return query
+    select count(*) filter (where j.status = 'pending'),
+           count(*) filter (where j.status = 'running'),
+           count(*) filter (where j.status = 'done'),
+           count(*) filter (where j.status = 'failed'),
+           count(*),
+           (select count(*) from evaluations e where e.queue_id = p_queue_id)
+    from judge_jobs j
+    where j.queue_id = p_queue_id;
+end;
+$$;
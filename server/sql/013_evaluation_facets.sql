@@ -0,0 +1,25 @@
+-- Grouped verdict/judge counts behind the evaluations listing's totals and
+-- facets, and an index for the newest-first keyset listing without a queue
+-- filter (010_scan_indexes.sql covers the per-queue case).
+
+create index if not exists evaluations_created_id_idx
+    on evaluations (created_at, id);
+
+create or replace function evaluation_facets(
+    p_queue_id text default null,
+    p_judge_ids text[] default null,
+    p_question_ids text[] default null,
+    p_verdict text default null
+)
+returns table (judge_id text, verdict text, count bigint)
+language sql
+stable
+as $$
+    select e.judge_id::text, e.verdict, count(*)::bigint
+    from evaluations e
+    where (p_queue_id is null or e.queue_id = p_queue_id)
+      and (p_judge_ids is null or e.judge_id::text = any(p_judge_ids))
+      and (p_question_ids is null or e.question_id::text = any(p_question_ids))
+      and (p_verdict is null or e.verdict = p_verdict)
+    group by 1, 2;
+$$;
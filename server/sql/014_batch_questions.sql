@@ -0,0 +1,3 @@
+-- Per-judge switch for batched judging: the worker packs all of a submission's
+-- claimed questions for the judge into one prompt. Off by default.
+alter table judges add column if not exists "batchQuestions" boolean not null default false;
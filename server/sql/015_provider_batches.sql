@@ -0,0 +1,64 @@
+-- Bulk runs through the OpenAI and Anthropic batch APIs. Each submitted batch
+-- is one provider_batches row; its jobs stay `running` under the lease owner
+-- 'bulk:<batch id>' until the results are ingested or the batch is given up.
+
+create table if not exists provider_batches (
+    id uuid primary key,
+    queue_id text,
+    provider text not null,
+    external_id text,
+    status text not null default 'submitting',
+    request_count integer not null default 0,
+    succeeded integer not null default 0,
+    failed integer not null default 0,
+    last_error text,
+    created_at timestamptz not null default now(),
+    updated_at timestamptz not null default now(),
+    completed_at timestamptz
+);
+
+create index if not exists provider_batches_status_idx
+    on provider_batches (status, updated_at);
+
+create index if not exists provider_batches_queue_idx
+    on provider_batches (queue_id, created_at desc);
+
+create index if not exists judge_jobs_lease_owner_idx
+    on judge_jobs (lease_owner, created_at, id)
+    where status = 'running';
+
+-- Claim a queue's pending jobs for the given judges on behalf of one batch.
+-- The lease covers the provider's completion window, so workers leave the
+-- rows alone until it runs out.
+create or replace function claim_bulk_judge_jobs(
+    p_owner text,
+    p_queue_id text,
+    p_judge_ids text[],
+    p_limit integer,
+    p_lease_seconds integer
+)
+returns setof judge_jobs
+language plpgsql
+as $$
+begin
+    return query
+    with candidates as (
+        select id
+        from judge_jobs
+        where status = 'pending'
+          and queue_id = p_queue_id
+          and judge_id::text = any(p_judge_ids)
+        order by created_at
+        limit p_limit
+        for update skip locked
+    )
+    update judge_jobs j
+    set status = 'running',
+        lease_owner = p_owner,
+        lease_expires_at = now() + make_interval(secs => p_lease_seconds),
+        updated_at = now()
+    from candidates c
+    where j.id = c.id
+    returning j.*;
+end;
+$$;
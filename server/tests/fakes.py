@@ -0,0 +1,116 @@
+import asyncio
+import re
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+class FakeQuery:
+    """The slice of the PostgREST query builder the services use, over in-memory rows."""
+
+    def __init__(self, db: "FakeSupabase", table: str) -> None:
+        self.db = db
+        self.table = table
+        self.filters: List[Callable[[Dict[str, Any]], bool]] = []
+        self.ordering: List[tuple] = []
+        self.row_limit: Optional[int] = None
+        self.op: tuple = ("select", None)
+
+    def select(self, columns: str = "*", **_: Any) -> "FakeQuery":
+        return self
+
+    def update(self, payload: Dict[str, Any]) -> "FakeQuery":
+        self.op = ("update", payload)
+        return self
+
+    def insert(self, payload: Dict[str, Any]) -> "FakeQuery":
+        self.op = ("insert", payload)
+        return self
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        self.filters.append(lambda row: str(row.get(column)) == str(value))
+        return self
+
+    def gt(self, column: str, value: Any) -> "FakeQuery":
+        self.filters.append(lambda row: row.get(column) is not None and str(row[column]) > str(value))
+        return self
+
+    def in_(self, column: str, values: List[Any]) -> "FakeQuery":
+        wanted = {str(value) for value in values}
+        self.filters.append(lambda row: str(row.get(column)) in wanted)
+        return self
+
+    def or_(self, expression: str) -> "FakeQuery":
+        # Only the keyset-pagination shapes: `col.gt.v` and `col.gt.v,and(col.eq.v,id.gt.last)`.
+        match = re.fullmatch(r'(\w+)\.gt\."(.*?)"(?:,and\(\1\.eq\."(.*?)",id\.gt\."(.*?)"\))?', expression)
+        column, value, _, last_id = match.groups()
+        self.filters.append(
+            lambda row: row.get(column) is not None
+            and (str(row[column]) > value or (last_id is not None and str(row[column]) == value and str(row["id"]) > last_id))
+        )
+        return self
+
+    def order(self, column: str, desc: bool = False) -> "FakeQuery":
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, count: int) -> "FakeQuery":
+        self.row_limit = count
+        return self
+
+    async def execute(self) -> SimpleNamespace:
+        await asyncio.sleep(0)
+        self.db.calls.append((self.table, self.op[0]))
+        self.db.check(self.table)
+        rows = self.db.tables.setdefault(self.table, [])
+        kind, payload = self.op
+        if kind == "insert":
+            rows.append({"updated_at": "2026-01-01T00:00:00+00:00", **payload})
+            return SimpleNamespace(data=[dict(payload)])
+        matched = [row for row in rows if all(check(row) for check in self.filters)]
+        if kind == "update":
+            for row in matched:
+                row.update(payload)
+            return SimpleNamespace(data=[dict(row) for row in matched])
+        for column, desc in reversed(self.ordering):
+            matched.sort(key=lambda row: str(row[column]), reverse=desc)
+        cap = min(filter(None, (self.row_limit, self.db.max_rows)), default=None)
+        return SimpleNamespace(data=[dict(row) for row in matched[:cap]])
+
+class FakeRpc:
+    def __init__(self, db: "FakeSupabase", name: str, params: Dict[str, Any]) -> None:
+        self.db = db
+        self.name = name
+        self.params = params
+
+    async def execute(self) -> SimpleNamespace:
+        await asyncio.sleep(0)
+        self.db.calls.append((self.name, "rpc"))
+        self.db.check(self.name)
+        if self.name == "upsert_evaluations":
+            rows = self.params["p_rows"]
+            self.db.tables.setdefault("evaluations", []).extend(dict(row) for row in rows)
+            return SimpleNamespace(data=len(rows))
+        raise NotImplementedError(self.name)
+
+class FakeSupabase:
+    """In-memory stand-in for the async Supabase client.
+
+    `fail["judge_jobs"] = n` makes the next `n` calls touching that table (or rpc) raise;
+    `max_rows` caps every select like PostgREST's `db-max-rows`.
+    """
+
+    def __init__(self, tables: Optional[Dict[str, List[Dict[str, Any]]]] = None, max_rows: Optional[int] = None) -> None:
+        self.tables = tables or {}
+        self.max_rows = max_rows
+        self.calls: List[tuple] = []
+        self.fail: Dict[str, int] = {}
+
+    def check(self, name: str) -> None:
+        if self.fail.get(name):
+            self.fail[name] -= 1
+            raise RuntimeError(f"{name} unavailable")
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, name: str, params: Dict[str, Any]) -> FakeRpc:
+        return FakeRpc(self, name, params)
@@ -0,0 +1,144 @@
+import asyncio
+import socket
+import threading
+import time
+import pytest
+import uvicorn
+from anthropic import AsyncAnthropic
+from openai import AsyncOpenAI
+from app.services import bulk_service
+from app.services.bulk_service import _ingest, _record_batch, _recover_submitting, _retrieve, render_request
+from app.services.judge_registry import JudgeSnapshot
+from tests.fakes import FakeSupabase
+from tools import batch_standin
+
+JUDGES = [
+    {"id": "jo", "model": "gpt-4o", "provider": "openai", "system_prompt": "Be strict."},
+    {"id": "ja", "model": "claude-3-5-sonnet", "provider": "anthropic", "system_prompt": "Be strict."},
+]
+BATCH_ID = "8d7f2d1e-0000-4000-8000-000000000001"
+OWNER = f"bulk:{BATCH_ID}"
+
+@pytest.fixture(scope="module")
+def standin():
+    """The batch API stand-in on a free port: finishes immediately, errors every 3rd request."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    batch_standin.OPTIONS.update(delay=0.0, error_every=3)
+    server = uvicorn.Server(uvicorn.Config(batch_standin.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join(timeout=5)
+
+def client_for(provider, base_url):
+    if provider == "openai":
+        return AsyncOpenAI(api_key="local", base_url=f"{base_url}/v1", max_retries=0)
+    return AsyncAnthropic(api_key="local", base_url=base_url, max_retries=0)
+
+def claimed_jobs(judge_id, count=6):
+    submission = {
+        "questions": [{"data": {"id": "q1", "questionText": "What is 2 + 2?"}}],
+        "answers": {"q1": {"text": "4"}},
+    }
+    return [
+        {
+            "id": f"job-{judge_id}-{index}",
+            "submission_id": f"s{index}",
+            "question_id": "q1",
+            "judge_id": judge_id,
+            "queue_id": "queue",
+            "status": "running",
+            "attempts": 0,
+            "lease_owner": OWNER,
+            "created_at": f"2026-01-01T00:00:{index:02d}+00:00",
+            "submission_data": submission,
+        }
+        for index in range(count)
+    ]
+
+def database(jobs):
+    rows = [{key: value for key, value in job.items() if key != "submission_data"} for job in jobs]
+    return FakeSupabase({"judge_jobs": rows, "provider_batches": []})
+
+@pytest.mark.parametrize("provider, judge_id", [("openai", "jo"), ("anthropic", "ja")])
+def test_submitted_batch_is_ingested(standin, provider, judge_id):
+    jobs = claimed_jobs(judge_id)
+    judge = next(row for row in JUDGES if row["id"] == judge_id)
+    db = database(jobs)
+
+    async def scenario():
+        client = client_for(provider, standin)
+        lines = [render_request(provider, job, judge) for job in jobs]
+        row = await _record_batch(db, BATCH_ID, "queue", provider, lines, jobs, client)
+        assert row["status"] == "in_progress"
+        assert await _retrieve(provider, client, row["external_id"]) == ("completed", True)
+        return await _ingest(db, row, client, JudgeSnapshot(JUDGES, 1, 0))
+
+    assert asyncio.run(scenario()) == (4, 2)
+    [batch] = db.tables["provider_batches"]
+    assert batch["status"] == "in_progress" and batch["external_id"]
+    assert sorted(row["submission_id"] for row in db.tables["evaluations"]) == ["s0", "s1", "s3", "s4"]
+    assert all(row["verdict"] in ("pass", "fail") for row in db.tables["evaluations"])
+    statuses = {row["id"]: (row["status"], row["attempts"], row["lease_owner"]) for row in db.tables["judge_jobs"]}
+    assert statuses[f"job-{judge_id}-0"] == ("done", 0, None)
+    # Every third request errors in the stand-in; those jobs go back with one attempt used.
+    assert statuses[f"job-{judge_id}-2"] == ("pending", 1, None)
+    assert statuses[f"job-{judge_id}-5"] == ("pending", 1, None)
+
+def test_failed_submission_releases_jobs():
+    jobs = claimed_jobs("jo", count=2)
+    db = database(jobs)
+    lines = [render_request("openai", job, JUDGES[0]) for job in jobs]
+
+    async def scenario():
+        # Nothing listens on port 9, so the upload fails.
+        client = AsyncOpenAI(api_key="local", base_url="http://127.0.0.1:9/v1", max_retries=0)
+        return await _record_batch(db, BATCH_ID, "queue", "openai", lines, jobs, client)
+
+    row = asyncio.run(scenario())
+    assert row["status"] == "failed"
+    assert db.tables["provider_batches"][0]["status"] == "failed"
+    assert all(job["status"] == "pending" and job["lease_owner"] is None for job in db.tables["judge_jobs"])
+
+def test_failed_insert_releases_jobs(standin):
+    jobs = claimed_jobs("jo", count=2)
+    db = database(jobs)
+    db.fail["provider_batches"] = 1
+    lines = [render_request("openai", job, JUDGES[0]) for job in jobs]
+
+    async def scenario():
+        return await _record_batch(db, BATCH_ID, "queue", "openai", lines, jobs, client_for("openai", standin))
+
+    assert asyncio.run(scenario())["status"] == "failed"
+    assert all(job["status"] == "pending" for job in db.tables["judge_jobs"])
+
+def test_unconfirmed_submission_is_recovered(standin, monkeypatch):
+    jobs = claimed_jobs("ja", count=2)
+    db = database(jobs)
+    lines = [render_request("anthropic", job, JUDGES[1]) for job in jobs]
+
+    async def unavailable(*args):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(bulk_service, "_mark_submitted", unavailable)
+
+    async def scenario():
+        row = await _record_batch(db, BATCH_ID, "queue", "anthropic", lines, jobs, client_for("anthropic", standin))
+        assert row["status"] == "submitting" and row["external_id"]
+        [stored] = db.tables["provider_batches"]
+        # The id never reached the row, so the batch can't be collected.
+        return await _recover_submitting(db, stored)
+
+    assert asyncio.run(scenario()) == 1
+    assert db.tables["provider_batches"][0]["status"] == "failed"
+    assert all(job["status"] == "pending" and job["lease_owner"] is None for job in db.tables["judge_jobs"])
+
+def test_submitting_row_with_external_id_is_tracked():
+    db = FakeSupabase({"provider_batches": [{"id": BATCH_ID, "status": "submitting", "external_id": "batch_1", "updated_at": "t0"}]})
+    assert asyncio.run(_recover_submitting(db, dict(db.tables["provider_batches"][0]))) == 0
+    assert db.tables["provider_batches"][0]["status"] == "in_progress"
@@ -0,0 +1,32 @@
+import asyncio
+from app.services.job_service import renew_job_leases, update_leased_job, update_leased_jobs
+from tests.fakes import FakeSupabase
+
+def jobs_table():
+    return {
+        "judge_jobs": [
+            {"id": "a", "status": "running", "lease_owner": "w1"},
+            {"id": "b", "status": "running", "lease_owner": "w1"},
+            {"id": "c", "status": "running", "lease_owner": "w2"},
+        ]
+    }
+
+def test_update_leased_jobs_writes_once_per_owner():
+    db = FakeSupabase(jobs_table())
+    jobs = [dict(row) for row in db.tables["judge_jobs"]]
+    asyncio.run(update_leased_jobs(db, jobs, {"status": "done"}))
+    assert db.calls == [("judge_jobs", "update"), ("judge_jobs", "update")]
+    assert all(row["status"] == "done" and row["lease_owner"] is None for row in db.tables["judge_jobs"])
+
+def test_update_skips_jobs_whose_lease_moved():
+    db = FakeSupabase(jobs_table())
+    stale = dict(db.tables["judge_jobs"][2], lease_owner="w1")
+    asyncio.run(update_leased_job(db, stale, {"status": "done"}))
+    asyncio.run(update_leased_jobs(db, [stale], {"status": "done"}))
+    assert db.tables["judge_jobs"][2]["status"] == "running"
+    assert db.tables["judge_jobs"][2]["lease_owner"] == "w2"
+
+def test_renewing_no_leases_skips_the_round_trip():
+    db = FakeSupabase()
+    assert asyncio.run(renew_job_leases(db, "w1", [], 60)) == 0
+    assert db.calls == []
@@ -0,0 +1,105 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from app.services import judge_service
+from app.services.judge_service import _parse_batch_verdicts, run_batched_judge
+from app.services.verdict_cache import VerdictCache
+
+def test_parses_a_list_of_verdicts():
+    raw = json.dumps([
+        {"question_id": "q1", "verdict": "pass", "reasoning": " correct "},
+        {"question_id": "q2", "verdict": "fail"},
+    ])
+    assert _parse_batch_verdicts(raw, ["q1", "q2"]) == {"q1": ("pass", "correct"), "q2": ("fail", "")}
+
+def test_parses_a_verdicts_object():
+    raw = json.dumps({"verdicts": [{"question_id": "q1", "verdict": "inconclusive", "reasoning": "unclear"}]})
+    assert _parse_batch_verdicts(raw, ["q1"]) == {"q1": ("inconclusive", "unclear")}
+
+def test_parses_an_array_wrapped_in_prose():
+    raw = 'Here you go:\n```json\n[{"question_id": "q1", "verdict": "pass", "reasoning": "ok"}]\n```'
+    assert _parse_batch_verdicts(raw, ["q1"]) == {"q1": ("pass", "ok")}
+
+def test_drops_invalid_duplicate_and_unknown_items():
+    raw = json.dumps([
+        {"question_id": "q1", "verdict": "maybe"},
+        {"question_id": "q2", "verdict": "pass", "reasoning": "first"},
+        {"question_id": "q2", "verdict": "fail", "reasoning": "second"},
+        {"question_id": "q9", "verdict": "pass"},
+        "not an object",
+        {"verdict": "pass"},
+    ])
+    assert _parse_batch_verdicts(raw, ["q1", "q2"]) == {"q2": ("pass", "first")}
+
+def test_unparseable_replies_yield_nothing():
+    for raw in ("", "no json here", "[not, json]", '{"verdict": "pass"}', '"text"'):
+        assert _parse_batch_verdicts(raw, ["q1"]) == {}
+
+def test_reasoning_is_truncated():
+    raw = json.dumps([{"question_id": "q1", "verdict": "pass", "reasoning": "x" * 2000}])
+    assert len(_parse_batch_verdicts(raw, ["q1"])["q1"][1]) == 1000
+
+SUBMISSION = {
+    "questions": [{"data": {"id": qid, "questionText": f"Question {qid}?"}} for qid in ("q1", "q2", "q3", "q4")],
+    "answers": {"q1": {"text": "one"}, "q2": {"text": "two"}, "q3": {"text": "three"}},
+}
+JUDGES = {"j1": {"id": "j1", "model": "gpt-4o", "provider": "openai", "system_prompt": "Be strict."}}
+
+def fake_provider(monkeypatch, replies):
+    prompts = []
+
+    async def call(provider, clients, model, prompt, max_tokens):
+        prompts.append(prompt)
+        return replies.pop(0)
+
+    monkeypatch.setattr(judge_service, "_call_provider", call)
+    return prompts
+
+def test_batched_judge_asks_once_and_returns_only_answered_questions(monkeypatch):
+    prompts = fake_provider(monkeypatch, [json.dumps([
+        {"question_id": "q1", "verdict": "pass", "reasoning": "ok"},
+        {"question_id": "q3", "verdict": "fail", "reasoning": "wrong"},
+    ])])
+    results = asyncio.run(run_batched_judge("s1", SUBMISSION, ["q1", "q2", "q3", "q4"], "j1", {}, JUDGES))
+
+    assert len(prompts) == 1
+    assert all(qid in prompts[0] for qid in ("q1", "q2", "q3"))
+    assert "q4" not in prompts[0]
+    assert sorted(results) == ["q1", "q3"]
+    assert results["q3"]["verdict"] == "fail"
+    assert results["q3"]["submission_id"] == "s1"
+
+def test_batched_judge_serves_cached_verdicts_and_stores_new_ones(monkeypatch):
+    cache = VerdictCache()
+    prompts = fake_provider(monkeypatch, [
+        json.dumps([{"question_id": q, "verdict": "pass", "reasoning": "ok"} for q in ("q1", "q2")]),
+    ])
+
+    async def scenario():
+        first = await run_batched_judge("s1", SUBMISSION, ["q1", "q2"], "j1", {}, JUDGES, cache=cache)
+        second = await run_batched_judge("s2", SUBMISSION, ["q1", "q2"], "j1", {}, JUDGES, cache=cache)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert len(prompts) == 1
+    assert sorted(first) == sorted(second) == ["q1", "q2"]
+    assert second["q1"]["submission_id"] == "s2"
+
+def test_batched_judge_leaves_a_single_pending_question_to_the_caller(monkeypatch):
+    prompts = fake_provider(monkeypatch, [])
+    results = asyncio.run(run_batched_judge("s1", SUBMISSION, ["q1"], "j1", {}, JUDGES))
+    assert results == {}
+    assert prompts == []
+
+def test_batched_judge_reserves_the_batch_completion_budget(monkeypatch):
+    prompts = fake_provider(monkeypatch, ["[]"])
+    reserved = []
+
+    class Limiter:
+        @asynccontextmanager
+        async def slot(self, tokens=0):
+            reserved.append(tokens)
+            yield self
+
+    asyncio.run(run_batched_judge("s1", SUBMISSION, ["q1", "q2", "q3"], "j1", {}, JUDGES, limiter=Limiter()))
+    assert reserved == [len(prompts[0]) // 4 + 3 * judge_service.VERDICT_MAX_TOKENS]
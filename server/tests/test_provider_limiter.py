@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from app.services.provider_limiter import ProviderLimiter, is_congestion_error
+
+class RateLimited(Exception):
+    status_code = 429
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_congestion_errors_are_recognized():
+    assert is_congestion_error(RateLimited())
+    assert is_congestion_error(asyncio.TimeoutError())
+    assert is_congestion_error(RuntimeError("Rate limit exceeded"))
+    assert not is_congestion_error(ValueError("bad prompt"))
+
+def test_success_grows_window_additively():
+    limiter = ProviderLimiter("test", None, None, initial_window=4, max_window=32)
+
+    async def scenario():
+        for _ in range(4):
+            async with limiter.slot():
+                pass
+
+    run(scenario())
+    assert 4.9 < limiter.window < 5.0
+    assert limiter.successes == 4
+    assert limiter.in_flight == 0
+
+def test_window_is_capped_at_max():
+    limiter = ProviderLimiter("test", None, None, initial_window=2, max_window=2)
+
+    async def scenario():
+        async with limiter.slot():
+            pass
+
+    run(scenario())
+    assert limiter.window == 2
+
+def test_congestion_halves_window_down_to_min():
+    limiter = ProviderLimiter("test", None, None, initial_window=8, min_window=3)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(RateLimited):
+                async with limiter.slot():
+                    raise RateLimited()
+
+    run(scenario())
+    assert limiter.window == 3
+    assert limiter.congestions == 2
+    assert limiter.in_flight == 0
+
+def test_other_errors_release_without_changing_window():
+    limiter = ProviderLimiter("test", None, None, initial_window=4)
+
+    async def scenario():
+        with pytest.raises(ValueError):
+            async with limiter.slot():
+                raise ValueError("bad prompt")
+
+    run(scenario())
+    assert limiter.window == 4
+    assert limiter.successes == limiter.congestions == 0
+    assert limiter.in_flight == 0
+
+def test_in_flight_never_exceeds_window():
+    limiter = ProviderLimiter("test", None, None, initial_window=2, max_window=2)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        async with limiter.slot():
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        await asyncio.gather(*(call() for _ in range(6)))
+
+    run(scenario())
+    assert peak == 2
+    assert limiter.in_flight == 0
@@ -0,0 +1,27 @@
+import uuid
+import pytest
+from app.services.queue_service import JOB_ID_NAMESPACE, _answer_text, job_id_for
+
+@pytest.mark.parametrize(
+    "parts",
+    [
+        ("sub-1", "q1", "judge-1"),
+        ("", "", ""),
+        ("ünïcode", "q/1", "3f2b8a2e-0000-4000-8000-000000000000"),
+    ],
+)
+def test_job_id_matches_uuid5(parts):
+    expected = uuid.uuid5(JOB_ID_NAMESPACE, "\x1f".join(parts))
+    assert job_id_for(*parts) == str(expected)
+
+def test_job_id_is_stable_and_distinct():
+    assert job_id_for("s", "q", "j") == job_id_for("s", "q", "j")
+    assert len({job_id_for("s", "q", "j"), job_id_for("s", "q", "k"), job_id_for("sq", "", "j")}) == 3
+
+def test_answer_text():
+    data = {"answers": {"q1": {"choice": "A", "reasoning": "because"}, "q2": 42, "q3": ""}}
+    assert _answer_text(data, "q1") == "A because"
+    assert _answer_text(data, "q2") == "42"
+    assert _answer_text(data, "q3") is None
+    assert _answer_text(data, "missing") is None
+    assert _answer_text({}, "q1") is None
@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from app.services.simhash_index import SimhashIndex, SimhashIndexRegistry, _IndexEntry
+from tests.fakes import FakeSupabase
+
+def flip(value, *bits):
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+BASE = 0x0123456789ABCDEF
+
+def test_query_returns_neighbours_nearest_first():
+    index = SimhashIndex()
+    index.add("same", BASE)
+    index.add("one", flip(BASE, 3))
+    index.add("three", flip(BASE, 1, 20, 40))
+    index.add("far", ~BASE)
+
+    assert index.query(BASE, 0) == [("same", 0)]
+    assert index.query(BASE, 3) == [("same", 0), ("one", 1), ("three", 3)]
+
+def test_large_k_scans_every_item():
+    index = SimhashIndex(blocks=4)
+    index.add("a", BASE)
+    # Differs in every 16-bit block, so no block table shares a key with BASE.
+    spread = flip(BASE, 0, 16, 32, 48, 1)
+    index.add("b", spread)
+    assert index.query(BASE, 3) == [("a", 0)]
+    assert index.query(BASE, 5) == [("a", 0), ("b", 5)]
+
+def test_negative_fingerprints_match_their_unsigned_form():
+    index = SimhashIndex()
+    index.add("signed", -1)
+    assert index.query((1 << 64) - 1, 0) == [("signed", 0)]
+
+def test_re_adding_and_removing_update_the_tables():
+    index = SimhashIndex()
+    index.add("a", BASE)
+    index.add("a", ~BASE)
+    assert index.query(BASE, 3) == []
+    assert len(index) == 1
+    index.remove("a")
+    index.remove("missing")
+    assert "a" not in index
+    assert index.query(~BASE, 0) == []
+    assert all(not table for table in index._tables)
+
+def test_add_many_skips_missing_fingerprints():
+    index = SimhashIndex()
+    index.add_many([("a", BASE), ("b", None)])
+    assert len(index) == 1
+    assert index.get("a") == BASE
+
+def test_clusters_are_transitive_and_sorted_by_size():
+    index = SimhashIndex()
+    # a-b and b-c are within 2 bits, a-c is not: still one component.
+    index.add_many([
+        ("a", BASE),
+        ("b", flip(BASE, 1, 2)),
+        ("c", flip(BASE, 1, 2, 9, 10)),
+        ("x", ~BASE),
+        ("y", flip(~BASE, 5)),
+        ("lonely", 0x5555555555555555),
+    ])
+    assert index.clusters(2) == [["a", "b", "c"], ["x", "y"]]
+    assert index.clusters(2, min_size=3) == [["a", "b", "c"]]
+    assert index.clusters(0) == []
+
+def test_blocks_must_fit_in_the_hash():
+    with pytest.raises(ValueError):
+        SimhashIndex(blocks=0)
+    with pytest.raises(ValueError):
+        SimhashIndex(blocks=65)
+
+def test_refresh_pages_through_every_change_since_the_watermark():
+    rows = [
+        {"id": f"e{i:02d}", "queue_id": "queue", "reasoning_simhash": i, "created_at": f"2026-01-01T00:00:{i:02d}", "updated_at": None}
+        for i in range(10)
+    ]
+    db = FakeSupabase({"evaluations": rows}, max_rows=3)
+    registry = SimhashIndexRegistry(page_size=3)
+    entry = _IndexEntry(SimhashIndex())
+    asyncio.run(registry._load(db, "evaluations", "queue", entry))
+    assert len(entry.index) == 10
+
+    # More changes than fit in one page, across both timestamp columns.
+    for i in range(10, 17):
+        rows.append({"id": f"e{i:02d}", "queue_id": "queue", "reasoning_simhash": i, "created_at": f"2026-01-01T00:00:{i:02d}", "updated_at": None})
+    rows[0].update(reasoning_simhash=100, updated_at="2026-01-01T00:01:00")
+    rows[1].update(reasoning_simhash=101, updated_at="2026-01-01T00:01:00")
+    rows.append({"id": "other", "queue_id": "elsewhere", "reasoning_simhash": 5, "created_at": "2026-01-01T00:02:00", "updated_at": None})
+    asyncio.run(registry._refresh(db, "queue", entry))
+
+    assert len(entry.index) == 17
+    assert entry.index.get("e00") == 100 and entry.index.get("e01") == 101
+    assert entry.watermark == "2026-01-01T00:01:00"
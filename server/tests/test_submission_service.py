@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+from app.services.submission_service import iter_json_records
+
+def parse(*chunks):
+    async def source():
+        for chunk in chunks:
+            yield chunk if isinstance(chunk, bytes) else chunk.encode("utf-8")
+
+    async def collect():
+        return [record async for record in iter_json_records(source())]
+
+    return asyncio.run(collect())
+
+def test_ndjson():
+    assert parse('{"id": 1}\n{"id": 2}\n', '\n{"id": 3}') == [{"id": 1}, {"id": 2}, {"id": 3}]
+
+def test_array_split_across_chunks():
+    text = '[{"id": 1, "text": "a, b"}, {"id": 2}]'
+    chunks = [text[i:i + 3] for i in range(0, len(text), 3)]
+    assert parse(*chunks) == [{"id": 1, "text": "a, b"}, {"id": 2}]
+
+def test_multibyte_characters_split_across_chunks():
+    data = '{"answer": "café ✓"}'.encode("utf-8")
+    split = data.index("✓".encode("utf-8")) + 1
+    assert parse(data[:split], data[split:]) == [{"answer": "café ✓"}]
+
+def test_large_record_in_many_small_chunks():
+    text = '{"answer": "' + "x" * 5000 + '"}'
+    chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+    assert parse(*chunks) == [{"answer": "x" * 5000}]
+
+def test_empty_input():
+    assert parse() == []
+    assert parse("[]") == []
+
+@pytest.mark.parametrize(
+    "chunks, message",
+    [
+        (['[{"id": 1}'], "not closed"),
+        (['{"id": 1}\n{"id":'], "Malformed"),
+        (['[1, 2]'], "JSON object"),
+        (['{"id": 1}\n"text"\n'], "JSON object"),
+    ],
+)
+def test_invalid_input(chunks, message):
+    with pytest.raises(ValueError, match=message):
+        parse(*chunks)
+
+@pytest.mark.parametrize("tail", ['{"id": 2}', ", ", "]", "[]"])
+def test_data_after_closing_bracket_is_rejected(tail):
+    with pytest.raises(ValueError, match="after end of JSON array"):
+        parse('[{"id": 1}]', tail)
+
+def test_whitespace_after_closing_bracket_is_allowed():
+    assert parse('[{"id": 1}]', " \r\n\t") == [{"id": 1}]
+
+@pytest.mark.parametrize(
+    "chunks, message",
+    [
+        (['[,{"id": 1}]'], "Unexpected comma"),
+        (['[{"id": 1},', ',{"id": 2}]'], "Unexpected comma"),
+        (['[,]'], "Unexpected comma"),
+        (['[{"id": 1},]'], "Trailing comma"),
+        (['[{"id": 1} {"id": 2}]'], "Missing comma"),
+    ],
+)
+def test_stray_commas_in_arrays_are_rejected(chunks, message):
+    with pytest.raises(ValueError, match=message):
+        parse(*chunks)
+
+def test_commas_may_be_split_from_their_records():
+    assert parse('[{"id": 1}', " ,", '\n{"id": 2}', "]") == [{"id": 1}, {"id": 2}]
@@ -0,0 +1,67 @@
+import asyncio
+from app.services.verdict_cache import VerdictCache, verdict_cache_key
+
+def test_cache_key_covers_every_input():
+    base = ("openai", "gpt-4o", "system", "question", "answer")
+    key = verdict_cache_key(*base)
+    assert key == verdict_cache_key(*base)
+    for index in range(len(base)):
+        changed = list(base)
+        changed[index] = changed[index] + "!"
+        assert verdict_cache_key(*changed) != key
+
+def test_concurrent_misses_compute_once():
+    cache = VerdictCache()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "pass", "fine"
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == [("pass", "fine")] * 5
+    assert calls == 1
+    assert cache.misses == 1
+    assert cache.coalesced == 4
+
+def test_compute_errors_reach_every_waiter_and_are_not_cached():
+    cache = VerdictCache()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("provider down")
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert asyncio.run(cache.lookup("k")) is None
+
+def test_lookup_and_store():
+    cache = VerdictCache()
+
+    async def scenario():
+        assert await cache.lookup("k") is None
+        await cache.store("k", ("fail", "wrong"))
+        return await cache.lookup("k")
+
+    assert asyncio.run(scenario()) == ("fail", "wrong")
+    assert cache.local_hits == 1
+    assert cache.misses == 1
+
+def test_local_entries_are_evicted_least_recently_used_first():
+    cache = VerdictCache(max_entries=2)
+
+    async def scenario():
+        await cache.store("a", ("pass", ""))
+        await cache.store("b", ("pass", ""))
+        await cache.lookup("a")
+        await cache.store("c", ("pass", ""))
+        return [await cache.lookup(key) is not None for key in ("a", "b", "c")]
+
+    assert asyncio.run(scenario()) == [True, False, True]
@@ -0,0 +1,41 @@
+from app.services.judge_registry import JudgeSnapshot
+from worker import group_jobs
+
+JUDGES = JudgeSnapshot(
+    [
+        {"id": "batched", "model": "gpt-4o", "provider": "openai", "batchQuestions": True},
+        {"id": "single", "model": "gpt-4o", "provider": "openai"},
+        {"id": "dedalus", "model": "gpt-4o", "provider": "dedalus", "batchQuestions": True},
+    ],
+    version=1,
+    generation=0,
+)
+
+def job(job_id, submission_id, judge_id, question_id="q1"):
+    return {"id": job_id, "submission_id": submission_id, "judge_id": judge_id, "question_id": question_id}
+
+def ids(groups):
+    return [[item["id"] for item in group] for group in groups]
+
+def test_batch_question_judges_group_by_submission():
+    jobs = [
+        job("a", "s1", "batched", "q1"),
+        job("b", "s2", "batched", "q1"),
+        job("c", "s1", "batched", "q2"),
+        job("d", "s1", "batched", "q3"),
+    ]
+    assert ids(group_jobs(jobs, JUDGES)) == [["a", "c", "d"], ["b"]]
+
+def test_other_judges_stay_one_job_per_group():
+    jobs = [
+        job("a", "s1", "single", "q1"),
+        job("b", "s1", "single", "q2"),
+        job("c", "s1", "dedalus", "q1"),
+        job("d", "s1", "dedalus", "q2"),
+        job("e", "s1", "unknown", "q1"),
+    ]
+    assert ids(group_jobs(jobs, JUDGES)) == [["a"], ["b"], ["c"], ["d"], ["e"]]
+
+def test_judges_do_not_share_groups():
+    jobs = [job("a", "s1", "batched", "q1"), job("b", "s1", "single", "q2"), job("c", "s1", "batched", "q2")]
+    assert ids(group_jobs(jobs, JUDGES)) == [["a", "c"], ["b"]]
@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+from app.services.write_behind import WriteBehindBuffer
+from tests.fakes import FakeSupabase
+
+def evaluation(submission_id, verdict="pass", reasoning="looks right"):
+    return {"submission_id": submission_id, "question_id": "q1", "judge_id": "j1", "verdict": verdict, "reasoning": reasoning}
+
+def job_rows():
+    return [
+        {"id": "job-1", "status": "running", "attempts": 0, "lease_owner": "w1"},
+        {"id": "job-2", "status": "running", "attempts": 2, "lease_owner": "w1"},
+        {"id": "job-3", "status": "running", "attempts": 0, "lease_owner": "w2"},
+    ]
+
+def test_flush_writes_evaluations_before_transitions():
+    db = FakeSupabase({"judge_jobs": job_rows()})
+    buffer = WriteBehindBuffer(db)
+    jobs = {row["id"]: dict(row) for row in job_rows()}
+    buffer.add_evaluation(evaluation("s1"))
+    buffer.add_evaluation(evaluation("s1", verdict="fail"))
+    buffer.mark_done(jobs["job-1"])
+    buffer.mark_failed(jobs["job-2"], RuntimeError("boom"))
+    buffer.mark_done(jobs["job-3"])
+    assert buffer.pending() == 4
+
+    asyncio.run(buffer.flush())
+
+    assert buffer.pending() == 0
+    assert db.calls[0] == ("upsert_evaluations", "rpc")
+    assert [row["verdict"] for row in db.tables["evaluations"]] == ["fail"]
+    assert "reasoning_simhash" in db.tables["evaluations"][0]
+    rows = {row["id"]: row for row in db.tables["judge_jobs"]}
+    assert rows["job-1"]["status"] == rows["job-3"]["status"] == "done"
+    assert rows["job-2"]["status"] == "failed"
+    assert rows["job-2"]["last_error"] == "boom"
+    assert all(row["lease_owner"] is None for row in rows.values())
+
+def test_flush_with_nothing_pending_is_a_no_op():
+    db = FakeSupabase()
+    asyncio.run(WriteBehindBuffer(db).flush())
+    assert db.calls == []
+
+def test_failed_evaluation_upsert_restores_everything():
+    db = FakeSupabase({"judge_jobs": job_rows()})
+    db.fail["upsert_evaluations"] = 1
+    buffer = WriteBehindBuffer(db)
+    buffer.add_evaluation(evaluation("s1"))
+    buffer.mark_done(job_rows()[0])
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(buffer.flush())
+
+    assert buffer.pending() == 2
+    assert db.tables["judge_jobs"][0]["status"] == "running"
+    asyncio.run(buffer.flush())
+    assert buffer.pending() == 0
+    assert db.tables["judge_jobs"][0]["status"] == "done"
+
+def test_failed_transition_keeps_only_unwritten_jobs():
+    db = FakeSupabase({"judge_jobs": job_rows()})
+    buffer = WriteBehindBuffer(db)
+    buffer.add_evaluation(evaluation("s1"))
+    buffer.mark_done(job_rows()[0])
+    buffer.mark_failed(job_rows()[1], RuntimeError("boom"))
+
+    async def scenario():
+        # The first group's update goes through, the second one fails.
+        original = db.check
+        seen = []
+
+        def check(name):
+            if name == "judge_jobs":
+                seen.append(name)
+                if len(seen) == 2:
+                    raise RuntimeError("judge_jobs unavailable")
+            original(name)
+
+        db.check = check
+        with pytest.raises(RuntimeError):
+            await buffer.flush()
+
+    asyncio.run(scenario())
+    assert len(db.tables["evaluations"]) == 1
+    assert buffer.pending() == 1
+    assert db.tables["judge_jobs"][0]["status"] == "done"
+    assert db.tables["judge_jobs"][1]["status"] == "running"
+
+def test_items_queued_during_a_failed_flush_win_over_restored_ones():
+    db = FakeSupabase({"judge_jobs": job_rows()})
+    buffer = WriteBehindBuffer(db)
+    buffer.add_evaluation(evaluation("s1", verdict="pass"))
+
+    async def scenario():
+        original = db.check
+
+        def check(name):
+            # Simulate a newer verdict arriving while the upsert is in flight.
+            buffer.add_evaluation(evaluation("s1", verdict="fail"))
+            raise RuntimeError(f"{name} unavailable")
+
+        db.check = check
+        with pytest.raises(RuntimeError):
+            await buffer.flush()
+        db.check = original
+        await buffer.flush()
+
+    asyncio.run(scenario())
+    assert [row["verdict"] for row in db.tables["evaluations"]] == ["fail"]
@@ -0,0 +1,235 @@
+"""Local stand-in for the OpenAI and Anthropic batch APIs.
+
+Implements just enough of both batch surfaces for bulk runs to be exercised
+end to end without provider keys. Run from the server directory:
+
+    python -m tools.batch_standin --port 8090 --delay 5
+
+then point the API and worker at it:
+
+    OPENAI_BATCH_BASE_URL=http://localhost:8090/v1
+    ANTHROPIC_BATCH_BASE_URL=http://localhost:8090
+
+Batches finish `--delay` seconds after creation. Each request gets a
+deterministic pass/fail verdict, and every `--error-every`th request errors so
+the retry path can be exercised too.
+"""
+import argparse
+import hashlib
+import json
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+from typing import Any, Dict, List
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+app = FastAPI(title="Batch API stand-in")
+
+FILES: Dict[str, Dict[str, Any]] = {}
+BATCHES: Dict[str, Dict[str, Any]] = {}
+OPTIONS = {"delay": 5.0, "error_every": 0}
+
+def _reply(prompt: str) -> str:
+    verdict = "pass" if hashlib.sha256(prompt.encode("utf-8")).digest()[0] % 2 == 0 else "fail"
+    return json.dumps({"verdict": verdict, "reasoning": "stand-in verdict"})
+
+def _prompt(params: Dict[str, Any]) -> str:
+    return " ".join(str(message.get("content", "")) for message in params.get("messages") or [])
+
+def _errors(index: int) -> bool:
+    every = OPTIONS["error_every"]
+    return bool(every) and (index + 1) % every == 0
+
+def _finished(batch: Dict[str, Any]) -> bool:
+    return time.time() - batch["created_at"] >= OPTIONS["delay"]
+
+# OpenAI: files + batches
+
+def _file_object(file_id: str) -> Dict[str, Any]:
+    stored = FILES[file_id]
+    return {
+        "id": file_id,
+        "object": "file",
+        "bytes": len(stored["content"]),
+        "created_at": stored["created_at"],
+        "filename": stored["filename"],
+        "purpose": stored["purpose"],
+        "status": "processed",
+    }
+
+def _store_file(content: bytes, filename: str, purpose: str) -> str:
+    file_id = f"file-{uuid.uuid4().hex}"
+    FILES[file_id] = {"content": content, "filename": filename, "purpose": purpose, "created_at": int(time.time())}
+    return file_id
+
+@app.post("/v1/files")
+async def create_file(request: Request):
+    raw = await request.body()
+    header = f"Content-Type: {request.headers['content-type']}\r\n\r\n".encode("utf-8")
+    message = BytesParser(policy=HTTP).parsebytes(header + raw)
+    fields: Dict[str, Any] = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        fields[name] = (part.get_filename(), part.get_payload(decode=True))
+    if "file" not in fields:
+        raise HTTPException(status_code=400, detail="file is required")
+    filename, content = fields["file"]
+    purpose = (fields.get("purpose") or (None, b"batch"))[1].decode("utf-8")
+    return _file_object(_store_file(content, filename or "upload.jsonl", purpose))
+
+@app.get("/v1/files/{file_id}/content")
+async def file_content(file_id: str):
+    if file_id not in FILES:
+        raise HTTPException(status_code=404, detail="file not found")
+    return PlainTextResponse(FILES[file_id]["content"].decode("utf-8"))
+
+def _openai_batch(batch: Dict[str, Any]) -> Dict[str, Any]:
+    if batch["status"] == "in_progress" and _finished(batch):
+        output: List[str] = []
+        errors: List[str] = []
+        for index, line in enumerate(FILES[batch["input_file_id"]]["content"].decode("utf-8").splitlines()):
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            if _errors(index):
+                errors.append(json.dumps({
+                    "id": f"batch_req_{uuid.uuid4().hex}",
+                    "custom_id": request["custom_id"],
+                    "response": {"status_code": 500, "body": {"error": {"message": "stand-in error"}}},
+                    "error": None,
+                }))
+                continue
+            body = {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "model": request["body"].get("model"),
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": _reply(_prompt(request["body"]))}}],
+            }
+            output.append(json.dumps({
+                "id": f"batch_req_{uuid.uuid4().hex}",
+                "custom_id": request["custom_id"],
+                "response": {"status_code": 200, "body": body},
+                "error": None,
+            }))
+        batch["output_file_id"] = _store_file("\n".join(output).encode("utf-8"), "output.jsonl", "batch_output")
+        if errors:
+            batch["error_file_id"] = _store_file("\n".join(errors).encode("utf-8"), "errors.jsonl", "batch_output")
+        batch["request_counts"] = {"total": len(output) + len(errors), "completed": len(output), "failed": len(errors)}
+        batch["status"] = "completed"
+        batch["completed_at"] = int(time.time())
+    return {key: value for key, value in batch.items() if key != "kind"}
+
+@app.post("/v1/batches")
+async def create_openai_batch(payload: Dict[str, Any]):
+    if payload.get("input_file_id") not in FILES:
+        raise HTTPException(status_code=400, detail="unknown input_file_id")
+    batch_id = f"batch_{uuid.uuid4().hex}"
+    BATCHES[batch_id] = {
+        "kind": "openai",
+        "id": batch_id,
+        "object": "batch",
+        "endpoint": payload.get("endpoint"),
+        "input_file_id": payload["input_file_id"],
+        "completion_window": payload.get("completion_window", "24h"),
+        "metadata": payload.get("metadata"),
+        "status": "in_progress",
+        "created_at": int(time.time()),
+        "output_file_id": None,
+        "error_file_id": None,
+        "request_counts": {"total": 0, "completed": 0, "failed": 0},
+    }
+    return _openai_batch(BATCHES[batch_id])
+
+@app.get("/v1/batches/{batch_id}")
+async def get_openai_batch(batch_id: str):
+    batch = BATCHES.get(batch_id)
+    if batch is None or batch["kind"] != "openai":
+        raise HTTPException(status_code=404, detail="batch not found")
+    return _openai_batch(batch)
+
+# Anthropic: message batches
+
+def _anthropic_batch(batch: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+    ended = _finished(batch)
+    total = len(batch["requests"])
+    errored = sum(1 for index in range(total) if _errors(index)) if ended else 0
+    return {
+        "id": batch["id"],
+        "type": "message_batch",
+        "processing_status": "ended" if ended else "in_progress",
+        "request_counts": {
+            "processing": 0 if ended else total,
+            "succeeded": total - errored if ended else 0,
+            "errored": errored,
+            "canceled": 0,
+            "expired": 0,
+        },
+        "created_at": batch["created"],
+        "expires_at": batch["created"],
+        "ended_at": batch["created"] if ended else None,
+        "archived_at": None,
+        "cancel_initiated_at": None,
+        "results_url": f"{base_url}v1/messages/batches/{batch['id']}/results" if ended else None,
+    }
+
+@app.post("/v1/messages/batches")
+async def create_anthropic_batch(payload: Dict[str, Any], request: Request):
+    batch_id = f"msgbatch_{uuid.uuid4().hex}"
+    BATCHES[batch_id] = {
+        "kind": "anthropic",
+        "id": batch_id,
+        "requests": payload.get("requests") or [],
+        "created_at": time.time(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    return _anthropic_batch(BATCHES[batch_id], str(request.base_url))
+
+@app.get("/v1/messages/batches/{batch_id}")
+async def get_anthropic_batch(batch_id: str, request: Request):
+    batch = BATCHES.get(batch_id)
+    if batch is None or batch["kind"] != "anthropic":
+        raise HTTPException(status_code=404, detail="batch not found")
+    return _anthropic_batch(batch, str(request.base_url))
+
+@app.get("/v1/messages/batches/{batch_id}/results")
+async def anthropic_results(batch_id: str):
+    batch = BATCHES.get(batch_id)
+    if batch is None or batch["kind"] != "anthropic" or not _finished(batch):
+        raise HTTPException(status_code=404, detail="results not available")
+    lines = []
+    for index, item in enumerate(batch["requests"]):
+        params = item.get("params") or {}
+        if _errors(index):
+            result = {"type": "errored", "error": {"type": "error", "error": {"type": "api_error", "message": "stand-in error"}}}
+        else:
+            result = {
+                "type": "succeeded",
+                "message": {
+                    "id": f"msg_{uuid.uuid4().hex}",
+                    "type": "message",
+                    "role": "assistant",
+                    "model": params.get("model"),
+                    "content": [{"type": "text", "text": _reply(_prompt(params))}],
+                    "stop_reason": "end_turn",
+                    "stop_sequence": None,
+                    "usage": {"input_tokens": 0, "output_tokens": 0},
+                },
+            }
+        lines.append(json.dumps({"custom_id": item.get("custom_id"), "result": result}))
+    return PlainTextResponse("\n".join(lines), media_type="application/x-jsonl")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--delay", type=float, default=5.0, help="seconds until a batch finishes")
+    parser.add_argument("--error-every", type=int, default=0, help="fail every Nth request (0 = never)")
+    args = parser.parse_args()
+    OPTIONS.update(delay=args.delay, error_every=args.error_every)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -1,86 +1,268 @@
 import asyncio
 import os
-import time
-from datetime import datetime, timezone
-from typing import Any, Dict
+import socket
+import uuid
+from typing import Any, Dict, List, Optional, Set
 import backoff
 from dotenv import load_dotenv
-from app.core.llm import (
-    get_anthropic_client,
-    get_gemini_client,
-    get_groq_client,
-    get_openai_client,
-)
-from app.core.supabase import get_supabase_client
-from app.services.runner_service import run_ai_judge_job
+from app.core.config import get_settings
+from app.core.llm import get_provider_clients
+from app.core.supabase import get_async_supabase_client
+from app.services.bulk_service import poll_bulk_batches
+from app.services.job_service import claim_jobs, renew_job_leases
+from app.services.judge_registry import JudgeSnapshot, get_judge_registry
+from app.services.provider_limiter import get_provider_limiter, is_congestion_error, limiter_snapshots
+from app.services.runner_service import run_ai_judge_batch, run_ai_judge_job
+from app.services.submission_cache import SubmissionCache, require_submission
+from app.services.verdict_cache import VerdictCache
+from app.services.write_behind import WriteBehindBuffer
 
 load_dotenv()
 
-CONCURRENCY = 4
+CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "32"))
 BATCH_SIZE = 10
+READY_QUEUE_SIZE = int(os.getenv("WORKER_READY_QUEUE_SIZE", str(CONCURRENCY * 2)))
 POLL_INTERVAL = 5.0
-JUDGES_REFRESH = 60
+STATS_INTERVAL = 60
+LEASE_SECONDS = int(os.getenv("WORKER_LEASE_SECONDS", "300"))
+MAX_ATTEMPTS = 3
+WRITE_BEHIND_MAX_ITEMS = int(os.getenv("WORKER_WRITE_BATCH_SIZE", "200"))
+WRITE_BEHIND_INTERVAL = float(os.getenv("WORKER_WRITE_INTERVAL", "0.5"))
+VERDICT_CACHE_ENTRIES = int(os.getenv("VERDICT_CACHE_ENTRIES", "10000"))
+VERDICT_CACHE_TTL = int(os.getenv("VERDICT_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+VERDICT_CACHE_MAX_ROWS = int(os.getenv("VERDICT_CACHE_MAX_ROWS", "1000000"))
+VERDICT_CACHE_PRUNE_INTERVAL = 3600
+SUBMISSION_CACHE_ENTRIES = int(os.getenv("WORKER_SUBMISSION_CACHE_ENTRIES", "5000"))
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def job_provider(job: Dict[str, Any], judges: JudgeSnapshot) -> Optional[str]:
+    return judges.providers.get(str(job.get("judge_id")))
 
-def should_retry(exc: Exception) -> bool:
-    err_str = str(exc).lower()
-    return "rate limit" in err_str or "timeout" in err_str or "429" in err_str
+def group_jobs(jobs: List[Dict[str, Any]], judges: JudgeSnapshot) -> List[List[Dict[str, Any]]]:
+    """Claimed jobs as units of work: one group per (submission, judge) for `batchQuestions` judges."""
+    groups: Dict[Any, List[Dict[str, Any]]] = {}
+    for job in jobs:
+        judge_id = str(job.get("judge_id"))
+        judge = judges.judges.get(judge_id) or {}
+        if judge.get("batchQuestions") and judges.providers.get(judge_id) != "dedalus":
+            key = (str(job.get("submission_id")), judge_id)
+        else:
+            key = str(job["id"])
+        groups.setdefault(key, []).append(job)
+    return list(groups.values())
 
 @backoff.on_exception(
     backoff.expo,
     Exception,
     max_tries=10,
     jitter=backoff.random_jitter,
-    giveup=lambda exc: not should_retry(exc),
+    giveup=lambda exc: not is_congestion_error(exc),
 )
-async def process_job(job: Dict[str, Any], judges_map: Dict[str, Dict[str, Any]]):
-    supabase = get_supabase_client()
-    provider_clients = {
-        "llama": get_groq_client(),
-        "openai": get_openai_client(),
-        "anthropic": get_anthropic_client(),
-        "gemini": get_gemini_client(),
-    }
-    filtered_clients = {key: value for key, value in provider_clients.items() if value is not None}
-    await run_ai_judge_job(job, judges_map, supabase, filtered_clients)
-
-async def fetch_judges_map() -> Dict[str, Dict[str, Any]]:
-    supabase = get_supabase_client()
-    response = supabase.table("judges").select("*").execute()
-    return {str(judge["id"]): judge for judge in (response.data or [])}
+async def attempt_job(
+    job: Dict[str, Any],
+    judges: JudgeSnapshot,
+    writer: WriteBehindBuffer,
+    cache: VerdictCache,
+    submissions: SubmissionCache,
+):
+    supabase = await get_async_supabase_client()
+    await submissions.attach([job])
+    require_submission(job)
+    await run_ai_judge_job(
+        job,
+        judges.judges,
+        supabase,
+        get_provider_clients(),
+        reraise=is_congestion_error,
+        writer=writer,
+        cache=cache,
+        limiter=get_provider_limiter(job_provider(job, judges)),
+    )
 
-async def worker_loop():
-    judges_map: Dict[str, Dict[str, Any]] = {}
-    last_judges_fetch = 0.0
-    supabase = get_supabase_client()
+@backoff.on_exception(
+    backoff.expo,
+    Exception,
+    max_tries=10,
+    jitter=backoff.random_jitter,
+    giveup=lambda exc: not is_congestion_error(exc),
+)
+async def attempt_batch(
+    jobs: List[Dict[str, Any]],
+    judges: JudgeSnapshot,
+    writer: WriteBehindBuffer,
+    cache: VerdictCache,
+    submissions: SubmissionCache,
+) -> List[Dict[str, Any]]:
+    """Run a group through one batched prompt; returns the jobs still to be judged singly."""
+    supabase = await get_async_supabase_client()
+    await submissions.attach(jobs)
+    for job in jobs:
+        require_submission(job)
+    return await run_ai_judge_batch(
+        jobs,
+        judges.judges,
+        supabase,
+        get_provider_clients(),
+        reraise=is_congestion_error,
+        writer=writer,
+        cache=cache,
+        limiter=get_provider_limiter(job_provider(jobs[0], judges)),
+    )
+
+async def process_job(
+    job: Dict[str, Any],
+    judges: JudgeSnapshot,
+    writer: WriteBehindBuffer,
+    cache: VerdictCache,
+    submissions: SubmissionCache,
+):
+    try:
+        await attempt_job(job, judges, writer, cache, submissions)
+    except Exception as exc:  # noqa: BLE001
+        writer.mark_failed(job, exc)
 
+async def process_jobs(
+    jobs: List[Dict[str, Any]],
+    judges: JudgeSnapshot,
+    writer: WriteBehindBuffer,
+    cache: VerdictCache,
+    submissions: SubmissionCache,
+):
+    if len(jobs) > 1:
+        try:
+            jobs = await attempt_batch(jobs, judges, writer, cache, submissions)
+        except Exception as exc:  # noqa: BLE001
+            for job in jobs:
+                writer.mark_failed(job, exc)
+            return
+    # Single jobs, plus whatever a batched prompt left unanswered.
+    await asyncio.gather(*(process_job(job, judges, writer, cache, submissions) for job in jobs))
+
+async def renew_leases_forever(in_flight: Set[str]):
+    supabase = await get_async_supabase_client()
     while True:
+        await asyncio.sleep(LEASE_SECONDS / 3)
         try:
-            now = time.time()
-            if now - last_judges_fetch > JUDGES_REFRESH or not judges_map:
-                judges_map = await fetch_judges_map()
-                last_judges_fetch = now
+            await renew_job_leases(supabase, WORKER_ID, sorted(in_flight), LEASE_SECONDS)
+        except Exception:  # noqa: BLE001
+            pass
 
-            resp = supabase.table("judge_jobs").select("*").eq("status", "pending").limit(BATCH_SIZE).execute()
-            jobs = resp.data or []
+async def poll_bulk_forever(interval: float):
+    supabase = await get_async_supabase_client()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await poll_bulk_batches(supabase)
+        except Exception:  # noqa: BLE001
+            pass
+
+class JobScheduler:
+    """Keeps every concurrency slot busy from a bounded, continuously refilled ready queue."""
+
+    def __init__(self, writer: WriteBehindBuffer, cache: VerdictCache, submissions: SubmissionCache) -> None:
+        self.writer = writer
+        self.cache = cache
+        self.submissions = submissions
+        self.ready: asyncio.Queue = asyncio.Queue(maxsize=READY_QUEUE_SIZE)
+        self.space = asyncio.Event()
+        self.in_flight: Set[str] = set()
+        self.judges: Optional[JudgeSnapshot] = None
+        self.completed = 0
+
+    async def refresh_judges(self, probe: bool = False) -> None:
+        supabase = await get_async_supabase_client()
+        self.judges = await get_judge_registry().get(supabase, probe=probe)
+
+    async def prefetch(self) -> None:
+        supabase = await get_async_supabase_client()
+        while True:
+            free = self.ready.maxsize - self.ready.qsize()
+            if free <= 0:
+                self.space.clear()
+                await self.space.wait()
+                continue
+            try:
+                await self.refresh_judges()
+                jobs = await claim_jobs(supabase, WORKER_ID, min(free, BATCH_SIZE), LEASE_SECONDS, MAX_ATTEMPTS)
+            except Exception:  # noqa: BLE001
+                await asyncio.sleep(POLL_INTERVAL)
+                continue
             if not jobs:
                 await asyncio.sleep(POLL_INTERVAL)
                 continue
+            if any(str(job.get("judge_id")) not in self.judges.judges for job in jobs):
+                try:
+                    await self.refresh_judges(probe=True)
+                except Exception:  # noqa: BLE001
+                    pass
+            try:
+                await self.submissions.attach(jobs)
+            except Exception:  # noqa: BLE001
+                pass  # attempt_job retries the lookup per job
+            for group in group_jobs(jobs, self.judges):
+                self.in_flight.update(str(job["id"]) for job in group)
+                self.ready.put_nowait(group)
 
-            judges_map = await fetch_judges_map()
-            job_ids = [job["id"] for job in jobs]
-            supabase.table("judge_jobs").update(
-                {"status": "running", "updated_at": datetime.now(timezone.utc).isoformat()}
-            ).in_("id", job_ids).execute()
+    async def consume(self) -> None:
+        while True:
+            jobs = await self.ready.get()
+            self.space.set()
+            try:
+                await process_jobs(jobs, self.judges, self.writer, self.cache, self.submissions)
+            except Exception:  # noqa: BLE001
+                pass
+            finally:
+                self.in_flight.difference_update(str(job["id"]) for job in jobs)
+                self.completed += len(jobs)
+                self.ready.task_done()
 
-            sem = asyncio.Semaphore(CONCURRENCY)
+    async def report(self) -> None:
+        while True:
+            before = self.completed
+            await asyncio.sleep(STATS_INTERVAL)
+            processed = self.completed - before
+            if processed:
+                print(
+                    f"[worker] {WORKER_ID} processed {processed} jobs in {STATS_INTERVAL}s "
+                    f"({processed * 60 / STATS_INTERVAL:.1f} jobs/min, ready={self.ready.qsize()}, in_flight={len(self.in_flight)})",
+                    flush=True,
+                )
+                print(f"[worker] {WORKER_ID} provider limiters: {limiter_snapshots()}", flush=True)
+                print(f"[worker] {WORKER_ID} verdict cache: {self.cache.stats()}", flush=True)
+                print(f"[worker] {WORKER_ID} submission cache: {self.submissions.stats()}", flush=True)
+                print(f"[worker] {WORKER_ID} judge registry: {get_judge_registry().stats()}", flush=True)
 
-            async def run_with_sem(job: Dict[str, Any]):
-                async with sem:
-                    await process_job(job, judges_map)
+    async def prune_cache(self) -> None:
+        while True:
+            await asyncio.sleep(VERDICT_CACHE_PRUNE_INTERVAL)
+            try:
+                await self.cache.prune(VERDICT_CACHE_MAX_ROWS)
+            except Exception:  # noqa: BLE001
+                pass
 
-            await asyncio.gather(*(run_with_sem(job) for job in jobs))
-        except Exception:  # noqa: BLE001
-            await asyncio.sleep(POLL_INTERVAL)
+async def worker_loop():
+    supabase = await get_async_supabase_client()
+    writer = WriteBehindBuffer(supabase, WRITE_BEHIND_MAX_ITEMS, WRITE_BEHIND_INTERVAL)
+    cache = VerdictCache(supabase, VERDICT_CACHE_ENTRIES, VERDICT_CACHE_TTL)
+    submissions = SubmissionCache(supabase, SUBMISSION_CACHE_ENTRIES)
+    scheduler = JobScheduler(writer, cache, submissions)
+    tasks = [
+        asyncio.create_task(writer.run()),
+        asyncio.create_task(scheduler.prefetch()),
+        asyncio.create_task(renew_leases_forever(scheduler.in_flight)),
+        asyncio.create_task(scheduler.report()),
+        asyncio.create_task(scheduler.prune_cache()),
+    ]
+    if get_settings().bulk_poll_interval > 0:
+        tasks.append(asyncio.create_task(poll_bulk_forever(get_settings().bulk_poll_interval)))
+    tasks.extend(asyncio.create_task(scheduler.consume()) for _ in range(CONCURRENCY))
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await writer.close()
 
 if __name__ == "__main__":
     try: